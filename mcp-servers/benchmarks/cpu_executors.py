@@ -0,0 +1,101 @@
+"""Benchmark fuzzy name search and recommendation scoring in thread, process and subinterpreter pools."""
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, InterpreterPoolExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from record_memory import generate_customers
+
+import interpreter_pool
+import products_db
+
+
+def typo_queries(names: list[str], count: int, seed: int = 42) -> list[str]:
+    """Pick `count` names and swap two adjacent letters of each, so every query takes the fuzzy path."""
+    rng = random.Random(seed)
+    queries = []
+    for name in rng.sample(names, count):
+        i = rng.randrange(len(name) - 1)
+        queries.append(name[:i] + name[i + 1] + name[i] + name[i + 2 :])
+    return queries
+
+
+def run(
+    executor_factory: Callable[[], Executor] | None,
+    queries: list[str],
+    batches: list[tuple[tuple[str, dict], ...]],
+    workers: int,
+) -> tuple[float, float, float]:
+    """Return the warm-up time in ms, the fuzzy searches per second and the customers scored per second."""
+    start = time.perf_counter()
+    if executor_factory is None:
+        # Serial baseline in the calling thread
+        interpreter_pool.fuzzy_search(queries[0], 2)
+        warm_up_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for query in queries:
+            interpreter_pool.fuzzy_search(query, 2)
+        search_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for batch in batches:
+            interpreter_pool.score_customers(batch)
+        score_s = time.perf_counter() - start
+    else:
+        with executor_factory() as executor:
+            # Start every worker and let it build its name indexes
+            for future in [executor.submit(interpreter_pool.fuzzy_search, query, 2) for query in queries[:workers]]:
+                future.result()
+            warm_up_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for future in [executor.submit(interpreter_pool.fuzzy_search, query, 2) for query in queries]:
+                future.result()
+            search_s = time.perf_counter() - start
+            start = time.perf_counter()
+            list(executor.map(interpreter_pool.score_customers, batches))
+            score_s = time.perf_counter() - start
+    customer_count = sum(len(batch) for batch in batches)
+    return warm_up_ms, len(queries) / search_s, customer_count / score_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=interpreter_pool.WORKERS)
+    args = parser.parse_args()
+
+    customers = [(customer["customer_id"], customer) for customer in generate_customers(args.customers)]
+    names = tuple((customer_id, customer["personal_info"]["name"]) for customer_id, customer in customers)
+    products = tuple(products_db.get_all_products().items())
+    queries = typo_queries([name for _, name in names], args.queries)
+    batches = list(itertools.batched(customers, interpreter_pool.SCORE_BATCH_SIZE))
+    initargs = (products, names)
+
+    # Threads share the module state of this interpreter, including the name indexes the serial run
+    # builds, so their warm-up only starts the threads
+    interpreter_pool.init_worker(*initargs)
+    executors: dict[str, Callable[[], Executor] | None] = {
+        "serial": None,
+        "threads": lambda: ThreadPoolExecutor(max_workers=args.workers),
+        "processes": lambda: ProcessPoolExecutor(
+            max_workers=args.workers, initializer=interpreter_pool.init_worker, initargs=initargs
+        ),
+        "interpreters": lambda: InterpreterPoolExecutor(
+            max_workers=args.workers, initializer=interpreter_pool.init_worker, initargs=initargs
+        ),
+    }
+
+    gil = "enabled" if getattr(sys, "_is_gil_enabled", lambda: True)() else "disabled"
+    print(f"\n{args.customers:,} customers, {args.queries} fuzzy searches, {args.workers} workers, GIL {gil}")
+    print(f"  {'executor':<14}{'warm-up ms':>12}{'searches/s':>12}{'scored/s':>12}")
+    for name, factory in executors.items():
+        warm_up_ms, searches_per_s, scored_per_s = run(factory, queries, batches, args.workers)
+        print(f"  {name:<14}{warm_up_ms:>12,.0f}{searches_per_s:>12,.0f}{scored_per_s:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
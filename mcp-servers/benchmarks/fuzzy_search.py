@@ -0,0 +1,83 @@
+"""Benchmark the build cost and memory of the SymSpell name index against its lookup time, per prefix length."""
+
+import argparse
+import random
+import sys
+import time
+
+from name_search import FIRST_NAMES, generate_names, time_call
+
+import fuzzy_index
+
+SYLLABLES = [
+    "ber", "man", "son", "ko", "la", "win", "ter", "hol", "strom", "berg", "ri", "na", "vel", "dor", "ste",
+    "ga", "lin", "mo", "ka", "zel", "fer", "hau", "sen", "bau", "ring", "ta", "ck", "del", "ho", "mer",
+]  # fmt: skip
+
+
+def generate_varied_names(count: int, seed: int = 42) -> dict[str, str]:
+    """
+    Generate `count` names with made-up last names of two to four syllables.
+
+    Unlike the numbered names of `generate_names`, whose last names all have thousands of
+    neighbours within two edits, these spread over the token space like real names.
+    """
+    rng = random.Random(seed)
+    return {
+        f"cust{i:07d}": f"{rng.choice(FIRST_NAMES)} "
+        + "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        for i in range(count)
+    }
+
+
+def with_typo(name: str, rng: random.Random) -> str:
+    """Swap two adjacent characters of `name`, the most common typo brokers make."""
+    i = rng.randrange(len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2 :]
+
+
+def search_all(index: fuzzy_index.SymSpellIndex, queries: list[str]) -> None:
+    for query in queries:
+        index.search(query)
+
+
+def delete_map_mb(index: fuzzy_index.SymSpellIndex) -> float:
+    """Approximate size of the delete variant map, which dominates the memory of the index."""
+    return sum(sys.getsizeof(variant) + sys.getsizeof(tokens) for variant, tokens in index._deletes.items()) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--prefix-lengths", type=int, nargs="+", default=[10, 8, 7, 6])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for label, names in (("numbered", generate_names(args.size)), ("varied", generate_varied_names(args.size))):
+        rng = random.Random(1)
+        queries = [with_typo(name, rng) for name in rng.sample(list(names.values()), args.queries)]
+        print(f"\n{args.size:,} {label} names, {len(queries)} queries with one transposition each")
+        print(f"  {'prefix':>6}{'build ms':>11}{'variants':>12}{'map MB':>9}{'lookup ms':>11}{'found':>8}")
+
+        found_by_prefix = {}
+        for prefix_length in args.prefix_lengths:
+            start = time.perf_counter()
+            index = fuzzy_index.SymSpellIndex(prefix_length=prefix_length)
+            for customer_id, name in names.items():
+                index.add(customer_id, name)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            found_by_prefix[prefix_length] = sum(bool(index.search(query)) for query in queries)
+            lookup_ms = time_call(search_all, index, queries, repeat=args.repeat) / len(queries)
+            print(
+                f"  {prefix_length:>6}{build_ms:>11,.0f}{len(index._deletes):>12,}{delete_map_mb(index):>9,.0f}"
+                f"{lookup_ms:>11.3f}{found_by_prefix[prefix_length]:>8}"
+            )
+
+        # Candidates are verified against the full token, so the prefix length never changes what is found
+        assert len(set(found_by_prefix.values())) == 1, f"prefix lengths find different names: {found_by_prefix}"
+
+
+if __name__ == "__main__":
+    main()
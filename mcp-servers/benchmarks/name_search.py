@@ -0,0 +1,75 @@
+"""Benchmark the trigram name index against the linear name scan it replaced."""
+
+import argparse
+import random
+import statistics
+import time
+
+import name_index
+
+FIRST_NAMES = [
+    "Anna", "Thomas", "Lukas", "Sophie", "Elias", "Mia", "Felix", "Lena", "Jonas", "Hanna", "Leon", "Emilia",
+    "Noah", "Laura", "Ben", "Clara", "Paul", "Marie", "Finn", "Lina", "Moritz", "Ida", "Anton", "Johanna",
+    "Oskar", "Charlotte", "Jakob", "Greta", "Theodor", "Frieda", "Karl", "Emma",
+]  # fmt: skip
+LAST_NAMES = [
+    "Müller", "Schmidt", "Weber", "Becker", "Roth", "Wagner", "Hoffmann", "Schulz", "Zimmermann", "Köhler",
+    "Bauer", "Fuchs", "Meyer", "Keller", "Richter", "Wolf", "Neumann", "Schwarz", "Lange", "Schreiber", "Haas",
+    "Simon", "Graf", "Franke", "Peters", "Gärtner", "Seidel", "Sommer", "Winter", "Vogel", "Busch", "Lorentz",
+]  # fmt: skip
+QUERIES = ["Anna Müller", "müller", "Greta Som", "zimmer", "xyz", "an"]
+
+
+def generate_names(count: int, seed: int = 42) -> dict[str, str]:
+    """Generate `count` synthetic customer names with a random numeric suffix on the last name."""
+    rng = random.Random(seed)
+    return {
+        f"cust{i:07d}": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{rng.randrange(count)}"
+        for i in range(count)
+    }
+
+
+def linear_scan(names: dict[str, str], term: str) -> list[str]:
+    """The pre-index search_customer_by_name strategy: lower-case and substring-scan every name per query."""
+    term = term.strip().lower()
+    return [customer_id for customer_id, name in names.items() if term in name.lower()]
+
+
+def time_call(fn, *args, repeat: int) -> float:
+    """Return the median wall time of `fn(*args)` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        names = generate_names(size)
+        start = time.perf_counter()
+        index = name_index.TrigramIndex()
+        for customer_id, name in names.items():
+            index.add(customer_id, name)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"\n{size:>9,} customers (index build {build_ms:,.0f} ms)")
+        print(f"  {'query':<14}{'matches':>9}{'scan ms':>11}{'index ms':>11}{'speedup':>10}")
+
+        for query in QUERIES:
+            expected = linear_scan(names, query)
+            # The index also ignores accents, so it may find more names than the scan, but never fewer
+            assert set(expected) <= set(index.search(query)), f"index misses names the scan finds for {query!r}"
+            scan_ms = time_call(linear_scan, names, query, repeat=args.repeat)
+            index_ms = time_call(index.search, query, repeat=args.repeat)
+            speedup = scan_ms / index_ms if index_ms else float("inf")
+            print(f"  {query!r:<14}{len(expected):>9,}{scan_ms:>11.3f}{index_ms:>11.3f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
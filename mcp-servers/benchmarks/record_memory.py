@@ -0,0 +1,66 @@
+"""Benchmark the memory held by customers stored as plain dict trees versus compact records."""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator, MutableMapping
+
+import customer_db
+import records
+
+
+def generate_customers(count: int) -> Iterator[dict]:
+    """
+    Yield `count` customers cloned from the mock data with unique IDs and names.
+
+    Every customer is decoded from JSON separately, so no strings are shared between customers
+    that would not be shared when loading real data.
+    """
+    templates = [json.dumps(customer) for customer in customer_db._mock_database.values()]
+    for i in range(count):
+        customer = json.loads(templates[i % len(templates)])
+        customer["customer_id"] = f"cust{i:07d}"
+        customer["personal_info"]["name"] = f"{customer['personal_info']['name']} {i}"
+        yield customer
+
+
+def measure(count: int, store_factory: Callable[[], MutableMapping[str, dict]]) -> tuple[int, float]:
+    """Load `count` customers into a new store and return the bytes it retains and the load time in seconds."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = store_factory()
+    for customer in generate_customers(count):
+        store[customer["customer_id"]] = customer
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return retained, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    args = parser.parse_args()
+
+    stores: dict[str, Callable[[], MutableMapping[str, dict]]] = {
+        "dict": dict,
+        "records": lambda: records.CompactRecords(records.Customer),
+    }
+    for size in args.sizes:
+        print(f"\n{size:,} customers")
+        results = {name: measure(size, factory) for name, factory in stores.items()}
+        for name, (retained, elapsed) in results.items():
+            print(f"  {name:<8} {retained / 2**20:8.1f} MiB  {retained / size:7.0f} B/customer  load {elapsed:5.2f} s")
+        saved = results["dict"][0] - results["records"][0]
+        print(
+            f"  saved    {saved / 2**20:8.1f} MiB ({saved / results['dict'][0]:.0%}), {saved / size * 100_000 / 2**20:.1f} MiB per 100k"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark server start-up with and without fast start: import, data load and first request latency.
+
+Servers are started like `serve.py` starts a single worker, which does not call `preload`. Their data
+is loaded while the data modules are imported, so the child runs with `-X importtime` and the data
+load is the time spent in the bodies of those modules, excluding their own imports.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# A cheap tool call per server, answered from data loaded at import
+PROBES = {
+    "customer_crm": ("get_customer_crm_data", {"customer_id": "cust001"}),
+    "insurance_products": ("get_product_details", {"product_id": "LIFE001"}),
+}
+# Modules that load their data when they are imported
+DATA_MODULES = {"customer_db", "products_db"}
+
+
+def child(server_name: str, port: int, fast_start: bool) -> None:
+    """Start a server the way serve.py starts a single worker, reporting the phase timings on stdout before serving."""
+    started_at = time.time()
+    start = time.perf_counter()
+    import otel
+    import serve
+
+    if fast_start:
+        otel.defer_setup()
+    server = importlib.import_module(server_name)
+    imported = time.perf_counter()
+    sock = serve._listen("127.0.0.1", port, reuse_port=False)
+    timings = {
+        "started_at": started_at,
+        "import_ms": (imported - start) * 1000,
+        "listening_at": time.time(),
+    }
+    print(json.dumps(timings), flush=True)
+    serve._serve_worker(server, sock, stateless_http=False)
+
+
+async def first_request(port: int, tool: str, arguments: dict) -> None:
+    # Imported here, so that child processes don't load the client; main loads it before timing
+    from fastmcp import Client
+
+    async with Client(f"http://127.0.0.1:{port}/mcp") as client:
+        await client.call_tool(tool, arguments)
+
+
+def data_load_ms(import_times: str) -> float:
+    """Sum the self times of the data modules in `-X importtime` output."""
+    total_us = 0
+    for line in import_times.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, module = line.removeprefix("import time:").split("|")
+        if module.strip() in DATA_MODULES:
+            total_us += int(self_us)
+    return total_us / 1000
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure(server_name: str, fast_start: bool) -> dict[str, float]:
+    """Start a server in a new process and return its phase timings in milliseconds."""
+    port = free_port()
+    command = [sys.executable, "-X", "importtime", __file__, "--child", "--server", server_name, "--port", str(port)]
+    if fast_start:
+        command.append("--fast-start")
+    with tempfile.TemporaryFile("w+") as stderr:
+        spawned_at = time.time()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        try:
+            assert process.stdout is not None
+            timings = json.loads(process.stdout.readline())
+            asyncio.run(first_request(port, *PROBES[server_name]))
+            answered_at = time.time()
+        finally:
+            process.terminate()
+            process.wait()
+        stderr.seek(0)
+        data_load = data_load_ms(stderr.read())
+    return {
+        "interpreter": (timings["started_at"] - spawned_at) * 1000,
+        # The data modules are imported along with the server
+        "import": timings["import_ms"] - data_load,
+        "data load": data_load,
+        "first request": (answered_at - timings["listening_at"]) * 1000,
+        "total": (answered_at - spawned_at) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--servers", nargs="+", choices=PROBES, default=list(PROBES))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--fast-start", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.server, args.port, args.fast_start)
+        return
+
+    importlib.import_module("fastmcp")
+    for server_name in args.servers:
+        print(f"\n{server_name} (median of {args.runs} starts, ms)")
+        print(f"  {'mode':<12}{'interpreter':>13}{'import':>10}{'data load':>11}{'first request':>15}{'total':>9}")
+        for mode, fast_start in (("default", False), ("fast start", True)):
+            runs = [measure(server_name, fast_start) for _ in range(args.runs)]
+            medians = {phase: statistics.median(run[phase] for run in runs) for phase in runs[0]}
+            print(
+                f"  {mode:<12}{medians['interpreter']:>13,.0f}{medians['import']:>10,.0f}"
+                f"{medians['data load']:>11,.0f}{medians['first request']:>15,.0f}{medians['total']:>9,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Bloom filter for cheap negative membership checks in front of slower lookups."""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    A fixed-size probabilistic set: membership tests never miss an added item, but may report
+    items that were never added with a probability of roughly `error_rate` while at most
+    `capacity` items have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.capacity = max(capacity, 1)
+        self._size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hash_count = max(1, round(self._size / self.capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: derive all k bit positions from two independent 64-bit hashes
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self._size for i in range(self._hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def is_saturated(self) -> bool:
+        """Whether more items were added than the filter was sized for, raising the false-positive rate."""
+        return self.count > self.capacity
@@ -0,0 +1,24 @@
+"""Mapping of customer policy types onto the product catalog's type taxonomy."""
+
+# Policy product types whose name differs from the catalog type covering them
+_POLICY_TYPE_ALIASES = {
+    "car insurance": "auto insurance",
+    "personal cyber insurance": "cyber insurance",
+}
+
+
+def product_type_of_policy(policy_type: str) -> str:
+    """Map a policy's product type (e.g. "Car Insurance") onto the catalog type taxonomy (e.g. "auto insurance")."""
+    normalized = " ".join(policy_type.casefold().split())
+    return _POLICY_TYPE_ALIASES.get(normalized, normalized)
+
+
+def held_product_types(customer: dict) -> list[str]:
+    """Return the catalog types of a customer's existing policies, without duplicates."""
+    return list(
+        dict.fromkeys(
+            product_type_of_policy(policy["product_type"])
+            for policy in customer.get("existing_policies", [])
+            if policy.get("product_type")
+        )
+    )
@@ -0,0 +1,266 @@
+"""Columnar NumPy view of customer attributes for vectorized analytical filters."""
+
+import functools
+import os
+from collections.abc import Callable, Collection, Iterable, Mapping, Sequence
+from typing import Self
+
+import numpy as np
+
+import coverage
+
+# Attributes stored as float64 columns, with NaN for missing values
+NUMERIC_ATTRIBUTES = ("age", "annual_income", "children", "lifetime_value")
+# Attributes stored as dictionary-encoded int16 codes, with -1 for missing values
+CATEGORICAL_ATTRIBUTES = ("marital_status", "home_ownership", "risk_profile", "customer_segment")
+# Held catalog product types are stored as one uint64 bitmap per customer, one bit per type
+MAX_PRODUCT_TYPES = 64
+
+_INITIAL_CAPACITY = 1024
+
+
+def _attribute(customer: dict, name: str) -> object:
+    """Read an attribute from the top level of a customer record or from its personal_info."""
+    if name in customer:
+        return customer[name]
+    return customer.get("personal_info", {}).get(name)
+
+
+class CustomerColumns:
+    """
+    Customer attributes laid out as one NumPy array per attribute, indexed by a row position.
+
+    Rows are appended in the order customers are added and updated in place when a known customer
+    changes. Filters combine per-attribute boolean masks, so evaluating a compound filter is a
+    handful of vectorized comparisons over contiguous arrays instead of a loop over records.
+
+    The product types a customer holds policies for are kept as a bitmap over the catalog type
+    taxonomy (see `coverage`), with a bit for each of the first MAX_PRODUCT_TYPES `product_types`.
+    Policy types outside the catalog are rare and unbounded, so they get no bit; they are kept per
+    row in a sparse dict and matched by a scan over it.
+
+    Writers must be serialized by the caller, readers need no lock: a new row is filled before it
+    becomes visible by incrementing the size, and readers work on the rows up to the size they
+    read first. Grown arrays are filled before they replace the old ones. Rewriting a known row
+    takes several array stores, so it is bracketed by a sequence counter that is odd meanwhile;
+    readers retry whenever the counter was odd or changed while they read (a sequence lock).
+    """
+
+    def __init__(self, product_types: Sequence[str] = ()) -> None:
+        self._size = 0
+        self._capacity = _INITIAL_CAPACITY
+        self._customer_ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._numeric = {name: np.full(self._capacity, np.nan) for name in NUMERIC_ATTRIBUTES}
+        self._codes = {name: np.full(self._capacity, -1, dtype=np.int16) for name in CATEGORICAL_ATTRIBUTES}
+        self._vocabularies: dict[str, dict[str, int]] = {name: {} for name in CATEGORICAL_ATTRIBUTES}
+        self._held_types = np.zeros(self._capacity, dtype=np.uint64)
+        self._type_bits = {
+            product_type: bit
+            for bit, product_type in enumerate(dict.fromkeys(product_types))
+            if bit < MAX_PRODUCT_TYPES
+        }
+        # Held types without a bit, by row, for the rows holding any
+        self._other_types: dict[int, frozenset[str]] = {}
+        # Incremented before and after a known row is rewritten
+        self._sequence = 0
+
+    @classmethod
+    def from_customers(cls, customers: Iterable[tuple[str, dict]], product_types: Sequence[str] = ()) -> Self:
+        columns = cls(product_types)
+        for customer_id, customer in customers:
+            columns.put(customer_id, customer)
+        return columns
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        for name, values in self._numeric.items():
+            grown = np.full(self._capacity, np.nan)
+            grown[: self._size] = values[: self._size]
+            self._numeric[name] = grown
+        for name, codes in self._codes.items():
+            grown_codes = np.full(self._capacity, -1, dtype=np.int16)
+            grown_codes[: self._size] = codes[: self._size]
+            self._codes[name] = grown_codes
+        grown_types = np.zeros(self._capacity, dtype=np.uint64)
+        grown_types[: self._size] = self._held_types[: self._size]
+        self._held_types = grown_types
+
+    def _encode(self, name: str, value: object) -> int:
+        if not isinstance(value, str):
+            return -1
+        vocabulary = self._vocabularies[name]
+        code = vocabulary.get(value)
+        if code is None:
+            code = vocabulary[value] = len(vocabulary)
+        return code
+
+    def _type_mask(self, product_types: Iterable[str]) -> np.uint64:
+        """Return the bitmap of the given product types, ignoring types without a bit."""
+        bits = 0
+        for product_type in product_types:
+            if product_type in self._type_bits:
+                bits |= 1 << self._type_bits[product_type]
+        return np.uint64(bits)
+
+    def _other_type_mask(self, product_type: str, size: int) -> np.ndarray:
+        """Return a boolean mask over the first `size` rows holding `product_type`, a type without a bit."""
+        mask = np.zeros(size, dtype=bool)
+        rows = [row for row, types in list(self._other_types.items()) if row < size and product_type in types]
+        mask[rows] = True
+        return mask
+
+    def _read[T](self, read: Callable[[], T]) -> T:
+        """Return the result of `read` from a run during which no known row was rewritten."""
+        while True:
+            sequence = self._sequence
+            if sequence % 2 == 0:
+                result = read()
+                if self._sequence == sequence:
+                    return result
+            # Let the writer finish the row
+            os.sched_yield()
+
+    def put(self, customer_id: str, customer: dict) -> None:
+        """Add a customer, or overwrite the attributes of a customer that was added before."""
+        numeric = {}
+        for name in NUMERIC_ATTRIBUTES:
+            value = _attribute(customer, name)
+            numeric[name] = value if isinstance(value, int | float) else np.nan
+        codes = {name: self._encode(name, _attribute(customer, name)) for name in CATEGORICAL_ATTRIBUTES}
+        held = 0
+        other_types = []
+        for product_type in coverage.held_product_types(customer):
+            bit = self._type_bits.get(product_type)
+            if bit is None:
+                other_types.append(product_type)
+            else:
+                held |= 1 << bit
+
+        row = self._rows.get(customer_id)
+        if row is None:
+            if self._size == self._capacity:
+                self._grow()
+            self._write_row(self._size, numeric, codes, held, other_types)
+            self._customer_ids.append(customer_id)
+            self._rows[customer_id] = self._size
+            self._size += 1
+            return
+        self._sequence += 1
+        try:
+            self._write_row(row, numeric, codes, held, other_types)
+        finally:
+            self._sequence += 1
+
+    def _write_row(
+        self, row: int, numeric: dict[str, float], codes: dict[str, int], held: int, other_types: list[str]
+    ) -> None:
+        for name, value in numeric.items():
+            self._numeric[name][row] = value
+        for name, code in codes.items():
+            self._codes[name][row] = code
+        self._held_types[row] = held
+        if other_types:
+            self._other_types[row] = frozenset(other_types)
+        else:
+            self._other_types.pop(row, None)
+
+    def held_product_types(self, customer_id: str) -> list[str] | None:
+        """Decode the held product types of a customer from its bitmap, or return None for unknown customers."""
+        row = self._rows.get(customer_id)
+        if row is None:
+            return None
+        held, other_types = self._read(lambda: (int(self._held_types[row]), self._other_types.get(row, frozenset())))
+        held_types = [product_type for product_type, bit in self._type_bits.items() if held >> bit & 1]
+        return held_types + sorted(other_types)
+
+    def missing_product_types(self, customer_id: str, product_types: Iterable[str]) -> list[str] | None:
+        """Return those of `product_types` a customer holds no policy for, or None for unknown customers."""
+        row = self._rows.get(customer_id)
+        if row is None:
+            return None
+        held, other_types = self._read(lambda: (int(self._held_types[row]), self._other_types.get(row, frozenset())))
+        return [
+            product_type
+            for product_type in product_types
+            if product_type not in other_types
+            and (product_type not in self._type_bits or not held >> self._type_bits[product_type] & 1)
+        ]
+
+    def values(self, name: str, customer_ids: Iterable[str]) -> np.ndarray:
+        """Return a numeric attribute of the given customers, with NaN for unknown customers."""
+        rows = np.array([self._rows.get(customer_id, -1) for customer_id in customer_ids], dtype=np.intp)
+        return self._read(lambda: np.where(rows >= 0, self._numeric[name][rows], np.nan))
+
+    def customer_id(self, row: int) -> str:
+        return self._customer_ids[row]
+
+    def categories(self, name: str) -> list[str]:
+        """Return the values seen so far for a categorical attribute."""
+        return list(self._vocabularies[name])
+
+    def mask(
+        self,
+        ranges: Mapping[str, tuple[float | None, float | None]] | None = None,
+        categories: Mapping[str, Collection[str]] | None = None,
+        held_types: Collection[str] = (),
+        missing_types: Collection[str] = (),
+    ) -> np.ndarray:
+        """
+        Return a boolean mask over all rows matching every given condition.
+
+        `ranges` maps numeric attributes to inclusive `(minimum, maximum)` bounds, either of which
+        may be None; customers with a missing value never match a bounded attribute. `categories`
+        maps categorical attributes to the accepted values; unknown values match nothing.
+        Customers must hold policies of all `held_types` and of none of the `missing_types`.
+        """
+        return self._read(functools.partial(self._mask, ranges, categories, held_types, missing_types))
+
+    def _mask(
+        self,
+        ranges: Mapping[str, tuple[float | None, float | None]] | None,
+        categories: Mapping[str, Collection[str]] | None,
+        held_types: Collection[str],
+        missing_types: Collection[str],
+    ) -> np.ndarray:
+        size = self._size
+        mask = np.ones(size, dtype=bool)
+        for name, (minimum, maximum) in (ranges or {}).items():
+            values = self._numeric[name][:size]
+            if minimum is not None:
+                mask &= values >= minimum
+            if maximum is not None:
+                mask &= values <= maximum
+        for name, accepted in (categories or {}).items():
+            # Copied before reading the vocabulary, which then knows every code in the copy
+            codes = self._codes[name][:size].copy()
+            vocabulary = self._vocabularies[name]
+            # Lookup table indexed by code; the extra last entry is hit by the missing-value code -1
+            accepted_codes = np.zeros(len(vocabulary) + 1, dtype=bool)
+            accepted_codes[[vocabulary[value] for value in accepted if value in vocabulary]] = True
+            mask &= accepted_codes[codes]
+        if held_types or missing_types:
+            held = self._held_types[:size]
+            required = self._type_mask(held_types)
+            mask &= (held & required) == required
+            mask &= (held & self._type_mask(missing_types)) == 0
+            for product_type in held_types:
+                if product_type not in self._type_bits:
+                    mask &= self._other_type_mask(product_type, size)
+            for product_type in missing_types:
+                if product_type not in self._type_bits:
+                    mask &= ~self._other_type_mask(product_type, size)
+        return mask
+
+    def matching_rows(
+        self,
+        ranges: Mapping[str, tuple[float | None, float | None]] | None = None,
+        categories: Mapping[str, Collection[str]] | None = None,
+        held_types: Collection[str] = (),
+        missing_types: Collection[str] = (),
+    ) -> np.ndarray:
+        """Return the ascending row positions of the customers matching the filter (see `mask`)."""
+        return np.flatnonzero(self.mask(ranges, categories, held_types, missing_types))
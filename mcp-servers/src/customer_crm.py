@@ -1,22 +1,93 @@
 """Customer CRM MCP server."""
 
+import datetime
+import math
+from collections.abc import Iterator
+
+import numpy as np
 from fastmcp import FastMCP
 from opentelemetry.trace import get_tracer
 
 import customer_db
+import fuzzy_index
 import middleware
+import offload
 import otel
+import pagination
+import products_db
+import quotes
 import response
 
 otel.setup_otel()
 tracer = get_tracer(__name__)
 
-# Create an MCP server for customer CRM data
+# Upper bound on the number of customer IDs accepted by get_customers_crm_data
+MAX_BATCH_SIZE = 100
+
+# Upper bound on the number of customer IDs accepted by get_premium_quotes
+MAX_QUOTE_BATCH_SIZE = 1000
+
+# Upper bound on the number of coverage amounts accepted by get_premium_quotes
+MAX_COVERAGE_LEVELS = 20
+
+# Upper bound on the number of ranked candidates returned by the fuzzy name search fallback
+FUZZY_CANDIDATE_LIMIT = 10
+
+# Fields that can be selected via the `fields` argument of search_customer_by_name
+CUSTOMER_TOP_LEVEL_FIELDS = (
+    "existing_policies",
+    "communication_history",
+    "risk_profile",
+    "customer_segment",
+    "lifetime_value",
+)
+CUSTOMER_PERSONAL_INFO_FIELDS = (
+    "name",
+    "birth_date",
+    "age",
+    "address",
+    "phone",
+    "email",
+    "occupation",
+    "annual_income",
+    "marital_status",
+    "children",
+    "home_ownership",
+)
+SEARCH_DETAIL_LEVELS = ("auto", "summary", "full")
+
+
+def _project_customer(customer_id: str, customer_data: dict, fields: list[str]) -> dict:
+    """Extract only the requested fields from a customer record, flattening personal_info."""
+    personal_info = customer_data.get("personal_info", {})
+    projected: dict = {"customer_id": customer_id}
+    for field in fields:
+        if field in CUSTOMER_TOP_LEVEL_FIELDS:
+            projected[field] = customer_data.get(field)
+        else:
+            projected[field] = personal_info.get(field)
+    return projected
+
+
+# Create an MCP server for customer CRM data. Tools that only read records await the async storage
+# interface; tools that query in-process indexes run in the bounded worker pool (see `offload`).
 mcp: FastMCP = FastMCP(name="Customer CRM", middleware=[middleware.OtelMetricsMiddleware()])
 
 
+def preload() -> None:
+    """Build the customer indexes up front instead of on the first query (see `serve`)."""
+    customer_db.preload()
+
+
+def warm_up() -> None:
+    """Build the name indexes and recommendations; run in the background once the server is listening (see `serve`)."""
+    customer_db.warm_up()
+
+
 @mcp.tool()
-def get_customer_crm_data(customer_id: str) -> dict:
+async def get_customer_crm_data(
+    customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+) -> dict:
     """
     Retrieves a comprehensive 360-degree view of a customer from the CRM system.
 
@@ -28,6 +99,9 @@ def get_customer_crm_data(customer_id: str) -> dict:
     Args:
         customer_id (str): The unique identifier for the customer (e.g., "cust001").
                            This ID is required to locate the customer's record.
+        since (str | None): Only include communication history entries on or after this date (YYYY-MM-DD).
+        until (str | None): Only include communication history entries on or before this date (YYYY-MM-DD).
+        limit (int | None): Only include the most recent `limit` communication history entries of that period.
 
     Returns:
         dict: A dictionary containing the execution status and the customer's data.
@@ -61,6 +135,9 @@ def get_customer_crm_data(customer_id: str) -> dict:
                       ...
                   }
               }
+              The communication history is ordered newest first. If since, until or limit is given,
+              "communication_history_total" holds the number of entries in the requested period,
+              including those cut off by the limit.
               On failure, the dictionary will contain:
               {
                   "status": "error",
@@ -80,9 +157,9 @@ def get_customer_crm_data(customer_id: str) -> dict:
     Error Handling:
         - If the status is "error" with the error_code "MISSING_CUSTOMER_ID",
           you must ask the user to provide the customer ID.
-        - If the tool returns any other error (e.g., a customer ID that is not found
-          in the system), inform the user that you were unable to retrieve their
-          information and ask them to verify the ID they provided. Do not retry
+        - If the tool returns any other error (e.g., the error_code "CUSTOMER_NOT_FOUND" for a
+          customer ID that is not found in the system), inform the user that you were unable to
+          retrieve their information and ask them to verify the ID they provided. Do not retry
           with the same ID.
     """
     if not customer_id or not customer_id.strip():
@@ -90,57 +167,208 @@ def get_customer_crm_data(customer_id: str) -> dict:
 
     customer_id = customer_id.strip()
 
-    # For skeleton purposes, using mock data based on customer_id
+    try:
+        since = datetime.date.fromisoformat(since).isoformat() if since else None
+        until = datetime.date.fromisoformat(until).isoformat() if until else None
+    except ValueError:
+        return response.create_error_response("Dates must be given as YYYY-MM-DD.", "INVALID_DATE")
+    if limit is not None and limit < 0:
+        return response.create_error_response("The limit must not be negative.", "INVALID_LIMIT")
+    windowed = since is not None or until is not None or limit is not None
+
     with tracer.start_as_current_span("customer_db.get_customer", attributes={"customer_id": customer_id}):
-        if int(customer_id.lower()[-3:]) <= customer_db.get_database_size():
-            mock_customer_data = customer_db.get_customer(customer_id)
-        else:
-            # Default customer data for other IDs
-            mock_customer_data = {
-                "customer_id": customer_id,
-                "personal_info": {
-                    "name": "Max Mustermann",
-                    "birth_date": "1990-01-01",
-                    "age": 34,
-                    "address": "Musterstraße 1, 12345 München",
-                    "phone": "+49 89 12345678",
-                    "email": "max.mustermann@email.com",
-                    "occupation": "Office Worker",
-                    "annual_income": 45000,
-                    "marital_status": "single",
-                    "children": 0,
-                    "home_ownership": "renter",
-                },
-                "existing_policies": [],
-                "communication_history": [
-                    {
-                        "date": "2024-01-05",
-                        "type": "web_inquiry",
-                        "subject": "Insurance information request",
-                        "notes": "Customer submitted online form asking for insurance quotes",
-                    }
-                ],
-                "risk_profile": "medium",
-                "customer_segment": "standard",
-                "lifetime_value": 5000,
+        customer_data = await customer_db.get_customer_async(customer_id, with_history=not windowed)
+
+    if customer_data is None:
+        return response.create_error_response(
+            f"Customer with ID '{customer_id}' not found",
+            "CUSTOMER_NOT_FOUND",
+            requested_customer_id=customer_id,
+        )
+
+    if not windowed:
+        return response.create_success_response(
+            f"Customer CRM data retrieved for {customer_id}",
+            customer_data=customer_data,
+        )
+
+    with tracer.start_as_current_span("customer_db.get_customer_history", attributes={"customer_id": customer_id}):
+        entries, total = await customer_db.get_customer_history_async(customer_id, since, until, limit) or ([], 0)
+    return response.create_success_response(
+        f"Customer CRM data retrieved for {customer_id} with {len(entries)} of {total} communication(s) in the period",
+        customer_data={**customer_data, "communication_history": entries},
+        communication_history_total=total,
+    )
+
+
+@mcp.tool()
+async def get_customers_crm_data(customer_ids: list[str]) -> dict:
+    """
+    Retrieves the complete CRM records of several customers in a single call.
+
+    This is the batch variant of get_customer_crm_data: it returns the same 360-degree customer
+    view for every requested ID, fetched in one pass over the customer database.
+
+    Args:
+        customer_ids (list[str]): The customer IDs to retrieve (e.g., ["cust001", "cust002"]),
+                                  at most 100 per call. Duplicates are ignored.
+
+    Returns:
+        dict: A dictionary containing the records found and a per-ID error for every other ID.
+              On success (even if some IDs were not found):
+              {
+                  "status": "success",
+                  "message": "Retrieved X of Y customer(s)",
+                  "customers": {
+                      "cust001": { ... same structure as customer_data of get_customer_crm_data ... }
+                  },
+                  "errors": {
+                      "cust999": {
+                          "error_code": "CUSTOMER_NOT_FOUND",
+                          "message": "Customer with ID 'cust999' not found"
+                      }
+                  },
+                  "found_count": 1,
+                  "error_count": 1
+              }
+              On failure, the dictionary will contain:
+              {
+                  "status": "error",
+                  "message": "A description of what went wrong.",
+                  "error_code": "MISSING_CUSTOMER_IDS" or "TOO_MANY_CUSTOMER_IDS"
+              }
+
+    Usage Guidance:
+        Prefer this tool over repeated get_customer_crm_data calls whenever you need the records
+        of several customers, e.g. to analyze cross-selling opportunities across a portfolio.
+        Report IDs listed under "errors" to the user instead of retrying them.
+    """
+    requested_ids = list(dict.fromkeys(customer_id.strip() for customer_id in customer_ids or []))
+    if not requested_ids:
+        return response.create_error_response("At least one customer ID is required.", "MISSING_CUSTOMER_IDS")
+    if len(requested_ids) > MAX_BATCH_SIZE:
+        return response.create_error_response(
+            f"At most {MAX_BATCH_SIZE} customer IDs can be retrieved per call, got {len(requested_ids)}.",
+            "TOO_MANY_CUSTOMER_IDS",
+        )
+
+    errors: dict[str, dict] = {}
+    if "" in requested_ids:
+        requested_ids.remove("")
+        errors[""] = {"error_code": "MISSING_CUSTOMER_ID", "message": "Customer ID is required."}
+
+    with tracer.start_as_current_span("customer_db.get_customers", attributes={"customer_count": len(requested_ids)}):
+        customers = await customer_db.get_customers_async(requested_ids)
+
+    for customer_id in requested_ids:
+        if customer_id not in customers:
+            errors[customer_id] = {
+                "error_code": "CUSTOMER_NOT_FOUND",
+                "message": f"Customer with ID '{customer_id}' not found",
             }
 
     return response.create_success_response(
-        f"Customer CRM data retrieved for {customer_id}",
-        customer_data=mock_customer_data,
+        f"Retrieved {len(customers)} of {len(customers) + len(errors)} customer(s)",
+        customers=customers,
+        errors=errors,
+        found_count=len(customers),
+        error_count=len(errors),
     )
 
 
 @mcp.tool()
-def search_customer_by_name(name: str) -> dict:
+@offload.in_worker_pool
+def get_all_customer_data(limit: int | None = None, cursor: str | None = None) -> dict:
     """
-    Searches for customers by name (case-insensitive, partial match).
+    Lists all customers in the CRM system, page by page, with their name, ID and city.
+
+    Use this tool when the user asks who their customers are, e.g. "Zeig mir alle Kunden" or
+    "Wen gibt es?". Customers are read from storage one page at a time, so even very large
+    customer books are listed without loading every record.
+
+    Args:
+        limit (int | None): Maximum number of customers per page (default: 50, capped at 100).
+        cursor (str | None): The next_cursor of a previous call, to fetch the next page.
+
+    Returns:
+        dict: A dictionary containing one page of customers.
+              On success:
+              {
+                  "status": "success",
+                  "message": "Listed X of Y customer(s)",
+                  "customers": [
+                      {
+                          "customer_id": "cust001",
+                          "name": "Anna Müller",
+                          "city": "Berlin"
+                      }
+                  ],
+                  "count": 1,
+                  "total_count": "Total number of customers across all pages.",
+                  "next_cursor": "Opaque cursor for the next page, or null if this is the last page."
+              }
+              On failure, the status is "error" with the error_code "INVALID_CURSOR".
+
+    Usage Guidance:
+        Present the first page to the user and only fetch further pages if they ask for more.
+        Use get_customer_crm_data with a returned customer_id to retrieve a complete record, and
+        filter_customers instead of listing everybody when looking for customers with specific attributes.
+    """
+    try:
+        after = pagination.decode_cursor(cursor, "get_all_customer_data")
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
+
+    with tracer.start_as_current_span("customer_db.iter_customer_listing"):
+        customers, next_position = pagination.paginate(
+            customer_db.iter_customer_listing(after), after, pagination.clamp_page_size(limit)
+        )
+    total_count = customer_db.get_database_size()
+
+    return response.create_success_response(
+        f"Listed {len(customers)} of {total_count} customer(s)",
+        customers=customers,
+        count=len(customers),
+        total_count=total_count,
+        next_cursor=None if next_position is None else pagination.encode_cursor("get_all_customer_data", next_position),
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def search_customer_by_name(
+    name: str,
+    fuzzy: bool = True,
+    max_distance: int = 2,
+    detail: str = "auto",
+    fields: list[str] | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> dict:
+    """
+    Searches for customers by name (case- and accent-insensitive, partial match).
 
     Use this tool when you have a customer's name but not their ID.
     For example, if a broker asks about "Anna Müller", use this tool to find her.
 
     Args:
         name (str): The customer's name or part of it (e.g., "Anna", "Müller", or "Anna Müller").
+        fuzzy (bool): If no customer matches exactly, return similarly spelled candidates instead
+                      (default: True).
+        max_distance (int): The maximum number of typos per name part tolerated by the fuzzy
+                            fallback, between 0 and 2 (default: 2).
+        detail (str): How much data to return per customer:
+                      "summary" returns customer_id, name, age, occupation, address, email,
+                      customer_segment and policy_types; "full" returns the complete record;
+                      "auto" (default) returns the full record for a single match and summaries otherwise;
+                      further pages keep the level of the first page.
+        fields (list[str] | None): Return exactly these fields (plus customer_id) instead, e.g.
+                                   ["name", "email", "existing_policies"], or ["customer_id"] for
+                                   the IDs only. Any personal_info field as well as
+                                   existing_policies, communication_history, risk_profile,
+                                   customer_segment and lifetime_value can be selected.
+        limit (int | None): Maximum number of customers per page (default: 50, capped at 100).
+        cursor (str | None): The next_cursor of a previous call with the same name, to fetch the next page.
 
     Returns:
         dict: A dictionary containing the search results.
@@ -148,59 +376,697 @@ def search_customer_by_name(name: str) -> dict:
               {
                   "status": "success",
                   "message": "Found X customer(s) matching 'name'",
+                  "match_type": "exact",
+                  "detail": "summary",
                   "customers": [
                       {
                           "customer_id": "cust001",
                           "name": "Anna Müller",
                           "email": "anna.mueller@email.com",
-                          ... (full customer data)
+                          ... (summary fields, or full customer data with detail "full")
                       }
                   ],
-                  "count": 1
+                  "count": 1,
+                  "next_cursor": "Opaque cursor for the next page, or null if this is the last page."
               }
+              On success with only similarly spelled matches, "match_type" is "fuzzy" and every
+              customer additionally carries a "match_distance" (number of typos, lower is better).
+              Customers are ranked by that distance.
               On success with no matches:
               {
                   "status": "success",
                   "message": "No customers found matching 'name'",
+                  "match_type": "none",
                   "customers": [],
-                  "count": 0
+                  "count": 0,
+                  "next_cursor": null
               }
 
     Usage Guidance:
         This is the preferred tool when brokers refer to customers by name instead of ID.
         It performs a case-insensitive partial match, so searching for "anna" will find "Anna Müller".
+        Umlauts and accents are matched in either spelling, so "Mueller" also finds "Anna Müller".
+        If the match_type is "fuzzy", the name was probably misspelled: confirm the intended customer
+        with the user before acting on a candidate. Do not retry with variations of the same name.
+        When several customers are returned as summaries, use get_customer_crm_data with the
+        chosen customer_id to retrieve the complete record.
     """
     if not name or not name.strip():
         return response.create_error_response("Customer name is required.", "MISSING_NAME")
+    if detail not in SEARCH_DETAIL_LEVELS:
+        return response.create_error_response(
+            f"Invalid detail '{detail}', expected one of {', '.join(SEARCH_DETAIL_LEVELS)}.",
+            "INVALID_DETAIL",
+        )
+    if fields is not None:
+        unknown_fields = [
+            field
+            for field in fields
+            if field != "customer_id"
+            and field not in CUSTOMER_TOP_LEVEL_FIELDS
+            and field not in CUSTOMER_PERSONAL_INFO_FIELDS
+        ]
+        if unknown_fields:
+            return response.create_error_response(
+                f"Unknown field(s): {', '.join(unknown_fields)}.",
+                "INVALID_FIELDS",
+                allowed_fields=["customer_id", *CUSTOMER_PERSONAL_INFO_FIELDS, *CUSTOMER_TOP_LEVEL_FIELDS],
+            )
+        # customer_id is always included
+        fields = [field for field in fields if field != "customer_id"]
 
-    search_term = name.strip().lower()
-    with tracer.start_as_current_span("customer_db.get_all_customers", attributes={"search_name": name}):
-        all_customers = customer_db.get_all_customers()
-    matches = []
-
-    for customer_id, customer_data in all_customers.items():
-        customer_name = customer_data.get("personal_info", {}).get("name", "").lower()
-        if search_term in customer_name:
-            # Include customer_id in the result
-            customer_with_id = {"customer_id": customer_id, **customer_data}
-            matches.append(customer_with_id)
+    page_size = pagination.clamp_page_size(limit)
+    cursor_scope = f"search_customer_by_name:{name.strip()}:{fuzzy}:{max_distance}"
+    try:
+        after, cursor_detail = pagination.decode_cursor_state(cursor, cursor_scope)
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
+    if detail == "auto" and cursor_detail is not None:
+        if cursor_detail not in SEARCH_DETAIL_LEVELS:
+            return response.create_error_response(f"Cursor '{cursor}' does not belong to this query", "INVALID_CURSOR")
+        detail = cursor_detail
 
-    if matches:
-        return response.create_success_response(
-            f"Found {len(matches)} customer(s) matching '{name}'",
-            customers=matches,
-            count=len(matches),
+    match_type = "exact"
+    with tracer.start_as_current_span("customer_db.iter_customer_ids_by_name", attributes={"search_name": name}):
+        exact_ids: Iterator[tuple[int, tuple[str, int | None]]] = (
+            (position, (customer_id, None))
+            for position, customer_id in customer_db.iter_customer_ids_by_name(name.strip(), after)
         )
-    else:
+        ranked_ids, next_position = pagination.paginate(exact_ids, after, page_size)
+
+    if not ranked_ids and fuzzy:
+        match_type = "fuzzy"
+        max_distance = max(0, min(max_distance, fuzzy_index.DEFAULT_MAX_DISTANCE))
+        with tracer.start_as_current_span(
+            "customer_db.find_customer_ids_by_fuzzy_name", attributes={"search_name": name}
+        ):
+            candidates = customer_db.find_customer_ids_by_fuzzy_name(name.strip(), max_distance)
+        ranked_ids, next_position = pagination.paginate(enumerate(candidates[:FUZZY_CANDIDATE_LIMIT]), after, page_size)
+
+    if not ranked_ids:
         return response.create_success_response(
             f"No customers found matching '{name}'",
+            match_type="none",
             customers=[],
             count=0,
+            next_cursor=None,
+        )
+
+    if fields is None and detail == "auto":
+        detail = "full" if len(ranked_ids) == 1 and next_position is None else "summary"
+    elif fields is not None:
+        detail = "fields"
+
+    matches = []
+    for customer_id, distance in ranked_ids:
+        customer: dict | None
+        if fields == []:
+            # Only the IDs were requested, which the index already returned
+            customer = {"customer_id": customer_id}
+        elif detail == "summary":
+            customer = customer_db.get_customer_summary(customer_id)
+        else:
+            customer_data = customer_db.get_customer(customer_id)
+            if customer_data is None:
+                customer = None
+            elif fields is not None:
+                customer = _project_customer(customer_id, customer_data, fields)
+            else:
+                # Include customer_id in the result
+                customer = {"customer_id": customer_id, **customer_data}
+        if customer is None:
+            continue
+        matches.append(customer if distance is None else {**customer, "match_distance": distance})
+
+    if match_type == "exact":
+        message = f"Found {len(matches)} customer(s) matching '{name}'"
+    else:
+        message = f"No exact match for '{name}', found {len(matches)} similarly spelled customer(s)"
+    return response.create_success_response(
+        message,
+        match_type=match_type,
+        detail=detail,
+        customers=matches,
+        count=len(matches),
+        # The detail level resolved for the first page is kept for the following ones
+        next_cursor=None
+        if next_position is None
+        else pagination.encode_cursor(cursor_scope, next_position, detail if detail != "fields" else None),
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def search_communication_history(query: str, limit: int | None = None, cursor: str | None = None) -> dict:
+    """
+    Finds customers whose communication history mentions a topic, ranked by relevance.
+
+    Searches the subject and notes of every customer's communication history, e.g. "new baby",
+    "bought a house" or "interest in life insurance". Words are matched on their stems, so
+    inflected forms ("house", "houses"; "Versicherung", "Versicherungen") and both umlaut
+    spellings ("Häuser", "Haeuser") also match.
+
+    Args:
+        query (str): The words to search for. Entries matching more and rarer query words rank higher.
+        limit (int | None): Maximum number of customers per page (default: 50, capped at 100).
+        cursor (str | None): The next_cursor of a previous call with the same query, to fetch the next page.
+
+    Returns:
+        dict: A dictionary containing the matching customers, best match first.
+              On success:
+              {
+                  "status": "success",
+                  "message": "Found X customer(s) whose communication history matches 'query'",
+                  "customers": [
+                      {
+                          "customer_id": "cust001",
+                          "name": "Anna Müller",
+                          "score": 4.2,
+                          "matching_entries": [
+                              {
+                                  "date": "2023-10-05",
+                                  "type": "phone_call",
+                                  "subject": "Life insurance inquiry",
+                                  "notes": "Customer expressed interest in life insurance after birth of second child ..."
+                              }
+                          ]
+                      }
+                  ],
+                  "count": 1,
+                  "next_cursor": "Opaque cursor for the next page, or null if this is the last page."
+              }
+              On failure, the status is "error" with the error_code "MISSING_QUERY" or "INVALID_CURSOR".
+
+    Usage Guidance:
+        Use this tool to find customers by life events or interests recorded by brokers instead of
+        retrieving and reading the records of many customers. Matching entries are ordered by
+        relevance; use get_customer_crm_data for the complete history of a customer.
+    """
+    if not query or not query.strip():
+        return response.create_error_response("Search query is required.", "MISSING_QUERY")
+
+    query = query.strip()
+    try:
+        after = pagination.decode_cursor(cursor, f"search_communication_history:{query}")
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
+
+    with tracer.start_as_current_span("customer_db.search_communication_history", attributes={"query": query}):
+        ranked = customer_db.search_communication_history(query)
+    page, next_position = pagination.paginate(enumerate(ranked), after, pagination.clamp_page_size(limit))
+
+    customers = []
+    for customer_id, score, positions in page:
+        customer_data = customer_db.get_customer(customer_id)
+        if customer_data is None:
+            continue
+        history = customer_data.get("communication_history", [])
+        customers.append(
+            {
+                "customer_id": customer_id,
+                "name": customer_data.get("personal_info", {}).get("name"),
+                "score": round(score, 3),
+                "matching_entries": [history[position] for position in positions if position < len(history)],
+            }
         )
 
+    return response.create_success_response(
+        f"Found {len(customers)} customer(s) whose communication history matches '{query}'",
+        customers=customers,
+        count=len(customers),
+        next_cursor=None
+        if next_position is None
+        else pagination.encode_cursor(f"search_communication_history:{query}", next_position),
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def filter_customers(
+    min_age: int | None = None,
+    max_age: int | None = None,
+    min_annual_income: float | None = None,
+    max_annual_income: float | None = None,
+    min_children: int | None = None,
+    max_children: int | None = None,
+    min_lifetime_value: float | None = None,
+    max_lifetime_value: float | None = None,
+    marital_status: list[str] | None = None,
+    home_ownership: list[str] | None = None,
+    risk_profile: list[str] | None = None,
+    customer_segment: list[str] | None = None,
+    has_product_types: list[str] | None = None,
+    missing_product_types: list[str] | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> dict:
+    """
+    Finds all customers matching a combination of attribute and coverage conditions.
+
+    Use this tool to build target lists for cross-selling campaigns, e.g. "married homeowners
+    aged 30-45 with an income above 70k and no life insurance". All given conditions must hold;
+    omitted conditions are ignored.
+
+    Args:
+        min_age (int | None) / max_age (int | None): Inclusive age bounds in years.
+        min_annual_income (float | None) / max_annual_income (float | None): Inclusive annual income bounds in EUR.
+        min_children (int | None) / max_children (int | None): Inclusive bounds on the number of children.
+        min_lifetime_value (float | None) / max_lifetime_value (float | None): Inclusive customer lifetime value
+                                                                               bounds in EUR.
+        marital_status (list[str] | None): Accepted marital statuses, e.g. ["married"].
+        home_ownership (list[str] | None): Accepted home ownership values, e.g. ["owner"].
+        risk_profile (list[str] | None): Accepted risk profiles, e.g. ["low", "medium"].
+        customer_segment (list[str] | None): Accepted customer segments, e.g. ["premium"].
+        has_product_types (list[str] | None): Product types the customer must hold policies for, using the
+                                              product catalog's types, e.g. ["home insurance"].
+        missing_product_types (list[str] | None): Product types the customer must not hold any policy for,
+                                                  e.g. ["life insurance"] for all customers without life insurance.
+        limit (int | None): Maximum number of customers per page (default: 50, capped at 100).
+        cursor (str | None): The next_cursor of a previous call with the same conditions, to fetch the next page.
+
+    Returns:
+        dict: A dictionary containing the matching customers.
+              On success:
+              {
+                  "status": "success",
+                  "message": "Found X customer(s) matching the filter",
+                  "customers": [
+                      {
+                          "customer_id": "cust001",
+                          "name": "Anna Müller",
+                          ... (summary fields as returned by search_customer_by_name)
+                      }
+                  ],
+                  "count": 1,
+                  "match_count": "Total number of matching customers across all pages.",
+                  "next_cursor": "Opaque cursor for the next page, or null if this is the last page."
+              }
+              If a categorical or product type condition contains an unknown value, the status is
+              "error" with the error_code "INVALID_FILTER" and "allowed_values" lists the known values.
+
+    Usage Guidance:
+        Customers with a missing value for a bounded attribute are not matched. Use
+        get_customer_crm_data with a returned customer_id to retrieve a complete record.
+    """
+    ranges = {
+        name: bounds
+        for name, bounds in {
+            "age": (min_age, max_age),
+            "annual_income": (min_annual_income, max_annual_income),
+            "children": (min_children, max_children),
+            "lifetime_value": (min_lifetime_value, max_lifetime_value),
+        }.items()
+        if bounds != (None, None)
+    }
+    categories = {
+        name: values
+        for name, values in {
+            "marital_status": marital_status,
+            "home_ownership": home_ownership,
+            "risk_profile": risk_profile,
+            "customer_segment": customer_segment,
+        }.items()
+        if values is not None
+    }
+    for name, values in categories.items():
+        allowed_values = customer_db.get_customer_categories(name)
+        unknown_values = [value for value in values if value not in allowed_values]
+        if unknown_values:
+            return response.create_error_response(
+                f"Unknown {name} value(s): {', '.join(unknown_values)}.",
+                "INVALID_FILTER",
+                allowed_values=allowed_values,
+            )
+    product_types = products_db.get_product_types()
+    unknown_types = [
+        product_type
+        for product_type in [*(has_product_types or ()), *(missing_product_types or ())]
+        if product_type not in product_types
+    ]
+    if unknown_types:
+        return response.create_error_response(
+            f"Unknown product type(s): {', '.join(unknown_types)}.",
+            "INVALID_FILTER",
+            allowed_values=list(product_types),
+        )
+    held_types = sorted(set(has_product_types or ()))
+    missing_types = sorted(set(missing_product_types or ()))
+
+    scope = f"filter_customers:{sorted(ranges.items())}:{sorted(categories.items())}:{held_types}:{missing_types}"
+    page_size = pagination.clamp_page_size(limit)
+    try:
+        after = pagination.decode_cursor(cursor, scope)
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
+
+    with tracer.start_as_current_span(
+        "customer_db.filter_customer_ids", attributes={"filter_attributes": [*ranges, *categories]}
+    ):
+        match_count, matching_ids = customer_db.filter_customer_ids(
+            ranges, categories, held_types, missing_types, after
+        )
+        customer_ids, next_position = pagination.paginate(matching_ids, after, page_size)
+
+    customers = [summary for customer_id in customer_ids if (summary := customer_db.get_customer_summary(customer_id))]
+    return response.create_success_response(
+        f"Found {match_count} customer(s) matching the filter",
+        customers=customers,
+        count=len(customers),
+        match_count=match_count,
+        next_cursor=None if next_position is None else pagination.encode_cursor(scope, next_position),
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def get_coverage_gaps(customer_id: str) -> dict:
+    """
+    Lists the product types a customer already holds and the product types they are not covered by.
+
+    Policies are mapped onto the product catalog's types (e.g. a "Car Insurance" policy counts as
+    "auto insurance"), so every missing type can be looked up directly with get_products_by_type.
+
+    Args:
+        customer_id (str): The unique identifier for the customer (e.g., "cust001").
+
+    Returns:
+        dict: A dictionary containing the customer's coverage.
+              On success:
+              {
+                  "status": "success",
+                  "message": "Customer cust001 is missing X of Y product type(s)",
+                  "customer_id": "cust001",
+                  "held_product_types": ["auto insurance"],
+                  "missing_product_types": ["life insurance", "health insurance", ...]
+              }
+              On failure, the status is "error" with the error_code "MISSING_CUSTOMER_ID" or
+              "CUSTOMER_NOT_FOUND".
+
+    Usage Guidance:
+        Use this tool to identify coverage gaps for cross-selling instead of comparing the
+        customer's existing policies with the whole product catalog yourself. Check the
+        communication history (get_customer_crm_data) before recommending a missing type, since
+        customers may hold that coverage with another provider.
+    """
+    if not customer_id or not customer_id.strip():
+        return response.create_error_response("Customer ID is required.", "MISSING_CUSTOMER_ID")
+
+    customer_id = customer_id.strip()
+
+    with tracer.start_as_current_span("customer_db.get_coverage", attributes={"customer_id": customer_id}):
+        coverage = customer_db.get_coverage(customer_id)
+
+    if coverage is None:
+        return response.create_error_response(
+            f"Customer with ID '{customer_id}' not found",
+            "CUSTOMER_NOT_FOUND",
+            requested_customer_id=customer_id,
+        )
+
+    held, missing = coverage
+    return response.create_success_response(
+        f"Customer {customer_id} is missing {len(missing)} of {len(products_db.get_product_types())} product type(s)",
+        customer_id=customer_id,
+        held_product_types=held,
+        missing_product_types=missing,
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def get_eligible_products(
+    customer_id: str,
+    coverage_amount: float | None = None,
+    product_type: str | None = None,
+    missing_types_only: bool = False,
+) -> dict:
+    """
+    Lists the insurance products a customer is eligible for, based on their age and the desired coverage.
+
+    Products restrict eligibility by an age range and by minimum and maximum coverage amounts;
+    products without such a restriction are eligible for everybody.
+
+    Args:
+        customer_id (str): The unique identifier for the customer (e.g., "cust001").
+        coverage_amount (float | None): The coverage amount in EUR the customer is looking for. If given,
+                                        only products offering this amount are returned.
+        product_type (str | None): Only return products of this type (e.g., "life insurance").
+        missing_types_only (bool): Only return products of types the customer does not hold yet
+                                   (see get_coverage_gaps) (default: False).
+
+    Returns:
+        dict: A dictionary containing the eligible products.
+              On success:
+              {
+                  "status": "success",
+                  "message": "Customer cust001 is eligible for X product(s)",
+                  "customer_id": "cust001",
+                  "age": 39,
+                  "products": [
+                      {
+                          "product_id": "LIFE001",
+                          "name": "SecureLife Premium",
+                          "type": "life insurance",
+                          "description": "...",
+                          "target_segments": ["families", ...]
+                      }
+                  ],
+                  "count": 1
+              }
+              On failure, the status is "error" with the error_code "MISSING_CUSTOMER_ID" or
+              "CUSTOMER_NOT_FOUND".
+
+    Usage Guidance:
+        Use this tool instead of get_insurance_products when recommending products to a specific
+        customer, so that you only consider products the customer can actually buy. Use
+        get_product_details for the full terms of a product. If the customer's age is unknown,
+        only products without an age restriction are returned.
+    """
+    if not customer_id or not customer_id.strip():
+        return response.create_error_response("Customer ID is required.", "MISSING_CUSTOMER_ID")
+
+    customer_id = customer_id.strip()
+
+    with tracer.start_as_current_span("customer_db.get_customer_summary", attributes={"customer_id": customer_id}):
+        summary = customer_db.get_customer_summary(customer_id)
+
+    if summary is None:
+        return response.create_error_response(
+            f"Customer with ID '{customer_id}' not found",
+            "CUSTOMER_NOT_FOUND",
+            requested_customer_id=customer_id,
+        )
+
+    age = summary.get("age")
+    with tracer.start_as_current_span("products_db.get_eligible_product_ids", attributes={"customer_id": customer_id}):
+        # An unknown age falls outside every bounded age range
+        product_ids = products_db.get_eligible_product_ids(age if age is not None else math.nan, coverage_amount)
+    if product_type is not None:
+        of_type = set(products_db.get_product_ids_by_type(product_type))
+        product_ids = tuple(product_id for product_id in product_ids if product_id in of_type)
+    if missing_types_only:
+        coverage = customer_db.get_coverage(customer_id)
+        of_missing_types = {
+            product_id
+            for missing_type in (coverage[1] if coverage is not None else ())
+            for product_id in products_db.get_product_ids_by_type(missing_type)
+        }
+        product_ids = tuple(product_id for product_id in product_ids if product_id in of_missing_types)
+
+    products = [product for product_id in product_ids if (product := products_db.get_product_summary(product_id))]
+    return response.create_success_response(
+        f"Customer {customer_id} is eligible for {len(products)} product(s)",
+        customer_id=customer_id,
+        age=age,
+        products=products,
+        count=len(products),
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def get_premium_quotes(
+    customer_ids: list[str],
+    coverage_amounts: list[float] | None = None,
+    product_ids: list[str] | None = None,
+) -> dict:
+    """
+    Calculates monthly premiums for one or many customers across all products they are eligible for.
+
+    Premiums are the product's base premium rate (per 1000 of coverage per month) times the
+    coverage amount. All customers, products and coverage amounts are priced in a single
+    vectorized calculation, so a whole portfolio can be quoted in one call.
+
+    Args:
+        customer_ids (list[str]): The customer IDs to quote (e.g., ["cust001"]), at most 1000 per call.
+                                  Duplicates are ignored.
+        coverage_amounts (list[float] | None): The coverage amounts in EUR to quote, at most 20
+                                               (default: 50000, 100000, 250000, 500000 and 1000000).
+        product_ids (list[str] | None): Only quote these products (default: all products with a base premium rate).
+
+    Returns:
+        dict: A dictionary containing the quotes and a per-ID error for every unknown customer.
+              On success (even if some IDs were not found):
+              {
+                  "status": "success",
+                  "message": "Quoted X of Y customer(s)",
+                  "coverage_amounts": [50000, 100000],
+                  "quotes": {
+                      "cust001": {
+                          "age": 39,
+                          "products": {
+                              "LIFE001": [40.0, 80.0]
+                          }
+                      }
+                  },
+                  "errors": {
+                      "cust999": {
+                          "error_code": "CUSTOMER_NOT_FOUND",
+                          "message": "Customer with ID 'cust999' not found"
+                      }
+                  },
+                  "found_count": 1,
+                  "error_count": 1
+              }
+              Each product lists one monthly premium in EUR per coverage amount, in the order of
+              "coverage_amounts", or null where the amount is outside the product's coverage bounds.
+              Products the customer is not eligible for at any amount are omitted.
+              On failure, the status is "error" with the error_code "MISSING_CUSTOMER_IDS",
+              "TOO_MANY_CUSTOMER_IDS" or "INVALID_COVERAGE_AMOUNTS".
+
+    Usage Guidance:
+        Use get_eligible_products or get_coverage_gaps to choose products for a customer first,
+        then pass their IDs here to compare prices. Quotes are indicative base premiums; use
+        get_product_details for deductibles and other terms.
+    """
+    requested_ids = list(dict.fromkeys(customer_id.strip() for customer_id in customer_ids or []))
+    if not requested_ids:
+        return response.create_error_response("At least one customer ID is required.", "MISSING_CUSTOMER_IDS")
+    if len(requested_ids) > MAX_QUOTE_BATCH_SIZE:
+        return response.create_error_response(
+            f"At most {MAX_QUOTE_BATCH_SIZE} customers can be quoted per call, got {len(requested_ids)}.",
+            "TOO_MANY_CUSTOMER_IDS",
+        )
+
+    levels = list(dict.fromkeys(coverage_amounts or quotes.DEFAULT_COVERAGE_LEVELS))
+    if len(levels) > MAX_COVERAGE_LEVELS or any(not math.isfinite(level) or level <= 0 for level in levels):
+        return response.create_error_response(
+            f"Coverage amounts must be at most {MAX_COVERAGE_LEVELS} positive numbers.",
+            "INVALID_COVERAGE_AMOUNTS",
+        )
+
+    errors: dict[str, dict] = {}
+    if "" in requested_ids:
+        requested_ids.remove("")
+        errors[""] = {"error_code": "MISSING_CUSTOMER_ID", "message": "Customer ID is required."}
+    for customer_id in requested_ids:
+        if not customer_db.customer_exists(customer_id):
+            errors[customer_id] = {
+                "error_code": "CUSTOMER_NOT_FOUND",
+                "message": f"Customer with ID '{customer_id}' not found",
+            }
+    found_ids = [customer_id for customer_id in requested_ids if customer_id not in errors]
+
+    rate_table = products_db.get_rate_table()
+    if product_ids is not None:
+        rate_table = rate_table.select(product_ids)
+
+    with tracer.start_as_current_span("quotes.quote", attributes={"customer_count": len(found_ids)}):
+        ages = customer_db.get_customer_values("age", found_ids)
+        premiums = quotes.quote(rate_table, ages, np.array(levels, dtype=float))
+
+    customer_quotes = {}
+    for customer_id, age, customer_premiums in zip(found_ids, ages, premiums, strict=True):
+        customer_quotes[customer_id] = {
+            "age": None if math.isnan(age) else int(age),
+            "products": {
+                product_id: [None if math.isnan(premium) else premium for premium in product_premiums.tolist()]
+                for product_id, product_premiums in zip(rate_table.product_ids, customer_premiums, strict=True)
+                if not np.isnan(product_premiums).all()
+            },
+        }
+
+    return response.create_success_response(
+        f"Quoted {len(customer_quotes)} of {len(customer_quotes) + len(errors)} customer(s)",
+        coverage_amounts=levels,
+        quotes=customer_quotes,
+        errors=errors,
+        found_count=len(customer_quotes),
+        error_count=len(errors),
+    )
+
+
+@mcp.tool()
+@offload.in_worker_pool
+def get_recommendations(customer_id: str) -> dict:
+    """
+    Returns the precomputed next-best-offer products for a customer, best first.
+
+    Recommendations only include products the customer is eligible for. They are scored from the
+    customer's segment and life situation, coverage gaps, income and the interests or rejections
+    recorded in the communication history, and are kept up to date as customer records change.
+
+    Args:
+        customer_id (str): The unique identifier for the customer (e.g., "cust001").
+
+    Returns:
+        dict: A dictionary containing the recommended products.
+              On success:
+              {
+                  "status": "success",
+                  "message": "Found X recommendation(s) for customer cust001",
+                  "customer_id": "cust001",
+                  "recommendations": [
+                      {
+                          "product_id": "LIFE001",
+                          "name": "SecureLife Premium",
+                          "type": "life insurance",
+                          "description": "...",
+                          "target_segments": ["families", ...],
+                          "score": 8.0,
+                          "reasons": ["closes a coverage gap (life insurance)", ...]
+                      }
+                  ],
+                  "count": 1
+              }
+              On failure, the status is "error" with the error_code "MISSING_CUSTOMER_ID" or
+              "CUSTOMER_NOT_FOUND".
+
+    Usage Guidance:
+        Use this tool as the starting point of a cross-selling strategy instead of ranking the
+        whole product catalog yourself. Use get_product_details for the full terms of a product
+        and get_premium_quotes for prices.
+    """
+    if not customer_id or not customer_id.strip():
+        return response.create_error_response("Customer ID is required.", "MISSING_CUSTOMER_ID")
+
+    customer_id = customer_id.strip()
+
+    with tracer.start_as_current_span("customer_db.get_recommendations", attributes={"customer_id": customer_id}):
+        ranked = customer_db.get_recommendations(customer_id)
+
+    if ranked is None:
+        return response.create_error_response(
+            f"Customer with ID '{customer_id}' not found",
+            "CUSTOMER_NOT_FOUND",
+            requested_customer_id=customer_id,
+        )
+
+    recommended = [
+        {**summary, "score": recommendation.score, "reasons": list(recommendation.reasons)}
+        for recommendation in ranked
+        if (summary := products_db.get_product_summary(recommendation.product_id))
+    ]
+    return response.create_success_response(
+        f"Found {len(recommended)} recommendation(s) for customer {customer_id}",
+        customer_id=customer_id,
+        recommendations=recommended,
+        count=len(recommended),
+    )
+
 
 @mcp.tool()
-def send_email(customer_id: str, subject: str, body: str) -> dict:
+async def send_email(customer_id: str, subject: str, body: str) -> dict:
     """
     Sends an email to the specified customer.
 
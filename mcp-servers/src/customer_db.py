@@ -1,3 +1,27 @@
+import functools
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Collection, Iterable, Iterator, Mapping
+
+import numpy as np
+
+import customer_columns
+import customer_storage
+import fulltext_index
+import fuzzy_index
+import history
+import interpreter_pool
+import name_index
+import offload
+import products_db
+import recommendations
+import records
+
+# Leading postal code of the city part of an address
+_POSTAL_CODE = re.compile(r"^\d{4,5}\s+")
+
 _mock_database = {
     "cust001": {
         "customer_id": "cust001",
@@ -1203,13 +1227,456 @@ _mock_database = {
 }
 
 
+def _create_backend() -> customer_storage.CustomerBackend:
+    """Create the storage backend selected via CUSTOMER_DB_BACKEND, seeding it with the mock data if empty."""
+    backend_name = os.environ.get("CUSTOMER_DB_BACKEND", "memory").lower()
+    if backend_name == "memory":
+        return customer_storage.InMemoryCustomerBackend(records.CompactRecords(records.Customer, _mock_database))
+    if backend_name == "sqlite":
+        backend = customer_storage.SqliteCustomerBackend(os.environ.get("CUSTOMER_DB_PATH", "customers.db"))
+        if backend.size() == 0:
+            backend.bulk_load(_mock_database.values())
+        return backend
+    if backend_name == "mmap":
+        return customer_storage.MappedCustomerBackend(os.environ.get("CUSTOMER_DB_PATH", "customers.dat"))
+    raise ValueError(f"Unknown CUSTOMER_DB_BACKEND '{backend_name}', expected 'memory', 'sqlite' or 'mmap'")
+
+
+def _name_indexes() -> tuple[name_index.TrigramIndex, fuzzy_index.SymSpellIndex]:
+    """Return the name indexes, building them now unless `warm_up` already did."""
+    global _name_index, _fuzzy_name_index
+    if _name_index is not None and _fuzzy_name_index is not None:
+        return _name_index, _fuzzy_name_index
+    with _name_index_lock:
+        if _name_index is not None and _fuzzy_name_index is not None:
+            return _name_index, _fuzzy_name_index
+        trigram_index = name_index.TrigramIndex()
+        symspell_index = fuzzy_index.SymSpellIndex()
+        for customer_id, name in _backend.iter_names():
+            trigram_index.add(customer_id, name)
+            symspell_index.add(customer_id, name)
+        _name_index, _fuzzy_name_index = trigram_index, symspell_index
+        return trigram_index, symspell_index
+
+
+def _interpreter_pool() -> interpreter_pool.InterpreterPool:
+    """Return the subinterpreter pool, starting it with the current names and catalog on first use."""
+    global _interpreters
+    pool = _interpreters
+    if pool is not None and pool.catalog_version == products_db.get_catalog_version():
+        return pool
+    with _interpreters_lock:
+        # Read in this order, the products are at least as new as the version the pool records
+        catalog_version = products_db.get_catalog_version()
+        products = products_db.get_all_products().items()
+        if _interpreters is None:
+            # Workers read the names of a data file from the file itself, and only get the written ones
+            if isinstance(_backend, customer_storage.MappedCustomerBackend):
+                _interpreters = interpreter_pool.InterpreterPool(
+                    products, catalog_version, _backend.iter_written_names(), _backend.path
+                )
+            else:
+                _interpreters = interpreter_pool.InterpreterPool(products, catalog_version, _backend.iter_names())
+        elif _interpreters.catalog_version != catalog_version:
+            _interpreters.set_products(products, catalog_version)
+        return _interpreters
+
+
+def _history_texts(customer: dict) -> list[str]:
+    """Return the texts of a customer's history entries, positioned like the stored history (newest first)."""
+    entries = history.newest_first(customer.get("communication_history", []), history.entry_date)
+    return [f"{entry.get('subject', '')}\n{entry.get('notes', '')}" for entry in entries]
+
+
+def _history_index() -> fulltext_index.FullTextIndex:
+    """Return the full-text index over communication history entries, building it on the first search."""
+    global _communication_index
+    if _communication_index is not None:
+        return _communication_index
+    with _history_index_lock:
+        if _communication_index is None:
+            index = fulltext_index.FullTextIndex()
+            for customer_id, customer in _backend.iter_customers():
+                index.add(customer_id, _history_texts(customer))
+            _communication_index = index
+        return _communication_index
+
+
+def _customer_columns() -> customer_columns.CustomerColumns:
+    """Return the columnar attribute view, building it on the first analytical query."""
+    global _columns
+    if _columns is not None:
+        return _columns
+    with _columns_lock:
+        if _columns is None:
+            _columns = customer_columns.CustomerColumns.from_customers(
+                _backend.iter_customers(), products_db.get_product_types()
+            )
+        return _columns
+
+
+def _score_entry(
+    products: Mapping[str, dict], entry: tuple[str, dict]
+) -> tuple[str, tuple[recommendations.Recommendation, ...]]:
+    customer_id, customer = entry
+    return customer_id, _score_customer(customer, products)
+
+
+def _score_customer(customer: dict, products: Mapping[str, dict]) -> tuple[recommendations.Recommendation, ...]:
+    """Rank the eligible products of a customer, taken from the catalog snapshot `products`."""
+    age = customer.get("personal_info", {}).get("age")
+    # An unknown age falls outside every bounded age range
+    eligible_ids = products_db.get_eligible_product_ids(age if isinstance(age, int | float) else np.nan)
+    # Products added after the snapshot was taken are scored by the rebuild for their catalog version
+    eligible = ((product_id, products[product_id]) for product_id in eligible_ids if product_id in products)
+    return tuple(recommendations.rank(customer, eligible))
+
+
+def _build_recommendations() -> dict[str, tuple[recommendations.Recommendation, ...]]:
+    """Score all customers against the current catalog and publish the table, unless it is current already."""
+    global _recommendation_table, _recommendation_catalog_version
+    with _recommendations_lock:
+        # Read in this order, the products are at least as new as the version the table records
+        catalog_version = products_db.get_catalog_version()
+        if _recommendation_table is not None and _recommendation_catalog_version == catalog_version:
+            return _recommendation_table
+        products = products_db.get_all_products()
+        _stale_recommendations.clear()
+        # Scoring is independent per customer, so it is spread over the subinterpreters or, when
+        # they run in parallel, the compute threads
+        if interpreter_pool.ENABLED:
+            scored = _interpreter_pool().score(_backend.iter_customers())
+        else:
+            scored = offload.map_ordered(functools.partial(_score_entry, products), _backend.iter_customers())
+        table = dict(scored)
+        _recommendation_table = table
+        _recommendation_catalog_version = catalog_version
+        return table
+
+
+def _rebuild_recommendations_in_background() -> None:
+    global _recommendation_rebuild
+    with _recommendation_rebuild_lock:
+        if _recommendation_rebuild is None or not _recommendation_rebuild.is_alive():
+            _recommendation_rebuild = threading.Thread(
+                target=_build_recommendations, name="recommendations", daemon=True
+            )
+            _recommendation_rebuild.start()
+
+
+def _recommendations() -> dict[str, tuple[recommendations.Recommendation, ...]]:
+    """
+    Return the materialized top recommendations of all customers.
+
+    The table is built by warm_up, or by the first request if that comes first. When the product
+    catalog changes, it is rebuilt in a background thread, and requests get the previous table
+    until the new one is published. Customers changed through put_customer are rescored by the
+    next request that finds no build running. Writers don't wait for builds: they only mark the
+    customer stale, and a build forgets the stale customers before it reads the backend, so every
+    write is either read by the build or rescored afterwards.
+    """
+    table = _recommendation_table
+    if table is None:
+        table = _build_recommendations()
+    elif _recommendation_catalog_version != products_db.get_catalog_version():
+        _rebuild_recommendations_in_background()
+    if _stale_recommendations and _recommendations_lock.acquire(blocking=False):
+        try:
+            # No build runs meanwhile, so the published table is the one to update
+            table = _recommendation_table or table
+            products = products_db.get_all_products()
+            while _stale_recommendations:
+                customer_id = _stale_recommendations.pop()
+                customer = _backend.get(customer_id)
+                if customer is not None:
+                    # Readers only look up single entries, so updating the published table in place is safe
+                    table[customer_id] = _score_customer(customer, products)
+        finally:
+            _recommendations_lock.release()
+    return table
+
+
+def address_city(address: str) -> str | None:
+    """Extract the city from an address such as "Hauptstraße 123, 10115 Berlin", dropping the postal code."""
+    city = _POSTAL_CODE.sub("", address.rsplit(",", 1)[-1].strip())
+    return city or None
+
+
+def summarize_customer(customer: dict) -> dict:
+    """Extract a slim customer summary with only the fields needed to identify and triage a customer."""
+    personal_info = customer.get("personal_info", {})
+    return {
+        "customer_id": customer.get("customer_id"),
+        "name": personal_info.get("name"),
+        "age": personal_info.get("age"),
+        "occupation": personal_info.get("occupation"),
+        "address": personal_info.get("address"),
+        "email": personal_info.get("email"),
+        "customer_segment": customer.get("customer_segment"),
+        "policy_types": [policy.get("product_type") for policy in customer.get("existing_policies", [])],
+    }
+
+
+_backend = _create_backend()
+_async_backend: customer_storage.AsyncCustomerBackend = customer_storage.OffloadedCustomerBackend(_backend)
+_name_index: name_index.TrigramIndex | None = None
+_fuzzy_name_index: fuzzy_index.SymSpellIndex | None = None
+# Only used with CPU_WORK_EXECUTOR=interpreters, kept up to date by put_customer
+_interpreters: interpreter_pool.InterpreterPool | None = None
+# Summaries of recently searched customers, least recently used first
+SUMMARY_CACHE_SIZE = int(os.environ.get("CUSTOMER_SUMMARY_CACHE_SIZE", "10000"))
+_summaries: OrderedDict[str, dict] = OrderedDict()
+# Serializes writers, so that every index applies writes in the order of the backend. Each lazily
+# built index has its own lock, held by its build and by writers while they update it. Readers take
+# none: they use published indexes, which are only changed by single-entry updates or by swapping
+# in a complete replacement (see put_customer).
+_write_lock = threading.Lock()
+_name_index_lock = threading.Lock()
+_interpreters_lock = threading.Lock()
+_history_index_lock = threading.Lock()
+_columns_lock = threading.Lock()
+_recommendations_lock = threading.Lock()
+# Incremented by every write, so that readers don't cache summaries of records replaced meanwhile
+_write_generation = 0
+_summary_lock = threading.Lock()
+_columns: customer_columns.CustomerColumns | None = None
+_communication_index: fulltext_index.FullTextIndex | None = None
+_recommendation_table: dict[str, tuple[recommendations.Recommendation, ...]] | None = None
+_recommendation_catalog_version = -1
+# Customers changed since their recommendations were last scored, also collected before the first build
+_stale_recommendations: set[str] = set()
+# Rebuilds the recommendations for a changed catalog, see _recommendations
+_recommendation_rebuild: threading.Thread | None = None
+_recommendation_rebuild_lock = threading.Lock()
+
+
+def preload() -> None:
+    """Build all lazily built indexes now, e.g. so that forked worker processes share them (see `serve`)."""
+    global _interpreters
+    if not interpreter_pool.ENABLED:
+        _name_indexes()
+    _customer_columns()
+    _history_index()
+    _build_recommendations()
+    # Interpreters run in threads, which don't survive a fork, so every process starts its own pool
+    if _interpreters is not None:
+        _interpreters.shutdown()
+        _interpreters = None
+
+
+def warm_up() -> None:
+    """
+    Build the name indexes, which every name search needs, and then the recommendations, so that
+    the first requests don't wait for them.
+    """
+    if interpreter_pool.ENABLED:
+        _interpreter_pool().warm_up()
+    else:
+        _name_indexes()
+    _build_recommendations()
+
+
 def get_all_customers() -> dict:
-    return _mock_database
+    return _backend.get_all()
+
+
+def iter_customers() -> Iterator[tuple[str, dict]]:
+    return _backend.iter_customers()
 
 
-def get_customer(customer_id: str) -> object | None:
-    return _mock_database.get(customer_id)
+def customer_exists(customer_id: str) -> bool:
+    return _backend.contains(customer_id)
+
+
+def get_customer(customer_id: str, with_history: bool = True) -> dict | None:
+    return _backend.get(customer_id, with_history)
+
+
+def get_customer_history(
+    customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+) -> tuple[list[dict], int] | None:
+    """
+    Return the newest `limit` communication history entries of a customer dated between `since` and
+    `until` (inclusive ISO dates), and the number of entries in that window.
+    """
+    return _backend.get_history(customer_id, since, until, limit)
+
+
+async def get_customer_history_async(
+    customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+) -> tuple[list[dict], int] | None:
+    return await _async_backend.get_history(customer_id, since, until, limit)
+
+
+def get_customers(customer_ids: Iterable[str]) -> dict[str, dict]:
+    return _backend.get_many(customer_ids)
+
+
+async def get_customer_async(customer_id: str, with_history: bool = True) -> dict | None:
+    return await _async_backend.get(customer_id, with_history)
+
+
+async def get_customers_async(customer_ids: Iterable[str]) -> dict[str, dict]:
+    return await _async_backend.get_many(customer_ids)
 
 
 def get_database_size() -> int:
-    return len(_mock_database)
+    return _backend.size()
+
+
+def iter_customer_listing(after: int = -1) -> Iterator[tuple[int, dict]]:
+    """
+    Lazily yield `(position, listing)` in storage order for the customers positioned after `after`,
+    where a listing holds only the customer_id, name and city.
+    """
+    for position, (customer_id, name, address) in _backend.iter_listing(after):
+        yield position, {"customer_id": customer_id, "name": name, "city": address_city(address)}
+
+
+def get_customer_summary(customer_id: str) -> dict | None:
+    with _summary_lock:
+        summary = _summaries.get(customer_id)
+        if summary is not None:
+            _summaries.move_to_end(customer_id)
+            return summary
+        generation = _write_generation
+    customer = _backend.get(customer_id)
+    if customer is None:
+        return None
+    summary = summarize_customer(customer)
+    with _summary_lock:
+        if generation == _write_generation:
+            _summaries[customer_id] = summary
+            if len(_summaries) > SUMMARY_CACHE_SIZE:
+                _summaries.popitem(last=False)
+    return summary
+
+
+def iter_customer_ids_by_name(name: str, after: int = -1) -> Iterator[tuple[int, str]]:
+    if interpreter_pool.ENABLED:
+        return _interpreter_pool().iter_matches(name, after)
+    return _name_indexes()[0].iter_matches(name, after)
+
+
+def find_customer_ids_by_fuzzy_name(
+    name: str, max_distance: int = fuzzy_index.DEFAULT_MAX_DISTANCE
+) -> list[tuple[str, int]]:
+    if interpreter_pool.ENABLED:
+        return _interpreter_pool().fuzzy_search(name, max_distance)
+    return _name_indexes()[1].search(name, max_distance)
+
+
+def filter_customer_ids(
+    ranges: Mapping[str, tuple[float | None, float | None]] | None = None,
+    categories: Mapping[str, Collection[str]] | None = None,
+    held_types: Collection[str] = (),
+    missing_types: Collection[str] = (),
+    after: int = -1,
+) -> tuple[int, Iterator[tuple[int, str]]]:
+    """
+    Evaluate an attribute and coverage filter (see CustomerColumns.mask) over all customers.
+
+    Returns the total number of matches and the `(position, customer_id)` pairs of the matches
+    after the `after` position.
+    """
+    columns = _customer_columns()
+    rows = columns.matching_rows(ranges, categories, held_types, missing_types)
+    remaining = rows[rows > after]
+    return len(rows), ((int(row), columns.customer_id(row)) for row in remaining)
+
+
+def search_communication_history(query: str) -> list[tuple[str, float, list[int]]]:
+    """
+    Rank customers by how well their communication history entries match `query` (see `fulltext_index`).
+
+    Returns `(customer_id, score, positions)` best first, where the score is that of the customer's
+    best matching entry and `positions` index the matching entries of the customer's
+    communication_history, best first.
+    """
+    # Entries arrive best first, so the first entry seen for a customer carries its best score
+    customers: dict[str, tuple[float, list[int]]] = {}
+    for (customer_id, position), score in _history_index().search(query):
+        customers.setdefault(customer_id, (score, []))[1].append(position)
+    return [(customer_id, score, positions) for customer_id, (score, positions) in customers.items()]
+
+
+def get_coverage(customer_id: str) -> tuple[list[str], list[str]] | None:
+    """
+    Return the product types a customer holds and the catalog types they are missing, or None if the
+    customer does not exist. Held types are mapped onto the catalog taxonomy (see `coverage`).
+    """
+    columns = _customer_columns()
+    held = columns.held_product_types(customer_id)
+    missing = columns.missing_product_types(customer_id, products_db.get_product_types())
+    if held is None or missing is None:
+        return None
+    return held, missing
+
+
+def get_customer_values(attribute: str, customer_ids: Iterable[str]) -> np.ndarray:
+    """Return a numeric customer attribute (e.g. "age") for many customers as one array, NaN where unknown."""
+    return _customer_columns().values(attribute, customer_ids)
+
+
+def get_recommendations(customer_id: str) -> tuple[recommendations.Recommendation, ...] | None:
+    """Return a customer's precomputed top product recommendations, or None if the customer does not exist."""
+    return _recommendations().get(customer_id)
+
+
+def get_customer_categories(attribute: str) -> list[str]:
+    """Return the known values of a categorical customer attribute."""
+    return _customer_columns().categories(attribute)
+
+
+def _validate_customer(customer: dict) -> None:
+    """Raise TypeError for a customer record that the storage backends or indexes can't take."""
+    if not isinstance(customer.get("customer_id"), str):
+        raise TypeError("customer_id must be a string")
+    personal_info = customer.get("personal_info", {})
+    if not isinstance(personal_info, dict):
+        raise TypeError("personal_info must be an object")
+    for field in ("name", "address"):
+        if not isinstance(personal_info.get(field, ""), str):
+            raise TypeError(f"personal_info.{field} must be a string")
+    for field, required in (("existing_policies", "product_type"), ("communication_history", "date")):
+        entries = customer.get(field, [])
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise TypeError(f"{field} must be a list of objects")
+        if not all(isinstance(entry.get(required, ""), str | None) for entry in entries):
+            raise TypeError(f"{field}[].{required} must be a string")
+
+
+def put_customer(customer: dict) -> None:
+    """
+    Add a customer or replace the customer with the same ID, updating every index built so far.
+
+    The record is validated and everything the indexes derive from it computed before anything
+    is written, so a malformed record raises TypeError without being stored, and a stored
+    record is in every built index: each index either is built before a writer takes its lock and
+    gets the customer from the writer, or is built afterwards from the backend, which holds it.
+    """
+    global _write_generation
+    _validate_customer(customer)
+    customer_id = customer["customer_id"]
+    name = customer_storage.customer_name(customer)
+    history_texts = _history_texts(customer)
+    with _write_lock:
+        _backend.put(customer)
+        with _summary_lock:
+            _write_generation += 1
+            _summaries.pop(customer_id, None)
+        _stale_recommendations.add(customer_id)
+        # Indexes that were not built yet will pick the customer up from the backend
+        with _columns_lock:
+            if _columns is not None:
+                _columns.put(customer_id, customer)
+        with _history_index_lock:
+            if _communication_index is not None:
+                _communication_index.add(customer_id, history_texts)
+        with _name_index_lock:
+            if _name_index is not None and _fuzzy_name_index is not None:
+                _name_index.add(customer_id, name)
+                _fuzzy_name_index.add(customer_id, name)
+        with _interpreters_lock:
+            if _interpreters is not None:
+                _interpreters.put_name(customer_id, name)
@@ -0,0 +1,528 @@
+"""Storage backends for customer records."""
+
+import dataclasses
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, MutableMapping, Sequence
+from typing import Protocol
+
+import bloom
+import datafile
+import history
+import offload
+import records
+
+
+def customer_name(customer: dict) -> str:
+    return customer.get("personal_info", {}).get("name", "")
+
+
+def customer_address(customer: dict) -> str:
+    return customer.get("personal_info", {}).get("address", "")
+
+
+def _without_history(customer: dict) -> dict:
+    return {key: value for key, value in customer.items() if key != "communication_history"}
+
+
+class CustomerBackend(Protocol):
+    """Interface every customer storage backend implements."""
+
+    def contains(self, customer_id: str) -> bool: ...
+
+    def get(self, customer_id: str, with_history: bool = True) -> dict | None: ...
+
+    def get_history(
+        self, customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+    ) -> tuple[list[dict], int] | None:
+        """
+        Return the newest `limit` communication history entries dated between `since` and `until`
+        (inclusive ISO dates) and the number of entries in that window, or None for unknown customers.
+        """
+        ...
+
+    def get_many(self, customer_ids: Iterable[str]) -> dict[str, dict]: ...
+
+    def get_all(self) -> dict[str, dict]: ...
+
+    def size(self) -> int: ...
+
+    def iter_customers(self) -> Iterator[tuple[str, dict]]: ...
+
+    def iter_names(self) -> Iterator[tuple[str, str]]: ...
+
+    def iter_listing(self, after: int = -1) -> Iterator[tuple[int, tuple[str, str, str]]]:
+        """
+        Lazily yield `(position, (customer_id, name, address))` in storage order for the customers
+        positioned after `after`, without loading their full records.
+        """
+        ...
+
+    def put(self, customer: dict) -> None: ...
+
+    def bulk_load(self, customers: Iterable[dict]) -> None: ...
+
+
+class AsyncCustomerBackend(Protocol):
+    """
+    Non-blocking read interface over customer storage, used by the async MCP tools.
+
+    Backends with a native async driver can implement it directly; synchronous backends are
+    adapted by OffloadedCustomerBackend.
+    """
+
+    async def contains(self, customer_id: str) -> bool: ...
+
+    async def get(self, customer_id: str, with_history: bool = True) -> dict | None: ...
+
+    async def get_history(
+        self, customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+    ) -> tuple[list[dict], int] | None: ...
+
+    async def get_many(self, customer_ids: Iterable[str]) -> dict[str, dict]: ...
+
+
+class OffloadedCustomerBackend:
+    """Serves the async interface from a synchronous backend by running its calls in the bounded worker pool."""
+
+    def __init__(self, backend: CustomerBackend) -> None:
+        self._backend = backend
+
+    async def contains(self, customer_id: str) -> bool:
+        return await offload.run(self._backend.contains, customer_id)
+
+    async def get(self, customer_id: str, with_history: bool = True) -> dict | None:
+        return await offload.run(self._backend.get, customer_id, with_history)
+
+    async def get_history(
+        self, customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+    ) -> tuple[list[dict], int] | None:
+        return await offload.run(self._backend.get_history, customer_id, since, until, limit)
+
+    async def get_many(self, customer_ids: Iterable[str]) -> dict[str, dict]:
+        # Materialize the IDs on the event loop, since the iterable may be a generator over loop-owned state
+        return await offload.run(self._backend.get_many, list(customer_ids))
+
+
+class InMemoryCustomerBackend:
+    """Keeps all customer records in process memory, by default as compact records (see `records`)."""
+
+    def __init__(self, customers: MutableMapping[str, dict] | None = None) -> None:
+        self._customers: MutableMapping[str, dict] = (
+            customers if customers is not None else records.CompactRecords(records.Customer)
+        )
+        # The IDs in insertion order, so that a listing seeks to a position by index. Customers are
+        # never removed, so an ID's index is its position. Built on the first listing.
+        self._ids: list[str] | None = None
+        self._ids_lock = threading.Lock()
+
+    def contains(self, customer_id: str) -> bool:
+        return customer_id in self._customers
+
+    def get(self, customer_id: str, with_history: bool = True) -> dict | None:
+        if with_history:
+            return self._customers.get(customer_id)
+        if isinstance(self._customers, records.CompactRecords):
+            if customer_id not in self._customers:
+                return None
+            return dataclasses.replace(self._customers.record(customer_id), communication_history=None).to_dict()
+        customer = self._customers.get(customer_id)
+        return _without_history(customer) if customer is not None else None
+
+    def get_history(
+        self, customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+    ) -> tuple[list[dict], int] | None:
+        if customer_id not in self._customers:
+            return None
+        if isinstance(self._customers, records.CompactRecords):
+            # Only the entries inside the window are converted to dicts
+            compact_entries = self._customers.record(customer_id).communication_history or ()
+            page, total = history.window(compact_entries, lambda entry: entry.date, since, until, limit)
+            return [entry.to_dict() for entry in page], total
+        entries = self._customers[customer_id].get("communication_history", [])
+        page, total = history.window(entries, history.entry_date, since, until, limit)
+        return list(page), total
+
+    def get_many(self, customer_ids: Iterable[str]) -> dict[str, dict]:
+        return {
+            customer_id: self._customers[customer_id] for customer_id in customer_ids if customer_id in self._customers
+        }
+
+    def get_all(self) -> dict[str, dict]:
+        return dict(self._customers)
+
+    def size(self) -> int:
+        return len(self._customers)
+
+    def iter_customers(self) -> Iterator[tuple[str, dict]]:
+        # Only the IDs are snapshot; records are converted one at a time, so compact stores stay compact
+        for customer_id in list(self._customers):
+            customer = self._customers.get(customer_id)
+            if customer is not None:
+                yield customer_id, customer
+
+    def iter_names(self) -> Iterator[tuple[str, str]]:
+        if isinstance(self._customers, records.CompactRecords):
+            for customer_id in list(self._customers):
+                personal_info = self._customers.record(customer_id).personal_info
+                yield customer_id, (personal_info.name if personal_info is not None else None) or ""
+            return
+        for customer_id, customer in self.iter_customers():
+            yield customer_id, customer_name(customer)
+
+    def iter_listing(self, after: int = -1) -> Iterator[tuple[int, tuple[str, str, str]]]:
+        with self._ids_lock:
+            if self._ids is None:
+                self._ids = list(self._customers)
+            ids = self._ids
+        # Customers added while a page is being read are appended, so positions stay valid
+        position = after + 1
+        while position < len(ids):
+            customer_id = ids[position]
+            if isinstance(self._customers, records.CompactRecords):
+                personal_info = self._customers.record(customer_id).personal_info
+                name = personal_info.name if personal_info is not None else None
+                address = personal_info.address if personal_info is not None else None
+                yield position, (customer_id, name or "", address or "")
+            else:
+                customer = self._customers[customer_id]
+                yield position, (customer_id, customer_name(customer), customer_address(customer))
+            position += 1
+
+    def put(self, customer: dict) -> None:
+        if "communication_history" in customer and not isinstance(self._customers, records.CompactRecords):
+            # Compact records sort themselves
+            customer = {
+                **customer,
+                "communication_history": history.newest_first(customer["communication_history"], history.entry_date),
+            }
+        with self._ids_lock:
+            added = customer["customer_id"] not in self._customers
+            self._customers[customer["customer_id"]] = customer
+            # Listed only once stored
+            if added and self._ids is not None:
+                self._ids.append(customer["customer_id"])
+
+    def bulk_load(self, customers: Iterable[dict]) -> None:
+        for customer in customers:
+            self.put(customer)
+
+
+class MappedCustomerBackend(InMemoryCustomerBackend):
+    """
+    Serves customer records from a memory-mapped data file (see `datafile`).
+
+    Opening the file only reads its header, and records are decoded when they are looked up, so
+    startup time does not depend on the number of customers and all processes mapping the file
+    share it through the page cache. Names and addresses are read from separate columns for index
+    building and listings.
+    Written records are kept in memory on top of the file and are lost on restart. Communication
+    histories are expected newest first, as exported by `datafile` from another backend.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._records = datafile.MappedRecords(path)
+        super().__init__(self._records)
+
+    def iter_customers(self) -> Iterator[tuple[str, dict]]:
+        return self._records.iter_records()
+
+    def get_all(self) -> dict[str, dict]:
+        return dict(self.iter_customers())
+
+    def iter_names(self) -> Iterator[tuple[str, str]]:
+        return self._records.iter_column("name", customer_name)
+
+    def iter_written_names(self) -> Iterator[tuple[str, str]]:
+        """Yield `(customer_id, name)` for the customers written since the file was opened."""
+        for customer_id, customer in self._records.iter_overlay():
+            yield customer_id, customer_name(customer)
+
+    def iter_listing(self, after: int = -1) -> Iterator[tuple[int, tuple[str, str, str]]]:
+        names = self._records.iter_column("name", customer_name, after + 1)
+        addresses = self._records.iter_column("address", customer_address, after + 1)
+        for position, ((customer_id, name), (_, address)) in enumerate(zip(names, addresses), start=after + 1):
+            yield position, (customer_id, name, address)
+
+
+class SqliteCustomerBackend:
+    """
+    Stores customer records in an indexed SQLite database running in WAL mode.
+
+    Each record is kept as a JSON document keyed by its customer ID, so a lookup is a single
+    primary-key probe regardless of how many customers are stored. WAL mode lets any number of
+    reader connections proceed while a writer is active. Connections are opened per thread.
+
+    An in-memory Bloom filter over all customer IDs answers lookups of unknown IDs without
+    touching the database; only IDs that may exist are probed. Customers are never deleted and
+    keep their rowid when updated, so customers added by other processes are the rows past the
+    last rowid the filter covers. They are counted in `size` and picked up on a filter miss if
+    `PRAGMA data_version` shows that another connection wrote to the database. Misses check at
+    most once per _REFRESH_INTERVAL per thread, so a stream of unknown IDs costs no query each;
+    a customer added by another process may be reported missing for that long.
+
+    Communication history entries are stored one row each in a separate table, indexed by
+    customer and date, so a date window of a long history is read without loading the rest.
+    The customer document keeps an empty communication_history as a placeholder.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS communications (
+            customer_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS communications_by_date ON communications (customer_id, date);
+    """
+
+    # Maximum number of IDs bound into a single IN (...) lookup
+    _BATCH_SIZE = 500
+    # Seconds between checks for customers added by other connections on filter misses, per thread
+    _REFRESH_INTERVAL = 0.1
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        # A forked worker must not share the parent's connections, so it opens its own
+        os.register_at_fork(after_in_child=self._forget_connections)
+        self._connection().executescript(self._SCHEMA)
+        # Guards the filter, the last rowid it covers and the customer count
+        self._filter_lock = threading.Lock()
+        self._rebuild_id_filter()
+
+    def _rebuild_id_filter(self) -> None:
+        with self._filter_lock:
+            conn = self._connection()
+            # Rows are never deleted, so the last rowid bounds the number of customers. The filter is
+            # sized with headroom so that it stays accurate while new customers are added.
+            max_rowid = conn.execute("SELECT coalesce(max(rowid), 0) FROM customers").fetchone()[0]
+            id_filter = bloom.BloomFilter(capacity=max(2 * max_rowid, 1024))
+            size = 0
+            last_rowid = 0
+            for last_rowid, customer_id in conn.execute("SELECT rowid, customer_id FROM customers ORDER BY rowid"):
+                id_filter.add(customer_id)
+                size += 1
+            self._id_filter = id_filter
+            self._filtered_rowid = last_rowid
+            self._size = size
+
+    def _add_new_ids(self) -> None:
+        """Add the customers inserted since the filter was last updated, by any connection, to the filter."""
+        with self._filter_lock:
+            rows = self._connection().execute(
+                "SELECT rowid, customer_id FROM customers WHERE rowid > ? ORDER BY rowid", (self._filtered_rowid,)
+            )
+            for rowid, customer_id in rows:
+                self._id_filter.add(customer_id)
+                self._filtered_rowid = rowid
+                self._size += 1
+            saturated = self._id_filter.is_saturated
+        if saturated:
+            self._rebuild_id_filter()
+
+    def _refresh(self) -> None:
+        """Pick up customers added by other connections, if any connection wrote since this thread last checked."""
+        data_version = self._connection().execute("PRAGMA data_version").fetchone()[0]
+        if data_version != getattr(self._local, "data_version", None):
+            self._local.data_version = data_version
+            self._add_new_ids()
+
+    def _refresh_on_miss(self) -> None:
+        now = time.monotonic()
+        if now - getattr(self._local, "refreshed_at", -self._REFRESH_INTERVAL) >= self._REFRESH_INTERVAL:
+            self._local.refreshed_at = now
+            self._refresh()
+
+    def _may_contain(self, customer_id: str) -> bool:
+        if customer_id in self._id_filter:
+            return True
+        self._refresh_on_miss()
+        return customer_id in self._id_filter
+
+    def _forget_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
+    def contains(self, customer_id: str) -> bool:
+        if not self._may_contain(customer_id):
+            return False
+        return (
+            self._connection().execute("SELECT 1 FROM customers WHERE customer_id = ?", (customer_id,)).fetchone()
+            is not None
+        )
+
+    def _history(self, customer_id: str) -> list[dict]:
+        rows = self._connection().execute(
+            "SELECT data FROM communications WHERE customer_id = ? ORDER BY date DESC, rowid", (customer_id,)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def _histories(self, customer_ids: Sequence[str]) -> dict[str, list[dict]]:
+        """Load the histories of up to _BATCH_SIZE customers with one query, newest entry first."""
+        histories: defaultdict[str, list[dict]] = defaultdict(list)
+        placeholders = ", ".join("?" * len(customer_ids))
+        rows = self._connection().execute(
+            f"SELECT customer_id, data FROM communications WHERE customer_id IN ({placeholders}) ORDER BY date DESC, rowid",
+            customer_ids,
+        )
+        for customer_id, data in rows:
+            histories[customer_id].append(json.loads(data))
+        return histories
+
+    def _decode(
+        self, customer_id: str, data: str, with_history: bool, histories: dict[str, list[dict]] | None = None
+    ) -> dict:
+        """Decode a customer document; `histories` holds preloaded histories, otherwise the history is queried."""
+        customer = json.loads(data)
+        if "communication_history" in customer:
+            if not with_history:
+                del customer["communication_history"]
+            elif histories is not None:
+                customer["communication_history"] = histories.get(customer_id, [])
+            else:
+                customer["communication_history"] = self._history(customer_id)
+        return customer
+
+    def _decode_chunk(self, rows: Sequence[tuple[str, str]]) -> Iterator[tuple[str, dict]]:
+        """Decode a chunk of `(customer_id, data)` rows with their histories."""
+        histories = self._histories([customer_id for customer_id, _ in rows])
+        for customer_id, data in rows:
+            yield customer_id, self._decode(customer_id, data, True, histories)
+
+    def get(self, customer_id: str, with_history: bool = True) -> dict | None:
+        if not self._may_contain(customer_id):
+            return None
+        row = self._connection().execute("SELECT data FROM customers WHERE customer_id = ?", (customer_id,)).fetchone()
+        return self._decode(customer_id, row[0], with_history) if row is not None else None
+
+    def get_history(
+        self, customer_id: str, since: str | None = None, until: str | None = None, limit: int | None = None
+    ) -> tuple[list[dict], int] | None:
+        if not self.contains(customer_id):
+            return None
+        conditions = "customer_id = ?"
+        parameters: list[str | int] = [customer_id]
+        if since is not None:
+            conditions += " AND date >= ?"
+            parameters.append(since)
+        if until is not None:
+            conditions += " AND date <= ?"
+            parameters.append(until)
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM communications WHERE {conditions}", parameters).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT data FROM communications WHERE {conditions} ORDER BY date DESC, rowid LIMIT ?",
+            # A negative LIMIT means no limit in SQLite
+            [*parameters, -1 if limit is None else limit],
+        )
+        return [json.loads(data) for (data,) in rows], total
+
+    def get_many(self, customer_ids: Iterable[str]) -> dict[str, dict]:
+        requested = list(dict.fromkeys(customer_ids))
+        ids = [customer_id for customer_id in requested if customer_id in self._id_filter]
+        if len(ids) < len(requested):
+            self._refresh_on_miss()
+            ids = [customer_id for customer_id in requested if customer_id in self._id_filter]
+        found: dict[str, dict] = {}
+        conn = self._connection()
+        for start in range(0, len(ids), self._BATCH_SIZE):
+            chunk = ids[start : start + self._BATCH_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT customer_id, data FROM customers WHERE customer_id IN ({placeholders})", chunk)
+            found.update(self._decode_chunk(rows.fetchall()))
+        # Return the records in the requested order, like the in-memory backend
+        return {customer_id: found[customer_id] for customer_id in ids if customer_id in found}
+
+    def get_all(self) -> dict[str, dict]:
+        return dict(self.iter_customers())
+
+    def size(self) -> int:
+        self._refresh()
+        return self._size
+
+    def iter_customers(self) -> Iterator[tuple[str, dict]]:
+        cursor = self._connection().execute("SELECT customer_id, data FROM customers ORDER BY rowid")
+        for rows in itertools.batched(cursor, self._BATCH_SIZE):
+            yield from self._decode_chunk(rows)
+
+    def iter_names(self) -> Iterator[tuple[str, str]]:
+        yield from self._connection().execute("SELECT customer_id, name FROM customers ORDER BY rowid")
+
+    def iter_listing(self, after: int = -1) -> Iterator[tuple[int, tuple[str, str, str]]]:
+        # Positions are rowids, so resuming after a position is a range scan of the primary b-tree
+        rows = self._connection().execute(
+            """
+            SELECT rowid, customer_id, name, coalesce(json_extract(data, '$.personal_info.address'), '')
+            FROM customers WHERE rowid > ? ORDER BY rowid
+            """,
+            (after,),
+        )
+        for rowid, customer_id, name, address in rows:
+            yield rowid, (customer_id, name, address)
+
+    def put(self, customer: dict) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._upsert(conn, [customer])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Also picks up customers inserted by other processes before this one
+        self._add_new_ids()
+
+    def bulk_load(self, customers: Iterable[dict]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._upsert(conn, customers)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._rebuild_id_filter()
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, customers: Iterable[dict]) -> None:
+        for customer in customers:
+            customer_id = customer["customer_id"]
+            document = customer
+            if "communication_history" in customer:
+                document = {**customer, "communication_history": []}
+            conn.execute(
+                """
+                INSERT INTO customers (customer_id, name, data) VALUES (?, ?, ?)
+                ON CONFLICT (customer_id) DO UPDATE SET name = excluded.name, data = excluded.data
+                """,
+                (customer_id, customer_name(customer), json.dumps(document, ensure_ascii=False)),
+            )
+            conn.execute("DELETE FROM communications WHERE customer_id = ?", (customer_id,))
+            conn.executemany(
+                "INSERT INTO communications (customer_id, date, data) VALUES (?, ?, ?)",
+                (
+                    (customer_id, history.entry_date(entry), json.dumps(entry, ensure_ascii=False))
+                    for entry in history.newest_first(customer.get("communication_history", []), history.entry_date)
+                ),
+            )
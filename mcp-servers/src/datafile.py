@@ -0,0 +1,245 @@
+"""
+Memory-mapped, offset-indexed record files.
+
+A data file stores JSON records keyed by ID together with optional string columns (e.g. customer
+names) that can be scanned without decoding the records. Layout, all integers little-endian:
+
+    magic (8 bytes) | header length (u32) | JSON header | padding to 8 bytes | sections
+
+Every field ("id", "data" and each column) is stored as a u64 offset array with one entry per
+record plus one, followed by the concatenated UTF-8 values. A u32 permutation of the record
+numbers sorted by ID makes lookups a binary search. Opening a file only parses the header; the
+sections are read straight from the mapping when a record is touched, so processes mapping the
+same file share it through the page cache. The offset arrays are cast in place to native integers,
+so files can only be opened on little-endian machines.
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping
+
+MAGIC = b"XSDATA01"
+
+_HEADER_PREFIX = struct.Struct("<8sI")
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def write_datafile(
+    path: str, records: Iterable[tuple[str, dict]], columns: Mapping[str, Callable[[dict], str]] | None = None
+) -> int:
+    """
+    Write `records` as `(id, record)` pairs to a data file at `path`, keeping their order.
+
+    `columns` maps column names to functions extracting a string from each record.
+    Returns the number of records written.
+    """
+    columns = columns or {}
+    values: dict[str, list[bytes]] = {"id": [], "data": [], **{name: [] for name in columns}}
+    for record_id, record in records:
+        values["id"].append(record_id.encode())
+        values["data"].append(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode())
+        for name, extract in columns.items():
+            values[name].append(extract(record).encode())
+    count = len(values["id"])
+
+    sections: list[tuple[str, bytes]] = []
+    for name, field_values in values.items():
+        offsets = [0]
+        for value in field_values:
+            offsets.append(offsets[-1] + len(value))
+        sections.append((f"{name}.offsets", struct.pack(f"<{count + 1}Q", *offsets)))
+        sections.append((f"{name}.values", b"".join(field_values)))
+    order = sorted(range(count), key=values["id"].__getitem__)
+    sections.append(("sorted", struct.pack(f"<{count}I", *order)))
+
+    # Section positions depend on the header length, which in turn contains the positions: lay out
+    # behind a header of the last length until the header fits. Positions only grow with the length,
+    # so this ends after a few passes.
+    header_length = 0
+    while True:
+        layout: dict[str, list[int]] = {}
+        position = _align(_HEADER_PREFIX.size + header_length)
+        for name, data in sections:
+            layout[name] = [position, len(data)]
+            position = _align(position + len(data))
+        header = json.dumps({"count": count, "columns": list(columns), "sections": layout}).encode()
+        if len(header) <= header_length:
+            break
+        header_length = len(header)
+    header = header.ljust(header_length)
+
+    with open(path, "wb") as file:
+        file.write(_HEADER_PREFIX.pack(MAGIC, len(header)))
+        file.write(header)
+        for name, data in sections:
+            file.seek(layout[name][0])
+            file.write(data)
+    return count
+
+
+class MappedDataFile(Mapping[str, dict]):
+    """Read-only mapping from record ID to record, decoded lazily from a memory-mapped data file."""
+
+    def __init__(self, path: str) -> None:
+        if sys.byteorder != "little":
+            raise ValueError(f"{path} can't be read on a {sys.byteorder}-endian machine")
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _HEADER_PREFIX.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a data file")
+        header = json.loads(self._mmap[_HEADER_PREFIX.size : _HEADER_PREFIX.size + header_length])
+        self._count: int = header["count"]
+        self.columns: list[str] = header["columns"]
+        view = memoryview(self._mmap)
+        self._sections = {name: view[start : start + length] for name, (start, length) in header["sections"].items()}
+        self._offsets = {
+            name.removesuffix(".offsets"): section.cast("Q")
+            for name, section in self._sections.items()
+            if name.endswith(".offsets")
+        }
+        self._sorted = self._sections["sorted"].cast("I")
+
+    def _value(self, field: str, record_number: int) -> bytes:
+        offsets = self._offsets[field]
+        return bytes(self._sections[f"{field}.values"][offsets[record_number] : offsets[record_number + 1]])
+
+    def record_number(self, record_id: str) -> int | None:
+        """Binary-search the sorted ID permutation for `record_id`."""
+        key = record_id.encode()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self._value("id", self._sorted[middle])
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return self._sorted[middle]
+        return None
+
+    def record_id(self, record_number: int) -> str:
+        return self._value("id", record_number).decode()
+
+    def record_at(self, record_number: int) -> dict:
+        return json.loads(self._value("data", record_number))
+
+    def __getitem__(self, record_id: str) -> dict:
+        record_number = self.record_number(record_id)
+        if record_number is None:
+            raise KeyError(record_id)
+        return self.record_at(record_number)
+
+    def __contains__(self, record_id: object) -> bool:
+        return isinstance(record_id, str) and self.record_number(record_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for record_number in range(self._count):
+            yield self.record_id(record_number)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def iter_column(self, column: str, start: int = 0) -> Iterator[tuple[str, str]]:
+        """Yield `(id, value)` pairs of a string column in record order from record number `start`, without decoding records."""
+        for record_number in range(start, self._count):
+            yield self.record_id(record_number), self._value(column, record_number).decode()
+
+
+class MappedRecords(MutableMapping[str, dict]):
+    """
+    A mutable view over a data file: reads fall through to the mapped file, writes go to an
+    in-process overlay. New IDs are iterated after the file's records, in insertion order.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.file = MappedDataFile(path)
+        self._overlay: dict[str, dict] = {}
+
+    def __getitem__(self, record_id: str) -> dict:
+        if record_id in self._overlay:
+            return self._overlay[record_id]
+        return self.file[record_id]
+
+    def __setitem__(self, record_id: str, record: dict) -> None:
+        self._overlay[record_id] = record
+
+    def __delitem__(self, record_id: str) -> None:
+        raise TypeError("Records can't be deleted from a data file")
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._overlay or record_id in self.file
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.file
+        yield from (record_id for record_id in list(self._overlay) if record_id not in self.file)
+
+    def __len__(self) -> int:
+        return len(self.file) + sum(1 for record_id in list(self._overlay) if record_id not in self.file)
+
+    def iter_records(self) -> Iterator[tuple[str, dict]]:
+        """Yield `(id, record)` pairs in file order, then the records added on top of the file."""
+        for record_number in range(len(self.file)):
+            record_id = self.file.record_id(record_number)
+            record = self._overlay.get(record_id)
+            yield record_id, record if record is not None else self.file.record_at(record_number)
+        for record_id, record in list(self._overlay.items()):
+            if record_id not in self.file:
+                yield record_id, record
+
+    def iter_overlay(self) -> Iterator[tuple[str, dict]]:
+        """Yield the `(id, record)` pairs written on top of the file, in insertion order."""
+        yield from list(self._overlay.items())
+
+    def iter_column(self, column: str, extract: Callable[[dict], str], start: int = 0) -> Iterator[tuple[str, str]]:
+        """
+        Like MappedDataFile.iter_column, using `extract` for records that were overwritten. Records
+        added on top of the file follow at positions after the file's records. Files written
+        without the column have it extracted from the decoded records instead.
+        """
+        if column in self.file.columns:
+            file_values = self.file.iter_column(column, start)
+        else:
+            file_values = (
+                (self.file.record_id(record_number), extract(self.file.record_at(record_number)))
+                for record_number in range(start, len(self.file))
+            )
+        for record_id, value in file_values:
+            yield record_id, extract(self._overlay[record_id]) if record_id in self._overlay else value
+        added = [(record_id, record) for record_id, record in list(self._overlay.items()) if record_id not in self.file]
+        for record_id, record in added[max(0, start - len(self.file)) :]:
+            yield record_id, extract(record)
+
+
+def main() -> None:
+    """Export the customer or product data to a data file."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("dataset", choices=["customers", "products"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.dataset == "customers":
+        import customer_db
+        import customer_storage
+
+        count = write_datafile(
+            args.path,
+            customer_db.iter_customers(),
+            {"name": customer_storage.customer_name, "address": customer_storage.customer_address},
+        )
+    else:
+        import products_db
+
+        count = write_datafile(args.path, products_db.get_all_products().items())
+    print(f"Wrote {count} {args.dataset} to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Inverted index with BM25 ranking over short free texts, such as communication history notes."""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+import text_folding
+
+# BM25 term frequency saturation and document length normalization
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Function words of both languages brokers and notes are written in, compared after folding
+STOP_WORDS = frozenset(
+    [
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "did",
+        "for",
+        "from",
+        "had",
+        "has",
+        "have",
+        "he",
+        "her",
+        "his",
+        "i",
+        "in",
+        "is",
+        "it",
+        "of",
+        "on",
+        "or",
+        "our",
+        "she",
+        "that",
+        "the",
+        "their",
+        "they",
+        "this",
+        "to",
+        "was",
+        "were",
+        "with",
+        "aber",
+        "als",
+        "am",
+        "auch",
+        "auf",
+        "aus",
+        "bei",
+        "das",
+        "dass",
+        "dem",
+        "den",
+        "der",
+        "des",
+        "die",
+        "ein",
+        "eine",
+        "einem",
+        "einen",
+        "einer",
+        "eines",
+        "er",
+        "es",
+        "fuer",
+        "hat",
+        "ich",
+        "im",
+        "ist",
+        "mit",
+        "nach",
+        "nicht",
+        "oder",
+        "sie",
+        "sich",
+        "und",
+        "von",
+        "war",
+        "wie",
+        "wir",
+        "zu",
+        "zum",
+        "zur",
+    ]
+)
+
+
+def stem(word: str) -> str:
+    """
+    Reduce a folded word to its stem with the CISTEM German stemmer (case-insensitive variant).
+
+    CISTEM strips the German inflection suffixes -em, -er, -nd, -t, -e, -s and -n, which also
+    conflates English plurals. Words of up to three letters are kept as is.
+    """
+    word = word.replace("sch", "$").replace("ei", "%").replace("ie", "&")
+    # Mark doubled letters so that suffix stripping can't split them
+    word = re.sub(r"(.)\1", r"\1*", word)
+    while len(word) > 3:
+        if len(word) > 5:
+            word, stripped = re.subn(r"e[mr]$", "", word)
+            if stripped:
+                continue
+            word, stripped = re.subn(r"nd$", "", word)
+            if stripped:
+                continue
+        word, stripped = re.subn(r"[tesn]$", "", word)
+        if not stripped:
+            break
+    word = re.sub(r"(.)\*", r"\1\1", word)
+    return word.replace("&", "ie").replace("%", "ei").replace("$", "sch")
+
+
+def tokenize(text: str) -> list[str]:
+    """Fold `text` (see `text_folding.fold`), split it into words and return the stems of all non-stop words."""
+    return [stem(token) for token in _TOKEN.findall(text_folding.fold(text)) if token not in STOP_WORDS]
+
+
+class FullTextIndex:
+    """
+    Maps the stems of indexed texts to the documents containing them, with their term frequencies.
+
+    Documents are grouped by a key (e.g. a customer ID) and addressed as `(key_id, position)`, so
+    all texts of a key can be replaced at once when the record they belong to changes. Queries
+    score documents with Okapi BM25, touching only the postings of the query's own terms.
+
+    Writers must be serialized by the caller. Queries take no lock and score snapshots of the
+    postings, skipping documents a concurrent writer removed meanwhile.
+    """
+
+    def __init__(self) -> None:
+        self._postings: defaultdict[str, dict[tuple[str, int], int]] = defaultdict(dict)
+        self._lengths: dict[tuple[str, int], int] = {}
+        self._documents: dict[str, list[Counter[str]]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, key_id: str, texts: list[str]) -> None:
+        """Index `texts` as the documents of `key_id`, replacing any documents previously indexed for it."""
+        self.remove(key_id)
+        documents = []
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            frequencies = Counter(tokens)
+            for term, frequency in frequencies.items():
+                self._postings[term][key_id, position] = frequency
+            self._lengths[key_id, position] = len(tokens)
+            self._total_length += len(tokens)
+            documents.append(frequencies)
+        self._documents[key_id] = documents
+
+    def remove(self, key_id: str) -> None:
+        for position, frequencies in enumerate(self._documents.pop(key_id, ())):
+            for term in frequencies:
+                postings = self._postings[term]
+                del postings[key_id, position]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop((key_id, position))
+
+    def search(self, query: str, limit: int | None = None) -> list[tuple[tuple[str, int], float]]:
+        """Return `((key_id, position), score)` for the documents matching any query term, best first."""
+        terms = set(tokenize(query))
+        document_count = len(self._lengths)
+        if not terms or not document_count:
+            return []
+        average_length = self._total_length / document_count
+        scores: defaultdict[tuple[str, int], float] = defaultdict(float)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for document, frequency in list(postings.items()):
+                length = self._lengths.get(document)
+                if length is None:
+                    continue
+                length_norm = 1 - B + B * length / average_length
+                scores[document] += idf * frequency * (K1 + 1) / (frequency + K1 * length_norm)
+        ranked = scores.items()
+        if limit is not None:
+            return heapq.nlargest(limit, ranked, key=lambda entry: entry[1])
+        return sorted(ranked, key=lambda entry: entry[1], reverse=True)
@@ -0,0 +1,174 @@
+"""Typo-tolerant name lookup backed by a SymSpell symmetric-delete index."""
+
+import itertools
+import re
+from collections import defaultdict
+
+import text_folding
+
+DEFAULT_MAX_DISTANCE = 2
+# Only the first characters of a token generate delete variants. Shorter prefixes store far fewer
+# variants, but share them with more tokens, which lookups then verify against the full token.
+# `benchmarks/fuzzy_search.py` measures the trade-off.
+DEFAULT_PREFIX_LENGTH = 7
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split `text` into folded word tokens."""
+    return _TOKEN_PATTERN.findall(text_folding.fold(text))
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int | None:
+    """
+    Return the optimal string alignment distance between `a` and `b`, or None if it exceeds `max_distance`.
+
+    Insertions, deletions, substitutions and transpositions of adjacent characters each cost one edit.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    # A common prefix and suffix cost no edits, so only the differing middle needs the quadratic table.
+    # Candidates found through a shared prefix usually differ only in a few characters.
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start : len(a) - end], b[start : len(b) - end]
+    previous_previous: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def _deletes(token: str, max_distance: int, prefix_length: int) -> set[str]:
+    """All variants of the token prefix with up to `max_distance` characters removed, including the prefix itself."""
+    prefix = token[:prefix_length]
+    variants = {prefix}
+    frontier = {prefix}
+    for _ in range(max_distance):
+        frontier = {word[:i] + word[i + 1 :] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def allowed_distance(token: str, max_distance: int) -> int:
+    """Scale the edit budget with token length so that short tokens like "dr" do not match everything."""
+    if len(token) <= 2:
+        return 0
+    if len(token) <= 4:
+        return min(max_distance, 1)
+    return max_distance
+
+
+class SymSpellIndex:
+    """
+    Finds indexed texts whose word tokens are all within a small edit distance of the query tokens.
+
+    Every distinct token is stored once together with all its delete variants (SymSpell's symmetric
+    delete algorithm, limited to the first `prefix_length` characters). A lookup generates the delete
+    variants of the query token, collects the stored tokens sharing one of them and verifies only those
+    with a bounded edit distance on the full token, so lookup cost depends on the query, not on the
+    number of indexed texts. Two tokens within the edit budget have prefixes within it too, so the
+    prefix limit never loses a match.
+
+    Writers must be serialized by the caller. Lookups take no lock: they never insert into the
+    index and iterate snapshots of the token sets a concurrent writer may change.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, prefix_length: int = DEFAULT_PREFIX_LENGTH) -> None:
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._deletes: defaultdict[str, set[str]] = defaultdict(set)
+        self._postings: defaultdict[str, set[str]] = defaultdict(set)
+        self._tokens: dict[str, tuple[str, ...]] = {}
+        self._order: dict[str, int] = {}
+        self._sequence = itertools.count()
+
+    def add(self, key_id: str, text: str) -> None:
+        """Index the tokens of `text` under `key_id`, replacing any text previously indexed for it."""
+        self._unindex(key_id)
+        tokens = tuple(dict.fromkeys(tokenize(text)))
+        self._tokens[key_id] = tokens
+        if key_id not in self._order:
+            self._order[key_id] = next(self._sequence)
+        for token in tokens:
+            if token not in self._postings:
+                for variant in _deletes(token, self.max_distance, self.prefix_length):
+                    self._deletes[variant].add(token)
+            self._postings[token].add(key_id)
+
+    def remove(self, key_id: str) -> None:
+        self._unindex(key_id)
+        self._tokens.pop(key_id, None)
+        self._order.pop(key_id, None)
+
+    def _unindex(self, key_id: str) -> None:
+        for token in self._tokens.get(key_id, ()):
+            postings = self._postings[token]
+            postings.discard(key_id)
+            if postings:
+                continue
+            del self._postings[token]
+            for variant in _deletes(token, self.max_distance, self.prefix_length):
+                tokens = self._deletes[variant]
+                tokens.discard(token)
+                if not tokens:
+                    del self._deletes[variant]
+
+    def lookup_token(self, token: str, max_distance: int) -> dict[str, int]:
+        """Return the indexed tokens within `max_distance` edits of `token`, mapped to their distance."""
+        max_distance = min(max_distance, self.max_distance)
+        matches: dict[str, int] = {}
+        checked: set[str] = set()
+        for variant in _deletes(token, max_distance, self.prefix_length):
+            for candidate in tuple(self._deletes.get(variant, ())):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                distance = edit_distance(token, candidate, max_distance)
+                if distance is not None:
+                    matches[candidate] = distance
+        return matches
+
+    def search(self, text: str, max_distance: int = DEFAULT_MAX_DISTANCE) -> list[tuple[str, int]]:
+        """
+        Return `(key_id, distance)` pairs for texts matching every token of `text` within the edit budget.
+
+        The distance is the sum of the best per-token distances. Results are ranked by distance and
+        then by the order in which IDs were first added.
+        """
+        query_tokens = tokenize(text)
+        if not query_tokens:
+            return []
+
+        token_matches = [self.lookup_token(token, allowed_distance(token, max_distance)) for token in query_tokens]
+        # Start from the most selective query token and only check the surviving IDs against the others
+        token_matches.sort(key=lambda matches: sum(len(self._postings.get(token, ())) for token in matches))
+
+        scores: dict[str, int] = {}
+        for token, distance in token_matches[0].items():
+            for key_id in tuple(self._postings.get(token, ())):
+                if key_id not in scores or distance < scores[key_id]:
+                    scores[key_id] = distance
+
+        for matches in token_matches[1:]:
+            narrowed: dict[str, int] = {}
+            for key_id, score in scores.items():
+                distances = [matches[token] for token in self._tokens.get(key_id, ()) if token in matches]
+                if distances:
+                    narrowed[key_id] = score + min(distances)
+            scores = narrowed
+
+        return sorted(scores.items(), key=lambda item: (item[1], self._order.get(item[0], -1)))
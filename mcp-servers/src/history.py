@@ -0,0 +1,42 @@
+"""Communication history entries kept newest first, with binary-searched date windows."""
+
+import bisect
+from collections.abc import Callable, Iterable, Sequence
+
+
+def entry_date(entry: dict) -> str:
+    return entry.get("date") or ""
+
+
+def newest_first[T](entries: Iterable[T], date_of: Callable[[T], str | None]) -> list[T]:
+    """Sort entries by their ISO date, newest first; entries of the same date keep their order."""
+    return sorted(entries, key=lambda entry: date_of(entry) or "", reverse=True)
+
+
+def window[T](
+    entries: Sequence[T],
+    date_of: Callable[[T], str | None],
+    since: str | None = None,
+    until: str | None = None,
+    limit: int | None = None,
+) -> tuple[Sequence[T], int]:
+    """
+    Select the entries dated between `since` and `until` (inclusive ISO dates) from entries sorted
+    newest first.
+
+    Both window edges are found by bisection, so only the returned entries are touched. Returns
+    at most `limit` entries, the newest ones, and the total number of entries in the window.
+    Entries without a date sort as oldest and never fall into a window with a `since` bound.
+    """
+    # The predicates are False for newer and True for older entries, so they ascend along the list
+    start = 0 if until is None else bisect.bisect_left(entries, True, key=lambda entry: (date_of(entry) or "") <= until)
+    stop = (
+        len(entries)
+        if since is None
+        else bisect.bisect_left(entries, True, key=lambda entry: (date_of(entry) or "") < since)
+    )
+    stop = max(start, stop)
+    total = stop - start
+    if limit is not None:
+        stop = min(stop, start + limit)
+    return entries[start:stop], total
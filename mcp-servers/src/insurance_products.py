@@ -1,10 +1,18 @@
 """Insurance Products MCP server."""
 
+import functools
+from collections.abc import Callable
+
+import pydantic_core
 from fastmcp import FastMCP
+from fastmcp.tools import ToolResult
+from mcp.types import TextContent
 from opentelemetry.trace import get_tracer
 
 import middleware
+import offload
 import otel
+import pagination
 import products_db
 import response
 
@@ -15,41 +23,87 @@ tracer = get_tracer(__name__)
 mcp: FastMCP = FastMCP("SecureLife Insurance Products", middleware=[middleware.OtelMetricsMiddleware()])
 
 
-def _summarize_product(product_id: str, product_data: dict) -> dict:
-    """Extract a slim product summary with only the essential fields."""
-    return {
-        "product_id": product_id,
-        "name": product_data.get("name"),
-        "type": product_data.get("type"),
-        "description": product_data.get("description"),
-        "target_segments": product_data.get("target_segments"),
-    }
+# Number of distinct argument combinations per tool whose serialized responses are kept
+RESPONSE_CACHE_SIZE = 256
+
+
+def _cache_by_catalog_version[**P](tool: Callable[P, dict]) -> Callable[P, ToolResult]:
+    """
+    Serve repeated calls of a catalog tool from an already serialized response.
+
+    The response is encoded to JSON once per tool, argument combination and products_db catalog
+    version. FastMCP passes a returned ToolResult through unchanged, so cache hits skip both
+    building the response dict and serializing it. Entries of older catalog versions are never
+    hit again and age out of the LRU.
+    """
+
+    @functools.lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+    def encode(catalog_version: int, args: tuple, kwargs: tuple) -> ToolResult:
+        payload = tool(*args, **dict(kwargs))
+        text = pydantic_core.to_json(payload, fallback=str).decode()
+        return ToolResult(content=[TextContent(type="text", text=text)], structured_content=payload)
+
+    @functools.wraps(tool)
+    def cached_tool(*args: P.args, **kwargs: P.kwargs) -> ToolResult:
+        return encode(products_db.get_catalog_version(), args, tuple(sorted(kwargs.items())))
+
+    return cached_tool
+
+
+def _paginate_products(
+    product_ids: tuple[str, ...], scope: str, limit: int | None, cursor: str | None
+) -> tuple[dict, str | None]:
+    """
+    Return the prebuilt summaries of one page of `product_ids`.
+
+    Raises pagination.InvalidCursorError if the cursor doesn't belong to `scope`.
+    """
+    after = pagination.decode_cursor(cursor, scope)
+    page, next_position = pagination.paginate(
+        enumerate(product_ids[after + 1 :], start=after + 1), after, pagination.clamp_page_size(limit)
+    )
+    summaries = {product_id: products_db.get_product_summary(product_id) for product_id in page}
+    next_cursor = None if next_position is None else pagination.encode_cursor(scope, next_position)
+    return summaries, next_cursor
 
 
 @mcp.tool()
-def get_insurance_products() -> dict:
+@offload.in_worker_pool
+@_cache_by_catalog_version
+def get_insurance_products(limit: int | None = None, cursor: str | None = None) -> dict:
     """
     Retrieves slim summaries of all available insurance products.
 
     Returns product_id, name, type, description, and target_segments for each product.
     Use get_product_details to get complete information about a specific product.
 
+    Args:
+        limit: Maximum number of products per page (default: 50, capped at 100)
+        cursor: The next_cursor of a previous call, to fetch the next page
+
     Returns:
-        Dictionary with product summaries and product_count on success, or error details on failure.
+        Dictionary with product summaries, product_count and next_cursor (null on the last page)
+        on success, or error details on failure.
     """
-    with tracer.start_as_current_span("products_db.get_all_products"):
-        mock_products = products_db.get_all_products()
+    with tracer.start_as_current_span("products_db.get_product_ids"):
+        product_ids = products_db.get_product_ids()
 
-    summaries = {key: _summarize_product(key, data) for key, data in mock_products.items()}
+    try:
+        summaries, next_cursor = _paginate_products(product_ids, "get_insurance_products", limit, cursor)
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
 
     return response.create_success_response(
         "Insurance products retrieved successfully",
         products=summaries,
         product_count=len(summaries),
+        next_cursor=next_cursor,
     )
 
 
 @mcp.tool()
+@offload.in_worker_pool
+@_cache_by_catalog_version
 def get_product_details(product_id: str) -> dict:
     """
     Retrieves complete information about a specific insurance product.
@@ -64,8 +118,8 @@ def get_product_details(product_id: str) -> dict:
         Dictionary with complete product information or error if not found.
     """
     # Find the specific product
-    with tracer.start_as_current_span("products_db.get_all_products", attributes={"product_id": product_id}):
-        product_data = products_db.get_all_products().get(product_id)
+    with tracer.start_as_current_span("products_db.get_product", attributes={"product_id": product_id}):
+        product_data = products_db.get_product(product_id)
     if product_data is not None:
         return response.create_success_response(
             f"Product details for {product_data['name']}",
@@ -81,7 +135,9 @@ def get_product_details(product_id: str) -> dict:
 
 
 @mcp.tool()
-def get_products_by_segment(segment: str) -> dict:
+@offload.in_worker_pool
+@_cache_by_catalog_version
+def get_products_by_segment(segment: str, limit: int | None = None, cursor: str | None = None) -> dict:
     """
     Retrieves slim summaries of insurance products targeting a specific customer segment.
 
@@ -90,19 +146,23 @@ def get_products_by_segment(segment: str) -> dict:
 
     Args:
         segment: The customer segment to filter by (e.g., "families", "high_income", "business_owners")
+        limit: Maximum number of products per page (default: 50, capped at 100)
+        cursor: The next_cursor of a previous call with the same segment, to fetch the next page
 
     Returns:
-        Dictionary with product summaries matching the segment, or error if none found.
+        Dictionary with product summaries matching the segment and next_cursor (null on the last page),
+        or error if none found.
     """
-    # Get all products
-    with tracer.start_as_current_span("products_db.get_all_products", attributes={"segment": segment}):
-        products = products_db.get_all_products()
-    matching_products = {}
+    # Look up the products targeting the segment
+    with tracer.start_as_current_span("products_db.get_product_ids_by_segment", attributes={"segment": segment}):
+        product_ids = products_db.get_product_ids_by_segment(segment)
 
-    # Filter products by segment
-    for product_id, product_data in products.items():
-        if "target_segments" in product_data and segment in product_data["target_segments"]:
-            matching_products[product_id] = _summarize_product(product_id, product_data)
+    try:
+        matching_products, next_cursor = _paginate_products(
+            product_ids, f"get_products_by_segment:{segment}", limit, cursor
+        )
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
 
     if not matching_products:
         return response.create_error_response(
@@ -116,11 +176,14 @@ def get_products_by_segment(segment: str) -> dict:
         products=matching_products,
         segment=segment,
         product_count=len(matching_products),
+        next_cursor=next_cursor,
     )
 
 
 @mcp.tool()
-def get_products_by_type(product_type: str) -> dict:
+@offload.in_worker_pool
+@_cache_by_catalog_version
+def get_products_by_type(product_type: str, limit: int | None = None, cursor: str | None = None) -> dict:
     """
     Retrieves slim summaries of insurance products of a specific type.
 
@@ -130,19 +193,23 @@ def get_products_by_type(product_type: str) -> dict:
     Args:
         product_type: The product type to filter by (e.g., "life insurance", "health insurance",
                      "auto insurance", "home insurance", "travel insurance", etc.)
+        limit: Maximum number of products per page (default: 50, capped at 100)
+        cursor: The next_cursor of a previous call with the same product type, to fetch the next page
 
     Returns:
-        Dictionary with product summaries matching the type, or error if none found.
+        Dictionary with product summaries matching the type and next_cursor (null on the last page),
+        or error if none found.
     """
-    # Get all products
-    with tracer.start_as_current_span("products_db.get_all_products", attributes={"product_type": product_type}):
-        products = products_db.get_all_products()
-    matching_products = {}
+    # Look up the products of the type
+    with tracer.start_as_current_span("products_db.get_product_ids_by_type", attributes={"product_type": product_type}):
+        product_ids = products_db.get_product_ids_by_type(product_type)
 
-    # Filter products by type
-    for product_id, product_data in products.items():
-        if product_data.get("type") == product_type:
-            matching_products[product_id] = _summarize_product(product_id, product_data)
+    try:
+        matching_products, next_cursor = _paginate_products(
+            product_ids, f"get_products_by_type:{product_type}", limit, cursor
+        )
+    except pagination.InvalidCursorError as e:
+        return response.create_error_response(str(e), "INVALID_CURSOR")
 
     if not matching_products:
         return response.create_error_response(
@@ -156,4 +223,5 @@ def get_products_by_type(product_type: str) -> dict:
         products=matching_products,
         product_type=product_type,
         product_count=len(matching_products),
+        next_cursor=next_cursor,
     )
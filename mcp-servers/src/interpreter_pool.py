@@ -0,0 +1,209 @@
+"""
+Pool of subinterpreters (PEP 734) running CPU-bound name searches and recommendation scoring.
+
+Every subinterpreter has its own GIL, so the pool runs pure-Python work in parallel on a regular
+CPython build, without the start-up cost and the data copies through pipes of worker processes.
+Interpreters share no Python objects, though. With the `mmap` backend every worker maps the
+customer data file itself and reads the name column from the shared page cache; otherwise it
+receives the names once when it starts. Either way each worker builds its own name indexes, and
+calls only exchange small arguments and results.
+
+Every worker interpreter is served by its own single-worker executor, so writes can be sent to all
+of them: `put_name` and `set_products` queue an update on every worker, and since each worker
+runs its queue in order, any search submitted afterwards sees the update.
+
+NumPy does not support subinterpreters, so only work implemented in pure-Python modules runs in
+the pool. Vectorized filters over the column store stay in the worker pool (see `offload`), where
+NumPy releases the GIL.
+
+The functions below the pool class run inside the worker interpreters. They only depend on
+module state set up by `init_worker`, so they work the same in a thread or process pool.
+"""
+
+import collections
+import itertools
+import math
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, InterpreterPoolExecutor
+
+import datafile
+import fuzzy_index
+import interval_index
+import name_index
+import recommendations
+
+# Run name searches and recommendation scoring in subinterpreters instead of the worker pool
+ENABLED = os.environ.get("CPU_WORK_EXECUTOR", "threads").lower() == "interpreters"
+# Number of worker interpreters; each holds its own copy of the name indexes
+WORKERS = int(os.environ.get("INTERPRETER_POOL_SIZE", os.cpu_count() or 1))
+# Matches fetched from a worker per call while a name search result is consumed
+MATCH_BATCH_SIZE = 256
+# Customers sent to a worker per scoring call
+SCORE_BATCH_SIZE = 256
+
+
+class InterpreterPool:
+    """
+    Worker interpreters holding the customer names and the product catalog.
+
+    The names are those of the data file at `names_file`, if given, followed by `names`, which
+    replace the names of file records with the same ID. Callers must serialize writes with the
+    creation of the pool, so that no update is missed or applied twice.
+    """
+
+    def __init__(
+        self,
+        products: Iterable[tuple[str, dict]],
+        catalog_version: int,
+        names: Iterable[tuple[str, str]] = (),
+        names_file: str | None = None,
+        workers: int = WORKERS,
+    ) -> None:
+        self.catalog_version = catalog_version
+        initargs = (tuple(products), tuple(names), names_file)
+        self._executors = [
+            InterpreterPoolExecutor(max_workers=1, initializer=init_worker, initargs=initargs) for _ in range(workers)
+        ]
+        self._turns = itertools.count()
+
+    def _next_executor(self) -> InterpreterPoolExecutor:
+        return self._executors[next(self._turns) % len(self._executors)]
+
+    def _broadcast(self, func: Callable[..., object], *args: object) -> None:
+        for executor in self._executors:
+            executor.submit(func, *args)
+
+    def put_name(self, customer_id: str, name: str) -> None:
+        """Add a customer's name to the indexes of all workers, or replace it."""
+        self._broadcast(put_worker_name, customer_id, name)
+
+    def set_products(self, products: Iterable[tuple[str, dict]], catalog_version: int) -> None:
+        """Replace the product catalog of all workers."""
+        self._broadcast(set_worker_products, tuple(products))
+        self.catalog_version = catalog_version
+
+    def warm_up(self) -> None:
+        """Build the name indexes in all workers."""
+        for future in [executor.submit(build_name_indexes) for executor in self._executors]:
+            future.result()
+
+    def iter_matches(self, term: str, after: int = -1) -> Iterator[tuple[int, str]]:
+        """Lazily yield `(position, key_id)` for the names containing `term` (see TrigramIndex.iter_matches)."""
+        while True:
+            matches = self._next_executor().submit(search_names, term, after, MATCH_BATCH_SIZE).result()
+            yield from matches
+            if len(matches) < MATCH_BATCH_SIZE:
+                return
+            after = matches[-1][0]
+
+    def fuzzy_search(self, text: str, max_distance: int) -> list[tuple[str, int]]:
+        """Return the names within the edit budget of `text` (see SymSpellIndex.search)."""
+        return self._next_executor().submit(fuzzy_search, text, max_distance).result()
+
+    def score(
+        self, customers: Iterable[tuple[str, dict]]
+    ) -> Iterator[tuple[str, tuple[recommendations.Recommendation, ...]]]:
+        """Lazily yield `(customer_id, recommendations)` for all customers, in order, scored in parallel."""
+        pending: collections.deque[Future[list[tuple[str, tuple[recommendations.Recommendation, ...]]]]] = (
+            collections.deque()
+        )
+        for batch in itertools.batched(customers, SCORE_BATCH_SIZE):
+            pending.append(self._next_executor().submit(score_customers, batch))
+            if len(pending) >= 2 * len(self._executors):
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def shutdown(self) -> None:
+        for executor in self._executors:
+            executor.shutdown()
+
+
+# Worker state, set up by init_worker in every worker interpreter
+_names_file: str | None = None
+# Names applied on top of the file's names, kept until the indexes are built
+_pending_names: dict[str, str] = {}
+_name_indexes: tuple[name_index.TrigramIndex, fuzzy_index.SymSpellIndex] | None = None
+_products: dict[str, dict] = {}
+_age_index = interval_index.IntervalIndex(())
+
+
+def init_worker(
+    products: tuple[tuple[str, dict], ...], names: tuple[tuple[str, str], ...] = (), names_file: str | None = None
+) -> None:
+    """Keep the data of a worker; the name indexes are built on its first name search."""
+    global _names_file, _pending_names, _name_indexes
+    _names_file = names_file
+    _pending_names = dict(names)
+    _name_indexes = None
+    set_worker_products(products)
+
+
+def set_worker_products(products: tuple[tuple[str, dict], ...]) -> None:
+    global _products, _age_index
+    _products = dict(products)
+    _age_index = interval_index.IntervalIndex(
+        (product_id, *interval_index.bounds(data.get("age_range", {}), "min", "max")) for product_id, data in products
+    )
+
+
+def _file_names(path: str) -> Iterator[tuple[str, str]]:
+    data_file = datafile.MappedDataFile(path)
+    if "name" in data_file.columns:
+        yield from data_file.iter_column("name")
+        return
+    for record_number in range(len(data_file)):
+        record = data_file.record_at(record_number)
+        yield data_file.record_id(record_number), record.get("personal_info", {}).get("name", "")
+
+
+def _worker_name_indexes() -> tuple[name_index.TrigramIndex, fuzzy_index.SymSpellIndex]:
+    global _name_indexes
+    if _name_indexes is None:
+        trigram_index = name_index.TrigramIndex()
+        symspell_index = fuzzy_index.SymSpellIndex()
+        file_names = _file_names(_names_file) if _names_file is not None else ()
+        # Added in the order of the serving interpreter's index, so that positions agree with it:
+        # file records first, with written names replacing theirs, then added customers
+        for customer_id, name in itertools.chain(file_names, _pending_names.items()):
+            name = _pending_names.get(customer_id, name)
+            trigram_index.add(customer_id, name)
+            symspell_index.add(customer_id, name)
+        _pending_names.clear()
+        _name_indexes = trigram_index, symspell_index
+    return _name_indexes
+
+
+def build_name_indexes() -> None:
+    _worker_name_indexes()
+
+
+def put_worker_name(customer_id: str, name: str) -> None:
+    if _name_indexes is None:
+        _pending_names[customer_id] = name
+        return
+    _name_indexes[0].add(customer_id, name)
+    _name_indexes[1].add(customer_id, name)
+
+
+def search_names(term: str, after: int, limit: int) -> list[tuple[int, str]]:
+    return list(itertools.islice(_worker_name_indexes()[0].iter_matches(term, after), limit))
+
+
+def fuzzy_search(text: str, max_distance: int) -> list[tuple[str, int]]:
+    return _worker_name_indexes()[1].search(text, max_distance)
+
+
+def score_customers(
+    customers: Iterable[tuple[str, dict]],
+) -> list[tuple[str, tuple[recommendations.Recommendation, ...]]]:
+    """Rank the eligible products of every customer, like customer_db does for a single one."""
+    scored = []
+    for customer_id, customer in customers:
+        age = customer.get("personal_info", {}).get("age")
+        # An unknown age falls outside every bounded age range
+        eligible_ids = _age_index.stab(age if isinstance(age, int | float) else math.nan)
+        eligible = ((product_id, _products[product_id]) for product_id in eligible_ids)
+        scored.append((customer_id, tuple(recommendations.rank(customer, eligible))))
+    return scored
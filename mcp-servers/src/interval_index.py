@@ -0,0 +1,51 @@
+"""Stabbing queries over closed intervals using sorted breakpoint arrays."""
+
+import bisect
+import math
+from collections.abc import Iterable
+
+
+def bounds(data: dict, low_key: str, high_key: str) -> tuple[float, float]:
+    """Read an optional inclusive range from a record, treating missing bounds as unbounded."""
+    low, high = data.get(low_key), data.get(high_key)
+    return (-math.inf if low is None else low, math.inf if high is None else high)
+
+
+class IntervalIndex:
+    """
+    Answers "which intervals contain this point" with a binary search.
+
+    The distinct interval bounds split the number line into alternating regions: the bounds
+    themselves and the open gaps between them. The keys of the intervals covering each region are
+    precomputed in insertion order, so a query is a bisection over the sorted bounds followed by a
+    lookup. Building takes time and memory proportional to intervals times regions, which is fine
+    for catalog-sized inputs. Unbounded intervals use -inf/inf as bounds.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[str, float, float]]) -> None:
+        intervals = list(intervals)
+        self._bounds = sorted({bound for _, low, high in intervals for bound in (low, high)})
+        # Region 2i is the gap before bound i, region 2i + 1 is bound i itself
+        regions: list[list[str]] = [[] for _ in range(2 * len(self._bounds) + 1)]
+        for key, low, high in intervals:
+            if low > high:
+                continue
+            first = 2 * bisect.bisect_left(self._bounds, low) + 1
+            last = 2 * bisect.bisect_left(self._bounds, high) + 1
+            for region in range(first, last + 1):
+                regions[region].append(key)
+        self._regions = [tuple(keys) for keys in regions]
+        self._unbounded = tuple(key for key, low, high in intervals if low == -math.inf and high == math.inf)
+
+    def stab(self, point: float) -> tuple[str, ...]:
+        """
+        Return the keys of all intervals containing `point`, in insertion order.
+
+        An unknown point (NaN) is only contained by the intervals that contain every point.
+        """
+        if math.isnan(point):
+            return self._unbounded
+        i = bisect.bisect_left(self._bounds, point)
+        if i < len(self._bounds) and self._bounds[i] == point:
+            return self._regions[2 * i + 1]
+        return self._regions[2 * i]
@@ -0,0 +1,103 @@
+"""Inverted trigram index for case- and accent-insensitive partial name matching."""
+
+import heapq
+from collections import defaultdict
+from collections.abc import Iterator
+
+import text_folding
+
+GRAM_SIZE = 3
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """
+    Maps every trigram of an indexed text to the IDs whose text contains it.
+
+    Texts are folded once when they are added (see `text_folding.fold`) and the folded keys are
+    kept alongside the postings, so queries never re-normalize stored texts.
+
+    A substring query intersects the postings of its own trigrams, starting with the rarest, and
+    only verifies the remaining candidates. Queries shorter than a trigram match too many records
+    for the postings to help and fall back to a scan of the pre-normalized keys. Results keep the
+    order in which IDs were first added.
+
+    Writers must be serialized by the caller. Queries take no lock and may run concurrently with
+    a writer; they see an updated text either before or after the update.
+    """
+
+    def __init__(self) -> None:
+        self._keys: dict[str, str] = {}
+        self._order: dict[str, int] = {}
+        # The ID at every position, so that a scan resumes at a position; positions of removed IDs are skipped
+        self._positions: list[str] = []
+        self._postings: defaultdict[str, set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return text_folding.fold(text)
+
+    def add(self, key_id: str, text: str) -> None:
+        """Index `text` under `key_id`, replacing any text previously indexed for it."""
+        self._unindex(key_id)
+        key = self.normalize(text)
+        self._keys[key_id] = key
+        if key_id not in self._order:
+            self._order[key_id] = len(self._positions)
+            self._positions.append(key_id)
+        for gram in _grams(key):
+            self._postings[gram].add(key_id)
+
+    def remove(self, key_id: str) -> None:
+        self._unindex(key_id)
+        self._keys.pop(key_id, None)
+        self._order.pop(key_id, None)
+
+    def _unindex(self, key_id: str) -> None:
+        key = self._keys.get(key_id)
+        if key is None:
+            return
+        for gram in _grams(key):
+            postings = self._postings[gram]
+            postings.discard(key_id)
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, term: str) -> list[str]:
+        """Return the IDs whose indexed text contains `term`, in insertion order."""
+        return [key_id for _, key_id in self.iter_matches(term)]
+
+    def iter_matches(self, term: str, after: int = -1) -> Iterator[tuple[int, str]]:
+        """
+        Lazily yield `(position, key_id)` for IDs whose indexed text contains `term`, in insertion order.
+
+        Only IDs positioned after `after` are considered. Candidates are verified as they are
+        consumed, so a caller that stops after one page never verifies the rest.
+        """
+        term = self.normalize(term)
+        if len(term) < GRAM_SIZE:
+            # Too short to be selective: scan the pre-normalized keys by position, starting after `after`.
+            # Keys added by a concurrent writer while the generator is suspended are appended.
+            position = after + 1
+            while position < len(self._positions):
+                key_id = self._positions[position]
+                if self._order.get(key_id) == position and term in self._keys.get(key_id, ""):
+                    yield position, key_id
+                position += 1
+            return
+
+        postings = sorted((self._postings.get(gram, set()) for gram in _grams(term)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        # A heap yields the candidates in position order without sorting those never consumed
+        positioned = [(position, key_id) for key_id in candidates if (position := self._order[key_id]) > after]
+        heapq.heapify(positioned)
+        while positioned:
+            position, key_id = heapq.heappop(positioned)
+            if term in self._keys.get(key_id, ""):
+                yield position, key_id
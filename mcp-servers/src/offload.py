@@ -0,0 +1,99 @@
+"""
+Bounded worker pool running blocking data access and CPU-bound tool work off the event loop.
+
+On a free-threaded CPython build (3.14t, or 3.13t with the GIL disabled) the worker threads run
+Python code in parallel, so CPU-bound searches and scoring of concurrent tool calls scale across
+cores. Single large computations can additionally be split over compute threads with
+`map_ordered`; with the GIL enabled that would not gain anything, so it runs them inline.
+"""
+
+import asyncio
+import collections
+import contextvars
+import functools
+import itertools
+import os
+import sys
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Whether threads run Python code in parallel, i.e. this is a free-threaded build with the GIL disabled
+PARALLEL_THREADS = not getattr(sys, "_is_gil_enabled", lambda: True)()
+# Upper bound on concurrently running blocking calls; further calls queue instead of spawning threads
+MAX_WORKERS = int(os.environ.get("TOOL_WORKER_THREADS", min(32, (os.cpu_count() or 1) + 4)))
+# Threads sharing a single computation split with map_ordered
+COMPUTE_THREADS = int(os.environ.get("COMPUTE_THREADS", os.cpu_count() or 1))
+# Items handed to a compute thread at once, amortizing the hand-over over many small items
+COMPUTE_CHUNK_SIZE = 256
+
+_executor: ThreadPoolExecutor
+# Separate from the worker pool: tool calls running in the worker pool wait for compute threads,
+# and must not wait for threads of their own, possibly exhausted, pool
+_compute_executor: ThreadPoolExecutor
+
+
+def _start_executors() -> None:
+    global _executor, _compute_executor
+    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tool-worker")
+    _compute_executor = ThreadPoolExecutor(max_workers=COMPUTE_THREADS, thread_name_prefix="compute")
+
+
+_start_executors()
+# Threads don't survive a fork, so a forked worker (see `serve`) starts pools of its own instead of
+# queueing work for the parent's threads, which it doesn't have
+os.register_at_fork(after_in_child=_start_executors)
+
+
+async def run[**P, T](func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """
+    Run a blocking call in the worker pool and await its result.
+
+    The call runs in a copy of the caller's context, so OpenTelemetry spans opened inside it
+    become children of the caller's current span.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+def in_worker_pool[**P, T](func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    """
+    Turn a blocking function into a coroutine function that runs it in the worker pool.
+
+    The wrapper keeps the wrapped function's signature and docstring, so it can be registered as
+    an MCP tool in place of the blocking function.
+    """
+
+    @functools.wraps(func)
+    async def offloaded(*args: P.args, **kwargs: P.kwargs) -> T:
+        return await run(func, *args, **kwargs)
+
+    return offloaded
+
+
+def _apply[T, R](func: Callable[[T], R], chunk: tuple[T, ...]) -> list[R]:
+    return [func(item) for item in chunk]
+
+
+def map_ordered[T, R](func: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+    """
+    Lazily yield `func(item)` for all items, in order, computed in parallel by the compute threads.
+
+    Items are consumed in chunks of COMPUTE_CHUNK_SIZE, and only a few chunks per thread are in
+    flight, so a large iterable is never materialized. Without parallel threads the items are
+    processed inline. `func` must be thread-safe and must not call map_ordered itself.
+    """
+    chunks = itertools.batched(items, COMPUTE_CHUNK_SIZE)
+    if not PARALLEL_THREADS or COMPUTE_THREADS == 1:
+        for chunk in chunks:
+            yield from _apply(func, chunk)
+        return
+    pending: collections.deque[Future[list[R]]] = collections.deque()
+    for chunk in chunks:
+        context = contextvars.copy_context()
+        pending.append(_compute_executor.submit(context.run, _apply, func, chunk))
+        if len(pending) >= 2 * COMPUTE_THREADS:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
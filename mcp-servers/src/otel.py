@@ -1,26 +1,59 @@
-"""OpenTelemetry setup for MCP servers."""
+"""
+OpenTelemetry setup for MCP servers.
+
+In fast-start mode (see `defer_setup`) the servers start without the OpenTelemetry SDK: importing
+the exporters and instrumentations and constructing the providers is left to `complete_setup`,
+which `serve` runs in the background shortly after the server is listening. Tracers and meters
+obtained before that are proxies that start recording when the providers are set.
+"""
 
 import logging
 import os
 
-from opentelemetry import _logs, metrics, trace
-from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
-from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
-from opentelemetry.instrumentation.logging import LoggingInstrumentor
-from opentelemetry.instrumentation.logging.handler import LoggingHandler
-from opentelemetry.instrumentation.starlette import StarletteInstrumentor
-from opentelemetry.sdk._logs import LoggerProvider
-from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 _logger = logging.getLogger(__name__)
 
+# Seconds between listening and a deferred setup, so that the first requests don't compete with it
+SETUP_DELAY = float(os.environ.get("OTEL_SETUP_DELAY", "1"))
+
+_deferred = False
+_completed = False
+
+
+class DeferredInstrumentation:
+    """
+    ASGI app serving `app` uninstrumented until `complete_setup` wraps it in the OpenTelemetry ASGI middleware.
+
+    Requests served before that get no server span. The Starlette instrumentation cannot be used
+    here, since it must be applied before the app starts.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._instrumented: ASGIApp | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await (self._instrumented or self.app)(scope, receive, send)
+
+    def instrument(self) -> None:
+        from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
+
+        self._instrumented = OpenTelemetryMiddleware(self.app)
+
+
+def defer_setup() -> None:
+    """Make `setup_otel` only configure logging; the rest is done by `complete_setup`. Call before importing a server."""
+    global _deferred
+    _deferred = True
+
+
+def is_deferred() -> bool:
+    return _deferred and not _completed
+
 
 def setup_otel() -> None:
-    """Set up OpenTelemetry tracing, logging and metrics."""
+    """Set up OpenTelemetry tracing, logging and metrics, unless deferred to `complete_setup`."""
 
     log_level = os.environ.get("LOGLEVEL", "INFO").upper()
     logging.basicConfig(level=getattr(logging, log_level, logging.INFO))
@@ -28,6 +61,41 @@ def setup_otel() -> None:
     # Set log level for urllib to WARNING to reduce noise (like sending logs to OTLP)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
 
+    if _deferred:
+        return
+    _setup_providers()
+
+    # HTTP instrumentation - creates SERVER spans for incoming requests
+    from opentelemetry.instrumentation.starlette import StarletteInstrumentor
+
+    StarletteInstrumentor().instrument()
+
+
+def complete_setup(app: DeferredInstrumentation | None = None) -> None:
+    """Finish a deferred setup: set up the providers and instrument `app`, which is already serving."""
+    global _completed
+    if not is_deferred():
+        return
+    _setup_providers()
+    if app is not None:
+        app.instrument()
+    _completed = True
+    _logger.info("OpenTelemetry set up")
+
+
+def _setup_providers() -> None:
+    from opentelemetry import _logs, metrics, trace
+    from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.instrumentation.logging import LoggingInstrumentor
+    from opentelemetry.instrumentation.logging.handler import LoggingHandler
+    from opentelemetry.sdk._logs import LoggerProvider
+    from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
     # Traces
     trace_provider = TracerProvider()
     if os.environ.get("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf") == "grpc":
@@ -40,8 +108,7 @@ def setup_otel() -> None:
         trace_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporterHttp()))
     trace.set_tracer_provider(trace_provider)
 
-    # HTTP instrumentation - creates SERVER spans for incoming requests and CLIENT spans for outgoing requests
-    StarletteInstrumentor().instrument()
+    # HTTP instrumentation - creates CLIENT spans for outgoing requests
     HTTPXClientInstrumentor().instrument()
 
     # Logs - inject trace context into log records and export logs via OTLP
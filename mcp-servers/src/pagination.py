@@ -0,0 +1,77 @@
+"""Opaque cursor pagination for list-returning MCP tools."""
+
+import base64
+import binascii
+import hashlib
+import itertools
+import json
+from collections.abc import Iterable
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor is malformed or was issued for a different query."""
+
+
+def _scope_digest(scope: str) -> str:
+    return hashlib.blake2s(scope.encode(), digest_size=6).hexdigest()
+
+
+def encode_cursor(scope: str, position: int, state: str | None = None) -> str:
+    """
+    Encode the position of the last returned item into an opaque cursor.
+
+    The scope identifies the query (tool name and filter arguments), so a cursor can't be
+    replayed against a different query. `state` carries a decision made on the first page, such
+    as a resolved detail level, to the following pages.
+    """
+    fields: dict[str, str | int] = {"q": _scope_digest(scope), "p": position}
+    if state is not None:
+        fields["s"] = state
+    payload = json.dumps(fields, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor_state(cursor: str | None, scope: str) -> tuple[int, str | None]:
+    """Return the position and state encoded in `cursor`, or `(-1, None)` if no cursor is given."""
+    if not cursor:
+        return -1, None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position = payload["p"]
+        query = payload["q"]
+        state = payload.get("s")
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError) as e:
+        raise InvalidCursorError(f"Malformed cursor '{cursor}'") from e
+    if not isinstance(position, int) or not isinstance(state, str | None) or query != _scope_digest(scope):
+        raise InvalidCursorError(f"Cursor '{cursor}' does not belong to this query")
+    return position, state
+
+
+def decode_cursor(cursor: str | None, scope: str) -> int:
+    """Return the position encoded in `cursor`, or -1 to start from the beginning if no cursor is given."""
+    return decode_cursor_state(cursor, scope)[0]
+
+
+def clamp_page_size(limit: int | None) -> int:
+    """Apply the default page size and the server-side cap to a requested limit."""
+    if limit is None or limit <= 0:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate[T](items: Iterable[tuple[int, T]], after: int, page_size: int) -> tuple[list[T], int | None]:
+    """
+    Take one page from `items`, a stream of `(position, item)` pairs in ascending position order.
+
+    Items at or before the `after` position are skipped. The stream is consumed only up to the
+    first item past the page, so callers can pass lazy generators and stop scanning early.
+    Returns the page and the position to resume from, or None if there are no further items.
+    """
+    remaining = itertools.dropwhile(lambda entry: entry[0] <= after, items)
+    entries = list(itertools.islice(remaining, page_size + 1))
+    page = [item for _, item in entries[:page_size]]
+    next_position = entries[page_size - 1][0] if len(entries) > page_size else None
+    return page, next_position
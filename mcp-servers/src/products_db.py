@@ -1,5 +1,17 @@
+import dataclasses
+import os
+import threading
+import types
+from collections.abc import Mapping, MutableMapping
+from typing import Self
+
+import datafile
+import interval_index
+import quotes
+import records
+
 # cust001 & 002 use extended formatting - 003 to 032 have their formatting collapsed
-_mock_database = {
+_mock_database: dict[str, dict] = {
     "LIFE001": {
         "type": "life insurance",
         "name": "SecureLife Premium",
@@ -773,13 +785,148 @@ _mock_database = {
 }
 
 
-def get_all_products() -> dict:
-    return _mock_database
+def summarize_product(product_id: str, product_data: dict) -> dict:
+    """Extract a slim product summary with only the essential fields."""
+    return {
+        "product_id": product_id,
+        "name": product_data.get("name"),
+        "type": product_data.get("type"),
+        "description": product_data.get("description"),
+        "target_segments": product_data.get("target_segments"),
+    }
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _Catalog:
+    """
+    Everything derived from the product records, built together and published as one snapshot.
+
+    put_product swaps in a complete new snapshot, so readers that fetch the snapshot once never
+    see indexes of different catalog versions and need no lock.
+    """
+
+    version: int
+    product_ids: tuple[str, ...]
+    # The product records as of this version, shared between readers and must not be mutated
+    products: Mapping[str, dict]
+    # Summaries are shared between responses and must not be mutated
+    summaries: dict[str, dict]
+    segment_index: dict[str, tuple[str, ...]]
+    type_index: dict[str, tuple[str, ...]]
+    age_index: interval_index.IntervalIndex
+    coverage_index: interval_index.IntervalIndex
+    rate_table: quotes.RateTable
+
+    @classmethod
+    def build(cls, products: Mapping[str, dict], version: int) -> Self:
+        """Build the summaries, the segment and type indexes and the eligibility indexes, all in catalog order."""
+        # Decoded once, since the stored records convert to a fresh dict on every access
+        products = dict(products.items())
+        summaries: dict[str, dict] = {}
+        segment_index: dict[str, list[str]] = {}
+        type_index: dict[str, list[str]] = {}
+        age_ranges = []
+        coverage_ranges = []
+        for product_id, data in products.items():
+            summaries[product_id] = summarize_product(product_id, data)
+            for segment in dict.fromkeys(data.get("target_segments", ())):
+                segment_index.setdefault(segment, []).append(product_id)
+            if "type" in data:
+                type_index.setdefault(data["type"], []).append(product_id)
+            age_ranges.append((product_id, *interval_index.bounds(data.get("age_range", {}), "min", "max")))
+            coverage_ranges.append((product_id, *interval_index.bounds(data, "min_coverage", "max_coverage")))
+        return cls(
+            version=version,
+            product_ids=tuple(products),
+            products=types.MappingProxyType(products),
+            summaries=summaries,
+            segment_index={segment: tuple(ids) for segment, ids in segment_index.items()},
+            type_index={product_type: tuple(ids) for product_type, ids in type_index.items()},
+            age_index=interval_index.IntervalIndex(age_ranges),
+            coverage_index=interval_index.IntervalIndex(coverage_ranges),
+            rate_table=quotes.RateTable.from_products(products.items()),
+        )
+
 
+def _load_products() -> MutableMapping[str, dict]:
+    """Map the data file at PRODUCTS_DB_PATH if set, otherwise serve the built-in mock catalog."""
+    path = os.environ.get("PRODUCTS_DB_PATH")
+    if path:
+        return datafile.MappedRecords(path)
+    return records.CompactRecords(records.Product, _mock_database)
 
-def get_product(product_id: str) -> object | None:
-    return _mock_database.get(product_id)
+
+_products = _load_products()
+# Version 0 is the catalog as loaded; every put_product publishes the next version
+_catalog = _Catalog.build(_products, version=0)
+# Serializes catalog writers; readers only read the current `_catalog`
+_write_lock = threading.Lock()
+
+
+def get_all_products() -> Mapping[str, dict]:
+    """
+    Return a read-only snapshot of the current catalog, which put_product never changes.
+
+    The product dicts are shared by all readers and must not be mutated; get_product returns a copy.
+    """
+    return _catalog.products
+
+
+def get_product(product_id: str) -> dict | None:
+    return _products.get(product_id)
 
 
 def get_database_size() -> int:
-    return len(_mock_database)
+    return len(_catalog.product_ids)
+
+
+def get_product_ids() -> tuple[str, ...]:
+    return _catalog.product_ids
+
+
+def get_product_ids_by_segment(segment: str) -> tuple[str, ...]:
+    return _catalog.segment_index.get(segment, ())
+
+
+def get_product_types() -> tuple[str, ...]:
+    """Return the catalog's product types in catalog order."""
+    return tuple(_catalog.type_index)
+
+
+def get_product_ids_by_type(product_type: str) -> tuple[str, ...]:
+    return _catalog.type_index.get(product_type, ())
+
+
+def get_eligible_product_ids(age: float | None = None, coverage_amount: float | None = None) -> tuple[str, ...]:
+    """
+    Return the IDs of the products whose age range contains `age` and whose coverage bounds contain
+    `coverage_amount`, in catalog order. Products without a range accept any value; a None
+    argument skips that check, and an age of NaN (unknown) only matches products without an age range.
+    """
+    catalog = _catalog
+    product_ids = catalog.product_ids if age is None else catalog.age_index.stab(age)
+    if coverage_amount is not None:
+        covering = set(catalog.coverage_index.stab(coverage_amount))
+        product_ids = tuple(product_id for product_id in product_ids if product_id in covering)
+    return product_ids
+
+
+def get_rate_table() -> quotes.RateTable:
+    """Return the base premium rates and eligibility bounds of all rated products."""
+    return _catalog.rate_table
+
+
+def get_product_summary(product_id: str) -> dict | None:
+    return _catalog.summaries.get(product_id)
+
+
+def get_catalog_version() -> int:
+    """Return the version of the current catalog, incremented on every change so derived caches know when to refresh."""
+    return _catalog.version
+
+
+def put_product(product_id: str, product_data: dict) -> None:
+    global _catalog
+    with _write_lock:
+        _products[product_id] = product_data
+        _catalog = _Catalog.build(_products, _catalog.version + 1)
@@ -0,0 +1,73 @@
+"""Vectorized monthly premium quotes from the catalog's base premium rates."""
+
+import dataclasses
+from collections.abc import Iterable, Sequence
+from typing import Self
+
+import numpy as np
+
+# Coverage amounts quoted when the caller does not ask for specific ones
+DEFAULT_COVERAGE_LEVELS = (50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+
+@dataclasses.dataclass(frozen=True)
+class RateTable:
+    """The rated products of the catalog as parallel arrays, one entry per product."""
+
+    product_ids: tuple[str, ...]
+    # Monthly premium per 1000 of coverage
+    rates: np.ndarray
+    min_age: np.ndarray
+    max_age: np.ndarray
+    min_coverage: np.ndarray
+    max_coverage: np.ndarray
+
+    @classmethod
+    def from_products(cls, products: Iterable[tuple[str, dict]]) -> Self:
+        """Collect the products defining a base_premium_rate; missing bounds are unbounded."""
+        rated = [(product_id, data) for product_id, data in products if data.get("base_premium_rate") is not None]
+
+        def column(values: Iterable[float | None], default: float) -> np.ndarray:
+            return np.array([default if value is None else value for value in values], dtype=float)
+
+        return cls(
+            product_ids=tuple(product_id for product_id, _ in rated),
+            rates=column((data["base_premium_rate"] for _, data in rated), np.nan),
+            min_age=column((data.get("age_range", {}).get("min") for _, data in rated), -np.inf),
+            max_age=column((data.get("age_range", {}).get("max") for _, data in rated), np.inf),
+            min_coverage=column((data.get("min_coverage") for _, data in rated), -np.inf),
+            max_coverage=column((data.get("max_coverage") for _, data in rated), np.inf),
+        )
+
+    def select(self, product_ids: Sequence[str]) -> Self:
+        """Return the table restricted to the given products, in the given order; unrated products are skipped."""
+        positions = {product_id: i for i, product_id in enumerate(self.product_ids)}
+        rows = [positions[product_id] for product_id in product_ids if product_id in positions]
+        return type(self)(
+            product_ids=tuple(self.product_ids[row] for row in rows),
+            rates=self.rates[rows],
+            min_age=self.min_age[rows],
+            max_age=self.max_age[rows],
+            min_coverage=self.min_coverage[rows],
+            max_coverage=self.max_coverage[rows],
+        )
+
+
+def quote(rate_table: RateTable, ages: np.ndarray, coverage_levels: np.ndarray) -> np.ndarray:
+    """
+    Compute monthly premiums for every customer, product and coverage level at once.
+
+    Returns an array of shape (customers, products, coverage levels) holding the premium rounded to
+    cents, or NaN where the customer's age or the coverage level is outside the product's bounds.
+    Customers with an unknown (NaN) age are not eligible for any age-restricted product.
+    """
+    ages = ages[:, np.newaxis]
+    age_eligible = (ages >= rate_table.min_age) & (ages <= rate_table.max_age)
+    age_eligible |= np.isinf(rate_table.min_age) & np.isinf(rate_table.max_age)
+    levels = coverage_levels[np.newaxis, :]
+    coverage_eligible = (levels >= rate_table.min_coverage[:, np.newaxis]) & (
+        levels <= rate_table.max_coverage[:, np.newaxis]
+    )
+    premiums = np.round(levels / 1000 * rate_table.rates[:, np.newaxis], 2)
+    eligible = age_eligible[:, :, np.newaxis] & coverage_eligible[np.newaxis, :, :]
+    return np.where(eligible, premiums[np.newaxis, :, :], np.nan)
@@ -0,0 +1,136 @@
+"""Next-best-offer scoring of catalog products for a single customer."""
+
+import dataclasses
+import re
+from collections.abc import Iterable
+
+import coverage
+
+# Number of recommendations materialized per customer
+TOP_K = 5
+
+# Weights of the scoring signals
+SEGMENT_WEIGHT = 3.0
+LIFE_SITUATION_WEIGHT = 1.0
+COVERAGE_GAP_WEIGHT = 2.0
+INTEREST_WEIGHT = 2.0
+DECLINED_WEIGHT = -3.0
+AFFORDABILITY_WEIGHT = 1.0
+
+# Share of the monthly income below which a product's entry premium counts as affordable, and above
+# which it counts as a burden
+AFFORDABLE_INCOME_SHARE = 0.02
+BURDEN_INCOME_SHARE = 0.05
+
+# Phrases marking a communication history entry as a rejection of the products it mentions
+_DECLINE_PHRASES = ("another provider", "already has", "not interested", "declined", "cancel")
+_INSURANCE_MENTION = re.compile(r"([a-zäöüß]+ )?([a-zäöüß]+) insurance")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Recommendation:
+    product_id: str
+    score: float
+    reasons: tuple[str, ...]
+
+
+def life_situation_segments(customer: dict) -> set[str]:
+    """Derive the catalog target segments implied by a customer's personal situation."""
+    personal_info = customer.get("personal_info", {})
+    age = personal_info.get("age")
+    income = personal_info.get("annual_income")
+    segments = set()
+    if personal_info.get("children") or personal_info.get("marital_status") == "married":
+        segments.add("families")
+    if personal_info.get("home_ownership") == "owner":
+        segments.add("homeowners")
+    if isinstance(income, int | float) and income >= 90_000:
+        segments.add("high_income")
+    if isinstance(age, int | float) and age >= 60:
+        segments.add("seniors")
+    if any(policy.get("vehicle") for policy in customer.get("existing_policies", [])):
+        segments.add("all_drivers")
+    return segments
+
+
+def mentioned_product_types(text: str) -> set[str]:
+    """Return the catalog product types mentioned as "<type> insurance" in a free text."""
+    mentioned = set()
+    for match in _INSURANCE_MENTION.finditer(text.casefold()):
+        qualifier, name = match.groups()
+        # "personal liability insurance" is mentioned as well as "life insurance"
+        if qualifier:
+            mentioned.add(coverage.product_type_of_policy(f"{qualifier}{name} insurance"))
+        mentioned.add(coverage.product_type_of_policy(f"{name} insurance"))
+    return mentioned
+
+
+def communication_signals(customer: dict) -> tuple[set[str], set[str]]:
+    """Return the product types a customer showed interest in and the ones they declined, newest entries winning."""
+    interested: set[str] = set()
+    declined: set[str] = set()
+    entries = sorted(customer.get("communication_history", []), key=lambda entry: entry.get("date", ""))
+    for entry in entries:
+        text = f"{entry.get('subject', '')} {entry.get('notes', '')}"
+        product_types = mentioned_product_types(text)
+        if any(phrase in text.casefold() for phrase in _DECLINE_PHRASES):
+            declined |= product_types
+            interested -= product_types
+        else:
+            interested |= product_types
+            declined -= product_types
+    return interested, declined
+
+
+def rank(customer: dict, eligible_products: Iterable[tuple[str, dict]], top_k: int = TOP_K) -> list[Recommendation]:
+    """
+    Score the products a customer is eligible for and return the `top_k` best, highest score first.
+
+    A product scores for every target segment shared with the customer, for filling a coverage
+    gap, for a type the customer asked about and for an entry premium that is small relative to
+    the customer's income. Types the customer declined or holds with another provider and
+    unaffordable premiums lower the score. Products without a positive score are not recommended.
+    """
+    personal_info = customer.get("personal_info", {})
+    held_types = set(coverage.held_product_types(customer))
+    derived_segments = life_situation_segments(customer)
+    interested, declined = communication_signals(customer)
+    income = personal_info.get("annual_income")
+    monthly_income = income / 12 if isinstance(income, int | float) and income > 0 else None
+
+    ranked = []
+    for product_id, product in eligible_products:
+        score = 0.0
+        reasons = []
+        product_type = product.get("type")
+        target_segments = product.get("target_segments", ())
+        if customer.get("customer_segment") in target_segments:
+            score += SEGMENT_WEIGHT
+            reasons.append(f"targets the customer's segment '{customer['customer_segment']}'")
+        for segment in sorted(derived_segments.intersection(target_segments)):
+            score += LIFE_SITUATION_WEIGHT
+            reasons.append(f"fits the customer's life situation ({segment})")
+        if product_type not in held_types:
+            score += COVERAGE_GAP_WEIGHT
+            reasons.append(f"closes a coverage gap ({product_type})")
+        if product_type in interested:
+            score += INTEREST_WEIGHT
+            reasons.append(f"customer asked about {product_type}")
+        if product_type in declined:
+            score += DECLINED_WEIGHT
+            reasons.append(f"customer declined or has {product_type} elsewhere")
+        rate, min_coverage = product.get("base_premium_rate"), product.get("min_coverage")
+        if monthly_income is not None and rate is not None and min_coverage is not None:
+            entry_premium = min_coverage / 1000 * rate
+            if entry_premium <= AFFORDABLE_INCOME_SHARE * monthly_income:
+                score += AFFORDABILITY_WEIGHT
+                reasons.append("affordable entry premium")
+            elif entry_premium > BURDEN_INCOME_SHARE * monthly_income:
+                score -= AFFORDABILITY_WEIGHT
+                reasons.append("entry premium is high for the customer's income")
+        if score > 0:
+            ranked.append(Recommendation(product_id, score, tuple(reasons)))
+
+    # Stable sort keeps catalog order between equally scored products
+    ranked.sort(key=lambda recommendation: recommendation.score, reverse=True)
+    return ranked[:top_k]
@@ -0,0 +1,227 @@
+"""
+Compact in-memory record classes for customers and products.
+
+Storing every customer as a tree of plain dicts costs a hash table per record and per nested
+policy or communication entry. The slotted dataclasses below store the same data as fixed
+attribute slots, with categorical values interned so that equal strings are shared. Keys
+that are not modelled (product-specific extras such as a policy's "vehicle") are kept in a
+small `extra` dict. Records convert back to plain dicts only at the response boundary;
+None-valued fields are treated as absent and omitted from the dict.
+"""
+
+import copy
+import dataclasses
+import sys
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from typing import Any, ClassVar, Self
+
+import history
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _copy(value: Any) -> Any:
+    """Copy nested containers, so that records share no mutable state with the dicts they are converted from and to."""
+    return copy.deepcopy(value) if isinstance(value, dict | list) else value
+
+
+_field_names_by_type: dict[type, tuple[str, ...]] = {}
+
+
+def _field_names(record_type: type) -> tuple[str, ...]:
+    names = _field_names_by_type.get(record_type)
+    if names is None:
+        names = tuple(field.name for field in dataclasses.fields(record_type) if field.name != "extra")
+        _field_names_by_type[record_type] = names
+    return names
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _Record:
+    extra: dict | None = None
+
+    # Fields holding values from a small vocabulary, interned on load
+    _categorical: ClassVar[frozenset[str]] = frozenset()
+    # Fields holding nested records or sequences, converted by the subclass
+    _nested: ClassVar[frozenset[str]] = frozenset()
+
+    @classmethod
+    def _split(cls, data: Mapping[str, Any]) -> tuple[dict[str, Any], dict | None]:
+        fields = _field_names(cls)
+        known = {
+            key: _intern(value) if key in cls._categorical else _copy(value)
+            for key, value in data.items()
+            if key in fields and key not in cls._nested
+        }
+        extra = {key: _copy(value) for key, value in data.items() if key not in fields}
+        return known, extra or None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Self:
+        known, extra = cls._split(data)
+        return cls(**known, extra=extra)
+
+    def to_dict(self) -> dict:
+        result = {}
+        for name in _field_names(type(self)):
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = _copy(value)
+        if self.extra:
+            result.update((key, _copy(value)) for key, value in self.extra.items())
+        return result
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class PersonalInfo(_Record):
+    name: str | None = None
+    birth_date: str | None = None
+    age: int | None = None
+    address: str | None = None
+    phone: str | None = None
+    email: str | None = None
+    occupation: str | None = None
+    annual_income: int | None = None
+    marital_status: str | None = None
+    children: int | None = None
+    home_ownership: str | None = None
+
+    _categorical = frozenset({"marital_status", "home_ownership"})
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Policy(_Record):
+    policy_id: str | None = None
+    product_type: str | None = None
+    premium_amount: float | None = None
+    coverage_amount: float | None = None
+    start_date: str | None = None
+    status: str | None = None
+    type: str | None = None
+
+    _categorical = frozenset({"product_type", "status", "type"})
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Communication(_Record):
+    date: str | None = None
+    type: str | None = None
+    subject: str | None = None
+    notes: str | None = None
+
+    _categorical = frozenset({"type"})
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Customer(_Record):
+    customer_id: str | None = None
+    personal_info: PersonalInfo | None = None
+    existing_policies: tuple[Policy, ...] | None = None
+    communication_history: tuple[Communication, ...] | None = None
+    risk_profile: str | None = None
+    customer_segment: str | None = None
+    lifetime_value: float | None = None
+
+    _categorical = frozenset({"risk_profile", "customer_segment"})
+    _nested = frozenset({"personal_info", "existing_policies", "communication_history"})
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Self:
+        known, extra = cls._split(data)
+        if "personal_info" in data:
+            known["personal_info"] = PersonalInfo.from_dict(data["personal_info"])
+        if "existing_policies" in data:
+            known["existing_policies"] = tuple(Policy.from_dict(policy) for policy in data["existing_policies"])
+        if "communication_history" in data:
+            # Stored newest first, so that date windows can be bisected (see `history`)
+            known["communication_history"] = tuple(
+                history.newest_first(
+                    (Communication.from_dict(entry) for entry in data["communication_history"]),
+                    lambda entry: entry.date,
+                )
+            )
+        return cls(**known, extra=extra)
+
+    def to_dict(self) -> dict:
+        result = _Record.to_dict(self)
+        if self.personal_info is not None:
+            result["personal_info"] = self.personal_info.to_dict()
+        if self.existing_policies is not None:
+            result["existing_policies"] = [policy.to_dict() for policy in self.existing_policies]
+        if self.communication_history is not None:
+            result["communication_history"] = [entry.to_dict() for entry in self.communication_history]
+        return result
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Product(_Record):
+    type: str | None = None
+    name: str | None = None
+    description: str | None = None
+    min_coverage: float | None = None
+    max_coverage: float | None = None
+    age_range: dict | None = None
+    base_premium_rate: float | None = None
+    target_segments: tuple[str, ...] | None = None
+    features: tuple[str, ...] | None = None
+
+    _categorical = frozenset({"type"})
+    _nested = frozenset({"target_segments", "features"})
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Self:
+        known, extra = cls._split(data)
+        if "target_segments" in data:
+            known["target_segments"] = tuple(sys.intern(segment) for segment in data["target_segments"])
+        if "features" in data:
+            known["features"] = tuple(data["features"])
+        return cls(**known, extra=extra)
+
+    def to_dict(self) -> dict:
+        result = _Record.to_dict(self)
+        for name in ("target_segments", "features"):
+            if name in result:
+                result[name] = list(result[name])
+        return result
+
+
+class CompactRecords[R: _Record](MutableMapping[str, dict]):
+    """
+    A dict-of-dicts lookalike that stores each value as a compact record.
+
+    Values are converted from dicts on assignment and back to fresh dicts on access, so callers
+    may mutate what they read without affecting the stored record.
+    """
+
+    def __init__(self, record_type: type[R], records: Mapping[str, Mapping[str, Any]] | None = None) -> None:
+        self.record_type = record_type
+        self._records: dict[str, R] = {}
+        for key, value in (records or {}).items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> dict:
+        return self._records[key].to_dict()
+
+    def __setitem__(self, key: str, value: Mapping[str, Any]) -> None:
+        self._records[key] = self.record_type.from_dict(value)
+
+    def __delitem__(self, key: str) -> None:
+        del self._records[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(self, key: str) -> R:
+        """Return the stored record itself, without converting it to a dict."""
+        return self._records[key]
+
+    def iter_records(self) -> Iterable[tuple[str, R]]:
+        return self._records.items()
@@ -0,0 +1,178 @@
+"""
+Serve an MCP server over streamable HTTP, optionally with several pre-forked worker processes.
+
+With a single worker this is equivalent to `fastmcp run --transport streamable-http`. With more
+workers, a supervisor process imports the server module once, so the customer and product data
+is loaded and all lazily built indexes are built before forking. The heap is then frozen
+(`gc.freeze`) so that garbage collection in the workers doesn't write to the shared pages.
+Workers share that image copy-on-write, and data files mapped by the `mmap` backends through the
+page cache. Reference count updates, cached summaries and writes still copy the pages they touch
+into each worker, so only the mapped files are guaranteed to stay shared.
+
+Workers accept connections on one listening socket inherited from the supervisor, or with
+`--reuse-port` on their own SO_REUSEPORT sockets, letting the kernel balance connections. They
+run stateless HTTP sessions, since consecutive requests of a client may reach different workers.
+The supervisor replaces workers that exit and forwards SIGTERM and SIGINT to all of them. Workers
+that exit soon after starting are replaced with an exponentially growing delay, and after
+MAX_CRASHES such exits in a row the supervisor stops the others and exits with an error.
+
+Servers may define `warm_up`, which every serving process runs in a background thread once its
+socket is listening, to build indexes that would otherwise be built by the first request needing them.
+
+With `--fast-start` the servers are imported without setting up OpenTelemetry. Each serving
+process completes the setup in a background thread shortly after its socket is listening (see
+`otel`), so the first requests don't wait for the exporters and instrumentations to load.
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import types
+
+import uvicorn
+
+import otel
+
+_logger = logging.getLogger(__name__)
+
+# Pending connection queue of the listening socket
+LISTEN_BACKLOG = 2048
+# Workers exiting within this many seconds of being started count as crashed
+MIN_WORKER_LIFETIME = 10.0
+# Delay before replacing a crashed worker, doubled for every further crash in a row up to the maximum
+RESPAWN_DELAY = 0.5
+MAX_RESPAWN_DELAY = 30.0
+# Crashes in a row after which the supervisor gives up
+MAX_CRASHES = 10
+
+
+def _listen(host: str, port: int, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    return sock
+
+
+def _start_warm_up(server: types.ModuleType) -> None:
+    warm_up = getattr(server, "warm_up", None)
+    if warm_up is not None:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+def _serve_worker(server: types.ModuleType, sock: socket.socket, stateless_http: bool = True) -> None:
+    _start_warm_up(server)
+    app = server.mcp.http_app(transport="streamable-http", stateless_http=stateless_http)
+    if otel.is_deferred():
+        app = otel.DeferredInstrumentation(app)
+        setup = threading.Timer(otel.SETUP_DELAY, otel.complete_setup, args=(app,))
+        setup.daemon = True
+        setup.start()
+    uvicorn.Server(uvicorn.Config(app, log_config=None)).run(sockets=[sock])
+
+
+def _fork_worker(server: types.ModuleType, host: str, port: int, shared_socket: socket.socket | None) -> int:
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            _serve_worker(server, shared_socket or _listen(host, port, reuse_port=True))
+        except BaseException:
+            _logger.exception("Worker %d failed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def serve_workers(server: types.ModuleType, host: str, port: int, workers: int, reuse_port: bool) -> None:
+    """Preload `server`, fork `workers` worker processes serving it and supervise them until signalled."""
+    preload = getattr(server, "preload", None)
+    if preload is not None:
+        preload()
+    gc.collect()
+    gc.freeze()
+
+    shared_socket = None if reuse_port else _listen(host, port, reuse_port=False)
+    # Start time of every worker by PID
+    children = {_fork_worker(server, host, port, shared_socket): time.monotonic() for _ in range(workers)}
+    stopping = False
+    crashes = 0
+
+    def stop(signum: int, frame: object) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    _logger.info("Serving on %s:%d with %d workers", host, port, workers)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started_at = children.pop(pid)
+        if stopping:
+            continue
+        exit_code = os.waitstatus_to_exitcode(status)
+        crashes = crashes + 1 if time.monotonic() - started_at < MIN_WORKER_LIFETIME else 0
+        if crashes >= MAX_CRASHES:
+            _logger.error("Worker %d exited with status %d, %d crashes in a row, stopping", pid, exit_code, crashes)
+            stop(signal.SIGTERM, None)
+            continue
+        delay = min(RESPAWN_DELAY * 2 ** (crashes - 1), MAX_RESPAWN_DELAY) if crashes else 0
+        _logger.warning("Worker %d exited with status %d, replacing it in %.1fs", pid, exit_code, delay)
+        time.sleep(delay)
+        if not stopping:
+            children[_fork_worker(server, host, port, shared_socket)] = time.monotonic()
+    if crashes >= MAX_CRASHES:
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("server", help="Server module or file, e.g. customer_crm.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("MCP_WORKERS", "1")),
+        help="Number of worker processes; 0 uses one per CPU (default: $MCP_WORKERS or 1)",
+    )
+    parser.add_argument("--reuse-port", action="store_true", help="Give every worker its own SO_REUSEPORT socket")
+    parser.add_argument(
+        "--fast-start",
+        action="store_true",
+        default=os.environ.get("MCP_FAST_START", "").lower() in ("1", "true"),
+        help="Set up OpenTelemetry in the background once listening (default: $MCP_FAST_START)",
+    )
+    args = parser.parse_args()
+
+    if args.fast_start:
+        otel.defer_setup()
+    server = importlib.import_module(args.server.removesuffix(".py"))
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    if workers == 1 and args.fast_start:
+        _serve_worker(server, _listen(args.host, args.port, reuse_port=False), stateless_http=False)
+    elif workers == 1:
+        # Starts building right away; the server listens within milliseconds, long before the build is done
+        _start_warm_up(server)
+        server.mcp.run(transport="streamable-http", host=args.host, port=args.port)
+    else:
+        serve_workers(server, args.host, args.port, workers, args.reuse_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Unicode folding of names and free text into ASCII-ish search keys."""
+
+import unicodedata
+
+# Transliterations applied after casefolding, before accents are stripped. Umlauts follow German
+# spelling conventions ("Müller" -> "mueller"), so both spellings brokers type fold to the same key.
+_TRANSLITERATIONS = str.maketrans(
+    {
+        "ä": "ae",
+        "ö": "oe",
+        "ü": "ue",
+        "æ": "ae",
+        "œ": "oe",
+        "ø": "o",
+        "å": "aa",
+        "ł": "l",
+        "đ": "d",
+        "ð": "d",
+        "þ": "th",
+    }
+)
+
+
+def fold(text: str) -> str:
+    """
+    Fold `text` into a case- and accent-insensitive search key.
+
+    Casefolding also expands "ß" to "ss". Umlauts are transliterated and any remaining combining
+    accents are stripped, e.g. "Straße" -> "strasse", "Müller" -> "mueller", "Zoë" -> "zoe".
+    """
+    text = unicodedata.normalize("NFC", text).casefold().translate(_TRANSLITERATIONS)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
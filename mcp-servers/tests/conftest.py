@@ -0,0 +1,22 @@
+import importlib
+import sys
+
+import pytest
+
+import otel
+
+# Serve the tools without exporting telemetry to a collector that isn't there
+otel.defer_setup()
+
+# Modules holding data or caches derived from it, in dependency order
+DATA_MODULES = ("products_db", "customer_db", "insurance_products", "customer_crm")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_data():
+    """Reload the data modules imported so far after every test, so that its writes don't leak into other tests."""
+    yield
+    for name in DATA_MODULES:
+        module = sys.modules.get(name)
+        if module is not None:
+            importlib.reload(module)
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+import customer_columns
+import customer_db
+import products_db
+
+CATALOG_TYPES = ("life insurance", "auto insurance", "home insurance")
+
+
+def customer(*policy_types: str, age: int = 40) -> dict:
+    return {
+        "personal_info": {"age": age},
+        "existing_policies": [{"product_type": policy_type} for policy_type in policy_types],
+    }
+
+
+def test_types_outside_the_catalog_never_run_out_of_bits():
+    columns = customer_columns.CustomerColumns(CATALOG_TYPES)
+    for number in range(customer_columns.MAX_PRODUCT_TYPES + 10):
+        columns.put(f"cust{number}", customer("Car Insurance", f"Exotic Insurance {number}"))
+
+    assert columns.held_product_types("cust70") == ["auto insurance", "exotic insurance 70"]
+    assert columns.missing_product_types("cust70", ["auto insurance", "exotic insurance 70", "life insurance"]) == [
+        "life insurance"
+    ]
+    assert list(columns.matching_rows(held_types=["auto insurance", "exotic insurance 3"])) == [3]
+    assert len(columns.matching_rows(missing_types=["exotic insurance 3"])) == len(columns) - 1
+
+
+def test_rewriting_a_row_replaces_its_types():
+    columns = customer_columns.CustomerColumns(CATALOG_TYPES)
+    columns.put("cust0", customer("life insurance", "pet insurance"))
+    columns.put("cust0", customer("home insurance"))
+
+    assert columns.held_product_types("cust0") == ["home insurance"]
+    assert list(columns.matching_rows(held_types=["pet insurance"])) == []
+
+
+def test_put_customer_with_many_unknown_types_keeps_filters_working():
+    customer_db.filter_customer_ids(held_types=["life insurance"])
+    for number in range(customer_columns.MAX_PRODUCT_TYPES + 1):
+        customer_db.put_customer({"customer_id": f"test-types-{number}", **customer(f"Rare Insurance {number}")})
+
+    total, matches = customer_db.filter_customer_ids(held_types=["rare insurance 64"])
+    assert (total, [customer_id for _, customer_id in matches]) == (1, ["test-types-64"])
+    held, missing = customer_db.get_coverage("test-types-64")
+    assert held == ["rare insurance 64"]
+    assert missing == list(products_db.get_product_types())
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"personal_info": {"name": "No ID"}},
+        {"customer_id": "test-bad", "personal_info": "Anna"},
+        {"customer_id": "test-bad", "personal_info": {"name": 42}},
+        {"customer_id": "test-bad", "existing_policies": ["life"]},
+        {"customer_id": "test-bad", "communication_history": [{"date": 20240101}]},
+    ],
+)
+def test_put_customer_rejects_malformed_records_before_writing(record):
+    size = customer_db.get_database_size()
+    with pytest.raises(TypeError):
+        customer_db.put_customer(record)
+
+    assert customer_db.get_customer("test-bad") is None
+    assert customer_db.get_database_size() == size
+
+
+def test_readers_never_see_a_half_rewritten_row(monkeypatch):
+    columns = customer_columns.CustomerColumns(CATALOG_TYPES)
+    columns.put("cust0", customer("life insurance", age=30))
+    writing, finish = threading.Event(), threading.Event()
+    write_row = columns._write_row
+
+    def slow_write_row(*args):
+        writing.set()
+        finish.wait(5)
+        write_row(*args)
+
+    monkeypatch.setattr(columns, "_write_row", slow_write_row)
+    writer = threading.Thread(target=columns.put, args=("cust0", customer("home insurance", age=60)))
+    writer.start()
+    writing.wait()
+    results = []
+    reader = threading.Thread(
+        target=lambda: results.append(list(columns.matching_rows({"age": (50, None)}, held_types=["home insurance"])))
+    )
+    reader.start()
+    reader.join(0.05)
+
+    assert reader.is_alive()
+    finish.set()
+    writer.join()
+    reader.join()
+    assert results == [[0]]
@@ -0,0 +1,154 @@
+import asyncio
+
+import customer_crm
+import customer_db
+import products_db
+
+
+def search(name: str, **kwargs) -> dict:
+    return asyncio.run(customer_crm.search_customer_by_name(name, **kwargs))
+
+
+def test_search_returns_summaries_for_several_matches_and_the_full_record_for_one():
+    several = search("anna")
+    single = search("anna mueller")
+
+    assert several["detail"] == "summary"
+    assert "existing_policies" not in several["customers"][0]
+    assert single["detail"] == "full"
+    assert "existing_policies" in single["customers"][0]
+
+
+def test_search_keeps_the_detail_level_of_the_first_page():
+    first_page = search("anna", limit=2)
+    last_page = search("anna", limit=2, cursor=first_page["next_cursor"])
+
+    # The last page holds a single customer, but is not switched to full records
+    assert first_page["detail"] == "summary"
+    assert last_page["count"] == 1
+    assert last_page["detail"] == "summary"
+    assert last_page["next_cursor"] is None
+
+
+def test_search_selects_fields():
+    ids_only = search("anna", fields=["customer_id"])
+    selected = search("anna", fields=["email", "customer_id"])
+
+    assert ids_only["customers"] == [{"customer_id": "cust001"}, {"customer_id": "cust010"}, {"customer_id": "cust024"}]
+    assert set(selected["customers"][0]) == {"customer_id", "email"}
+    assert search("anna", fields=["salary"])["error_code"] == "INVALID_FIELDS"
+
+
+def test_communication_history_search_returns_the_matching_entries():
+    customer_db.put_customer(
+        {
+            "customer_id": "test-history-search",
+            "personal_info": {"name": "Greta Sommer"},
+            "communication_history": [
+                {"date": "2024-01-10", "subject": "Quote", "notes": "Asked about a sailing boat policy"},
+                {"date": "2024-06-02", "subject": "Call", "notes": "Moved to a new flat"},
+            ],
+        }
+    )
+
+    result = asyncio.run(customer_crm.search_communication_history("sailing"))
+    customer = next(customer for customer in result["customers"] if customer["customer_id"] == "test-history-search")
+
+    assert customer["name"] == "Greta Sommer"
+    assert [entry["date"] for entry in customer["matching_entries"]] == ["2024-01-10"]
+
+
+def test_batch_lookup_reports_missing_customers_per_id():
+    result = asyncio.run(customer_crm.get_customers_crm_data(["cust002", " cust001", "missing", "cust002", ""]))
+
+    assert list(result["customers"]) == ["cust002", "cust001"]
+    assert result["customers"]["cust001"] == customer_db.get_customer("cust001")
+    assert result["errors"] == {
+        "": {"error_code": "MISSING_CUSTOMER_ID", "message": "Customer ID is required."},
+        "missing": {"error_code": "CUSTOMER_NOT_FOUND", "message": "Customer with ID 'missing' not found"},
+    }
+    assert (result["found_count"], result["error_count"]) == (2, 2)
+
+
+def test_batch_lookup_rejects_too_many_ids():
+    customer_ids = [f"cust{number}" for number in range(customer_crm.MAX_BATCH_SIZE + 1)]
+
+    result = asyncio.run(customer_crm.get_customers_crm_data(customer_ids))
+
+    assert result["error_code"] == "TOO_MANY_CUSTOMER_IDS"
+
+
+def test_filter_matches_a_scan_of_the_records():
+    result = asyncio.run(
+        customer_crm.filter_customers(min_age=30, max_age=50, customer_segment=["families", "young_professionals"])
+    )
+
+    assert [customer["customer_id"] for customer in result["customers"]] == [
+        customer_id
+        for customer_id, customer in customer_db.iter_customers()
+        if 30 <= customer["personal_info"].get("age", -1) <= 50
+        and customer.get("customer_segment") in ("families", "young_professionals")
+    ]
+    assert result["match_count"] == result["count"]
+
+
+def test_filter_by_missing_product_types_pages_through_the_matches():
+    first_page = asyncio.run(customer_crm.filter_customers(missing_product_types=["life insurance"], limit=2))
+    rest = asyncio.run(
+        customer_crm.filter_customers(
+            missing_product_types=["life insurance"], limit=100, cursor=first_page["next_cursor"]
+        )
+    )
+
+    customer_ids = [customer["customer_id"] for customer in first_page["customers"] + rest["customers"]]
+    assert len(customer_ids) == first_page["match_count"]
+    assert all("life insurance" in customer_db.get_coverage(customer_id)[1] for customer_id in customer_ids)
+
+
+def test_filter_rejects_unknown_values():
+    result = asyncio.run(customer_crm.filter_customers(risk_profile=["reckless"]))
+
+    assert result["error_code"] == "INVALID_FILTER"
+    assert "reckless" not in result["allowed_values"]
+
+
+def test_eligible_products_of_missing_types():
+    _, missing_types = customer_db.get_coverage("cust001")
+
+    result = asyncio.run(customer_crm.get_eligible_products("cust001", missing_types_only=True))
+
+    assert result["count"] > 0
+    assert all(product["type"] in missing_types for product in result["products"])
+    assert {product["product_id"] for product in result["products"]} <= set(
+        products_db.get_eligible_product_ids(result["age"])
+    )
+
+
+def test_premium_quotes_per_customer():
+    result = asyncio.run(customer_crm.get_premium_quotes(["cust001", "missing"], coverage_amounts=[100_000, 100_000]))
+
+    assert result["coverage_amounts"] == [100_000]
+    assert result["errors"] == {
+        "missing": {"error_code": "CUSTOMER_NOT_FOUND", "message": "Customer with ID 'missing' not found"}
+    }
+    quote = result["quotes"]["cust001"]
+    assert quote["age"] == customer_db.get_customer("cust001")["personal_info"]["age"]
+    assert set(quote["products"]) <= set(products_db.get_eligible_product_ids(quote["age"], 100_000))
+    assert asyncio.run(customer_crm.get_premium_quotes(["cust001"], coverage_amounts=[-1]))["error_code"] == (
+        "INVALID_COVERAGE_AMOUNTS"
+    )
+
+
+def test_customer_listing_pages_through_all_customers():
+    customer_ids = []
+    cursor = None
+    while True:
+        page = asyncio.run(customer_crm.get_all_customer_data(limit=7, cursor=cursor))
+        customer_ids += [customer["customer_id"] for customer in page["customers"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert customer_ids == [customer_id for customer_id, _ in customer_db.iter_customers()]
+    assert page["total_count"] == len(customer_ids)
+    assert asyncio.run(customer_crm.get_all_customer_data(cursor="bogus"))["error_code"] == "INVALID_CURSOR"
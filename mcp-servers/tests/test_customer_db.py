@@ -0,0 +1,73 @@
+import collections
+import threading
+
+import customer_db
+
+
+def test_history_search_positions_index_the_stored_history():
+    customer_db.put_customer(
+        {
+            "customer_id": "test-history-positions",
+            "personal_info": {"name": "Greta Sommer"},
+            # Written oldest first; stored and searched newest first
+            "communication_history": [
+                {"date": "2024-01-10", "subject": "Quote", "notes": "Asked about a sailing boat policy"},
+                {"date": "2024-06-02", "subject": "Call", "notes": "Moved to a new flat"},
+            ],
+        }
+    )
+
+    results = {
+        customer_id: positions for customer_id, _, positions in customer_db.search_communication_history("sailing")
+    }
+    history = customer_db.get_customer("test-history-positions")["communication_history"]
+
+    assert [history[position]["date"] for position in results["test-history-positions"]] == ["2024-01-10"]
+
+
+def test_name_search_positions_resume_after_a_write():
+    customer_db.put_customer({"customer_id": "test-name-1", "personal_info": {"name": "Quirinus Testmann"}})
+    first = list(customer_db.iter_customer_ids_by_name("quirinus"))
+    customer_db.put_customer({"customer_id": "test-name-2", "personal_info": {"name": "Quirinus Zweiter"}})
+
+    assert [customer_id for _, customer_id in first] == ["test-name-1"]
+    assert [customer_id for _, customer_id in customer_db.iter_customer_ids_by_name("quirinus", first[-1][0])] == [
+        "test-name-2"
+    ]
+
+
+def test_summary_cache_drops_least_recently_used(monkeypatch):
+    monkeypatch.setattr(customer_db, "SUMMARY_CACHE_SIZE", 2)
+    monkeypatch.setattr(customer_db, "_summaries", collections.OrderedDict())
+
+    customer_db.get_customer_summary("cust001")
+    customer_db.get_customer_summary("cust002")
+    customer_db.get_customer_summary("cust001")
+    customer_db.get_customer_summary("cust003")
+
+    assert list(customer_db._summaries) == ["cust001", "cust003"]
+
+
+def test_index_builds_hold_only_their_own_lock(monkeypatch):
+    building, finish = threading.Event(), threading.Event()
+    iter_customers = customer_db._backend.iter_customers
+
+    def slow_iter_customers():
+        building.set()
+        finish.wait(5)
+        return iter_customers()
+
+    monkeypatch.setattr(customer_db._backend, "iter_customers", slow_iter_customers)
+    history_build = threading.Thread(target=customer_db.search_communication_history, args=("renewal",))
+    history_build.start()
+    building.wait()
+    try:
+        # Builds of other indexes don't wait for it
+        assert list(customer_db.iter_customer_ids_by_name("anna"))
+        monkeypatch.setattr(customer_db._backend, "iter_customers", iter_customers)
+        assert customer_db.get_coverage("cust001") is not None
+        assert history_build.is_alive()
+    finally:
+        finish.set()
+        history_build.join()
+    assert customer_db._communication_index is not None
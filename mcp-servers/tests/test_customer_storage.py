@@ -0,0 +1,164 @@
+import itertools
+
+import pytest
+
+import customer_storage
+import datafile
+
+
+def make_customer(number: int) -> dict:
+    return {
+        "customer_id": f"cust{number:03d}",
+        "personal_info": {"name": f"Customer {number}"},
+        "communication_history": [
+            {"date": "2024-01-01", "type": "email", "subject": f"First {number}"},
+            {"date": "2024-02-01", "type": "call", "subject": f"Second {number}"},
+        ],
+    }
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    backend = customer_storage.SqliteCustomerBackend(str(tmp_path / "customers.db"))
+    backend.bulk_load(make_customer(number) for number in range(5))
+    return backend
+
+
+@pytest.fixture(params=["memory", "dicts", "sqlite", "mmap"])
+def backend(request, tmp_path):
+    customers = [make_customer(number) for number in range(5)]
+    if request.param == "memory":
+        backend = customer_storage.InMemoryCustomerBackend()
+    elif request.param == "dicts":
+        backend = customer_storage.InMemoryCustomerBackend({})
+    elif request.param == "sqlite":
+        backend = customer_storage.SqliteCustomerBackend(str(tmp_path / "customers.db"))
+    else:
+        # Data files hold histories newest first, as exported from another backend
+        exported = customer_storage.InMemoryCustomerBackend()
+        exported.bulk_load(customers)
+        path = str(tmp_path / "customers.dat")
+        datafile.write_datafile(
+            path,
+            exported.iter_customers(),
+            {"name": customer_storage.customer_name, "address": customer_storage.customer_address},
+        )
+        return customer_storage.MappedCustomerBackend(path)
+    backend.bulk_load(customers)
+    return backend
+
+
+def test_backend_looks_up_customers(backend):
+    assert backend.contains("cust002")
+    assert not backend.contains("missing")
+    assert backend.get("missing") is None
+    assert backend.get("cust002")["personal_info"] == {"name": "Customer 2"}
+    assert "communication_history" not in backend.get("cust002", with_history=False)
+    assert list(backend.get_many(["cust004", "missing", "cust001"])) == ["cust004", "cust001"]
+    assert backend.size() == 5
+
+
+def test_backend_stores_histories_newest_first(backend):
+    entries, total = backend.get_history("cust001")
+
+    assert [entry["subject"] for entry in entries] == ["Second 1", "First 1"]
+    assert total == 2
+    assert backend.get_history("cust001", until="2024-01-15") == (
+        [{"date": "2024-01-01", "type": "email", "subject": "First 1"}],
+        1,
+    )
+    assert backend.get_history("missing") is None
+
+
+def test_backend_iterates_in_storage_order(backend):
+    ids = [f"cust{number:03d}" for number in range(5)]
+
+    assert [customer_id for customer_id, _ in backend.iter_customers()] == ids
+    assert list(backend.iter_names()) == [(customer_id, f"Customer {int(customer_id[4:])}") for customer_id in ids]
+    assert list(backend.get_all()) == ids
+
+
+def test_backend_replaces_and_adds_customers(backend):
+    backend.put({**make_customer(2), "personal_info": {"name": "Renamed"}})
+    backend.put(make_customer(5))
+
+    assert backend.get("cust002")["personal_info"] == {"name": "Renamed"}
+    assert [entry["subject"] for entry in backend.get("cust005")["communication_history"]] == ["Second 5", "First 5"]
+    assert backend.size() == 6
+
+
+def test_backend_listing_resumes_after_a_position(backend):
+    first_page = list(itertools.islice(backend.iter_listing(), 2))
+    backend.put(make_customer(5))
+    rest = list(backend.iter_listing(first_page[-1][0]))
+
+    assert [listing for _, listing in first_page] == [("cust000", "Customer 0", ""), ("cust001", "Customer 1", "")]
+    # Customers added in between are listed after the existing ones
+    assert [customer_id for _, (customer_id, _, _) in rest] == ["cust002", "cust003", "cust004", "cust005"]
+    positions = [position for position, _ in first_page + rest]
+    assert positions == sorted(set(positions))
+
+
+def trace_statements(backend) -> list[str]:
+    statements: list[str] = []
+    backend._connection().set_trace_callback(statements.append)
+    return statements
+
+
+def test_sqlite_get_many_loads_histories_per_chunk(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(sqlite_backend, "_BATCH_SIZE", 2)
+    statements = trace_statements(sqlite_backend)
+
+    customers = sqlite_backend.get_many(["cust003", "cust000", "missing", "cust004"])
+
+    assert list(customers) == ["cust003", "cust000", "cust004"]
+    assert [entry["subject"] for entry in customers["cust003"]["communication_history"]] == ["Second 3", "First 3"]
+    assert sum("FROM communications" in statement for statement in statements) == 2
+
+
+def test_sqlite_iter_customers_loads_histories_per_chunk(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(sqlite_backend, "_BATCH_SIZE", 2)
+    statements = trace_statements(sqlite_backend)
+
+    customers = dict(sqlite_backend.iter_customers())
+
+    assert list(customers) == [f"cust{number:03d}" for number in range(5)]
+    for number, customer in enumerate(customers.values()):
+        assert customer == {
+            **make_customer(number),
+            "communication_history": make_customer(number)["communication_history"][::-1],
+        }
+    assert sum("FROM communications" in statement for statement in statements) == 3
+
+
+def test_sqlite_customer_without_history(sqlite_backend):
+    sqlite_backend.put({"customer_id": "quiet", "personal_info": {"name": "Quiet Customer"}})
+
+    assert sqlite_backend.get_many(["quiet"]) == {
+        "quiet": {"customer_id": "quiet", "personal_info": {"name": "Quiet Customer"}}
+    }
+    assert sqlite_backend.get("cust001", with_history=False) == {
+        "customer_id": "cust001",
+        "personal_info": {"name": "Customer 1"},
+    }
+
+
+def test_sqlite_picks_up_customers_added_by_other_connections(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(sqlite_backend, "_REFRESH_INTERVAL", 0)
+    other = customer_storage.SqliteCustomerBackend(sqlite_backend._path)
+
+    assert sqlite_backend.get("cust100") is None
+    other.put(make_customer(100))
+
+    assert sqlite_backend.get("cust100") == other.get("cust100")
+    assert sqlite_backend.size() == 6
+
+
+def test_sqlite_filter_misses_check_for_new_customers_once_per_interval(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(sqlite_backend, "_REFRESH_INTERVAL", 3600)
+    statements = trace_statements(sqlite_backend)
+
+    for number in range(100, 110):
+        assert not sqlite_backend.contains(f"cust{number}")
+
+    assert sum("data_version" in statement for statement in statements) <= 1
@@ -0,0 +1,74 @@
+import pytest
+
+import datafile
+
+RECORDS = [
+    ("cust002", {"personal_info": {"name": "Thomas Schmidt"}, "score": 2}),
+    ("cust001", {"personal_info": {"name": "Anna Müller"}, "score": 1}),
+    ("cust003", {"personal_info": {"name": "Jörg Weiß"}, "score": 3}),
+]
+
+
+def _name(record: dict) -> str:
+    return record["personal_info"]["name"]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "customers.dat")
+    datafile.write_datafile(path, RECORDS, {"name": _name})
+    return path
+
+
+def test_round_trip_keeps_records_and_order(path):
+    data_file = datafile.MappedDataFile(path)
+
+    assert len(data_file) == len(RECORDS)
+    assert list(data_file.items()) == RECORDS
+    assert data_file["cust003"] == RECORDS[2][1]
+    assert "cust004" not in data_file
+    with pytest.raises(KeyError):
+        data_file["cust004"]
+
+
+def test_columns_are_read_without_decoding_records(path):
+    data_file = datafile.MappedDataFile(path)
+
+    assert data_file.columns == ["name"]
+    assert list(data_file.iter_column("name")) == [(record_id, _name(record)) for record_id, record in RECORDS]
+    assert list(data_file.iter_column("name", start=2)) == [("cust003", "Jörg Weiß")]
+
+
+def test_header_fits_when_positions_grow(tmp_path):
+    # Many small sections: placing them behind the header adds digits to every position in the header
+    records = [("cust001", {"personal_info": {"name": "Anna Müller"}})]
+    columns = {f"column{i}": lambda record, i=i: f"{_name(record)} {i}" for i in range(200)}
+    path = str(tmp_path / "wide.dat")
+
+    datafile.write_datafile(path, records, columns)
+
+    data_file = datafile.MappedDataFile(path)
+    assert data_file["cust001"] == records[0][1]
+    assert [next(data_file.iter_column(column))[1] for column in columns] == [f"Anna Müller {i}" for i in range(200)]
+
+
+def test_overlay_replaces_file_records_and_appends_new_ones(path):
+    mapped = datafile.MappedRecords(path)
+    mapped["cust001"] = {"personal_info": {"name": "Anna Schulz"}}
+    mapped["cust004"] = {"personal_info": {"name": "Lena Vogel"}}
+
+    assert len(mapped) == 4
+    assert list(mapped) == ["cust002", "cust001", "cust003", "cust004"]
+    assert mapped["cust001"] == {"personal_info": {"name": "Anna Schulz"}}
+    assert list(mapped.iter_column("name", _name, start=1)) == [
+        ("cust001", "Anna Schulz"),
+        ("cust003", "Jörg Weiß"),
+        ("cust004", "Lena Vogel"),
+    ]
+
+
+def test_refuses_big_endian_machines(path, monkeypatch):
+    monkeypatch.setattr(datafile.sys, "byteorder", "big")
+
+    with pytest.raises(ValueError, match="big-endian"):
+        datafile.MappedDataFile(path)
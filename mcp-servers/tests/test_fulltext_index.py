@@ -0,0 +1,31 @@
+import fulltext_index
+
+
+def test_positions_index_the_matching_texts():
+    index = fulltext_index.FullTextIndex()
+    index.add("cust001", ["Phone call about the car insurance", "Claim for a damaged boat", "Newsletter"])
+    index.add("cust002", ["Boat insurance renewal"])
+
+    matches = {document for document, _ in index.search("boat")}
+
+    assert matches == {("cust001", 1), ("cust002", 0)}
+
+
+def test_better_matches_rank_first():
+    index = fulltext_index.FullTextIndex()
+    index.add("cust001", ["Asked about life insurance", "Life insurance quote for the life of the spouse"])
+
+    ranked = [document for document, _ in index.search("life")]
+
+    assert ranked == [("cust001", 1), ("cust001", 0)]
+
+
+def test_replaced_and_removed_texts_no_longer_match():
+    index = fulltext_index.FullTextIndex()
+    index.add("cust001", ["Boat insurance"])
+    index.add("cust002", ["Boat trailer"])
+    index.add("cust001", ["Car insurance"])
+    index.remove("cust002")
+
+    assert index.search("boat") == []
+    assert [document for document, _ in index.search("car")] == [("cust001", 0)]
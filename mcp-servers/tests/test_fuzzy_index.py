@@ -0,0 +1,50 @@
+import pytest
+
+import fuzzy_index
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "distance"),
+    [
+        ("weber", "weber", 0),
+        ("weber", "webber", 1),
+        ("weber", "wbeer", 1),  # transposition
+        ("weber", "wagner", None),
+    ],
+)
+def test_edit_distance(a, b, distance):
+    assert fuzzy_index.edit_distance(a, b, 2) == distance
+
+
+@pytest.mark.parametrize("prefix_length", [3, fuzzy_index.DEFAULT_PREFIX_LENGTH, 20])
+def test_search_ranks_by_distance_then_insertion_order(prefix_length):
+    index = fuzzy_index.SymSpellIndex(prefix_length=prefix_length)
+    index.add("cust0", "Anna Schwarzenegger")
+    index.add("cust1", "Anna Schwarzeneger")
+    index.add("cust2", "Anna Schwarzenegger")
+    index.add("cust3", "Hans Becker")
+
+    # Typos past the prefix are only caught by verifying the full token
+    assert index.search("anna schwarzeneggre") == [("cust0", 1), ("cust2", 1), ("cust1", 2)]
+    assert index.search("Hnas Beker") == [("cust3", 2)]
+
+
+def test_short_tokens_must_match_exactly():
+    index = fuzzy_index.SymSpellIndex()
+    index.add("cust0", "Dr Anna Weber")
+
+    assert index.search("dr weber") == [("cust0", 0)]
+    assert index.search("da weber") == []
+
+
+def test_replace_and_remove():
+    index = fuzzy_index.SymSpellIndex()
+    index.add("cust0", "Anna Weber")
+    index.add("cust0", "Anna Becker")
+
+    assert index.search("weber") == []
+    assert index.search("becker") == [("cust0", 0)]
+
+    index.remove("cust0")
+    assert index.search("becker") == []
+    assert not index._deletes
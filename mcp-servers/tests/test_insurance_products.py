@@ -0,0 +1,38 @@
+import asyncio
+import json
+
+import insurance_products
+import products_db
+
+
+def get_product_details(product_id: str):
+    return asyncio.run(insurance_products.get_product_details(product_id))
+
+
+def test_repeated_calls_are_served_from_the_cache():
+    first = get_product_details("CYBER002")
+    second = get_product_details("CYBER002")
+
+    assert second is first
+    assert json.loads(first.content[0].text) == first.structured_content
+    assert first.structured_content["product"]["name"] == "OnlineSchutz Basic"
+
+
+def test_cached_responses_are_replaced_when_the_catalog_changes():
+    before = get_product_details("CYBER002")
+
+    products_db.put_product("CYBER002", {**products_db.get_product("CYBER002"), "name": "OnlineSchutz Neu"})
+    after = get_product_details("CYBER002")
+
+    assert before.structured_content["product"]["name"] == "OnlineSchutz Basic"
+    assert after.structured_content["product"]["name"] == "OnlineSchutz Neu"
+
+
+def test_product_listing_pages_through_the_catalog():
+    first_page = asyncio.run(insurance_products.get_insurance_products(limit=5)).structured_content
+    rest = asyncio.run(
+        insurance_products.get_insurance_products(limit=100, cursor=first_page["next_cursor"])
+    ).structured_content
+
+    assert list(first_page["products"]) + list(rest["products"]) == list(products_db.get_product_ids())
+    assert rest["next_cursor"] is None
@@ -0,0 +1,44 @@
+import math
+
+import interpreter_pool
+import products_db
+import recommendations
+
+NAMES = (("cust0", "Anna Müller"), ("cust1", "Thomas Schmidt"), ("cust2", "Hannah Weber"))
+
+
+def init_worker():
+    interpreter_pool.init_worker(tuple(products_db.get_all_products().items()), NAMES)
+
+
+def test_worker_searches_names_after_building_the_indexes_lazily():
+    init_worker()
+
+    assert interpreter_pool._name_indexes is None
+    assert interpreter_pool.search_names("anna", -1, 10) == [(0, "cust0"), (2, "cust2")]
+    assert interpreter_pool.search_names("anna", 0, 10) == [(2, "cust2")]
+    assert interpreter_pool.fuzzy_search("Tohmas Schmitd", 2) == [("cust1", 2)]
+
+
+def test_worker_applies_names_written_before_and_after_the_build():
+    init_worker()
+    interpreter_pool.put_worker_name("cust1", "Thomas Becker")
+    interpreter_pool.build_name_indexes()
+    interpreter_pool.put_worker_name("cust3", "Greta Becker")
+
+    # Written names keep the position of the name they replace
+    assert interpreter_pool.search_names("becker", -1, 10) == [(1, "cust1"), (3, "cust3")]
+
+
+def test_worker_scores_like_the_serving_interpreter():
+    init_worker()
+    customer = {"customer_id": "cust0", "personal_info": {"name": "Anna Müller", "age": 35, "children": 2}}
+
+    eligible_ids = products_db.get_eligible_product_ids(35)
+    expected = recommendations.rank(
+        customer, ((product_id, products_db.get_product(product_id)) for product_id in eligible_ids)
+    )
+
+    assert interpreter_pool.score_customers([("cust0", customer)]) == [("cust0", tuple(expected))]
+    # An unknown age is only eligible for products without an age range
+    assert interpreter_pool._age_index.stab(math.nan) == products_db.get_eligible_product_ids(math.nan)
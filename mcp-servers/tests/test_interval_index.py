@@ -0,0 +1,29 @@
+import math
+
+import pytest
+
+import interval_index
+
+INTERVALS = [
+    ("young", 18, 30),
+    ("adult", 18, 67),
+    ("senior", 60, math.inf),
+    ("any", -math.inf, math.inf),
+    ("empty", 50, 40),
+]
+
+
+@pytest.mark.parametrize("point", [0, 17.5, 18, 25, 30, 30.5, 60, 67, 67.1, 100])
+def test_stab_matches_a_scan_in_insertion_order(point):
+    index = interval_index.IntervalIndex(INTERVALS)
+
+    assert index.stab(point) == tuple(key for key, low, high in INTERVALS if low <= point <= high)
+
+
+def test_unknown_point_is_only_contained_by_unbounded_intervals():
+    assert interval_index.IntervalIndex(INTERVALS).stab(math.nan) == ("any",)
+
+
+def test_missing_bounds_are_unbounded():
+    assert interval_index.bounds({"min": 18}, "min", "max") == (18, math.inf)
+    assert interval_index.bounds({}, "min", "max") == (-math.inf, math.inf)
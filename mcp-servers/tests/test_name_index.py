@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+import customer_db
+import name_index
+
+
+def _index(*names: str) -> name_index.TrigramIndex:
+    index = name_index.TrigramIndex()
+    for number, name in enumerate(names):
+        index.add(f"cust{number}", name)
+    return index
+
+
+def test_search_finds_substrings_in_insertion_order():
+    index = _index("Thomas Schmidt", "Anna Müller", "Johanna Schmitt", "Hannah Weber")
+
+    assert index.search("schmi") == ["cust0", "cust2"]
+    assert index.search("ANNA") == ["cust1", "cust2", "cust3"]
+    assert index.search("weber") == ["cust3"]
+    assert index.search("meier") == []
+
+
+def test_candidates_sharing_all_trigrams_are_verified():
+    # Contains the trigrams of "abcd", but not the substring itself
+    index = _index("abcx bcd", "abcd")
+
+    assert index.search("abcd") == ["cust1"]
+
+
+def test_replaced_and_removed_names_no_longer_match():
+    index = _index("Anna Müller", "Karl Busch")
+    index.add("cust0", "Anna Schulz")
+    index.remove("cust1")
+
+    assert index.search("müller") == []
+    assert index.search("busch") == []
+    assert index.search("schulz") == ["cust0"]
+    assert len(index) == 1
+
+
+@pytest.mark.parametrize("term", ["an", "anna"])
+def test_matches_resume_after_a_position(term):
+    index = _index("Anna Müller", "Karl Busch", "Johanna Schmitt", "Hannah Weber", "Anna Schulz")
+
+    first_page = list(itertools.islice(index.iter_matches(term), 2))
+    rest = list(index.iter_matches(term, first_page[-1][0]))
+
+    assert [key_id for _, key_id in first_page + rest] == index.search(term)
+    assert [position for position, _ in first_page + rest] == sorted({position for position, _ in first_page + rest})
+
+
+def test_warm_up_builds_the_name_indexes():
+    customer_db.warm_up()
+
+    assert customer_db._name_index is not None
+    assert customer_db._fuzzy_name_index is not None
@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+
+import pytest
+
+import customer_storage
+import offload
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id")
+
+
+def test_run_executes_in_the_worker_pool_with_the_callers_context():
+    def blocking_call(suffix: str) -> tuple[str, str]:
+        return threading.current_thread().name, request_id.get() + suffix
+
+    async def call() -> tuple[str, str]:
+        request_id.set("request-1")
+        return await offload.run(blocking_call, "!")
+
+    thread_name, value = asyncio.run(call())
+
+    assert thread_name.startswith("tool-worker")
+    assert value == "request-1!"
+
+
+def test_in_worker_pool_keeps_the_signature_and_docstring():
+    def tool(name: str, limit: int | None = None) -> dict:
+        """Find things."""
+        return {"name": name, "limit": limit}
+
+    offloaded = offload.in_worker_pool(tool)
+
+    assert inspect.signature(offloaded) == inspect.signature(tool)
+    assert offloaded.__doc__ == "Find things."
+    assert asyncio.run(offloaded("anna", limit=3)) == {"name": "anna", "limit": 3}
+
+
+def test_blocked_calls_do_not_block_the_event_loop():
+    release = threading.Event()
+
+    async def call() -> list[str]:
+        order = []
+        blocked = asyncio.ensure_future(offload.run(release.wait, 5))
+        blocked.add_done_callback(lambda _: order.append("blocked"))
+        await asyncio.sleep(0)
+        order.append("loop")
+        release.set()
+        await blocked
+        return order
+
+    assert asyncio.run(call()) == ["loop", "blocked"]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_map_ordered_keeps_the_input_order(monkeypatch, parallel):
+    monkeypatch.setattr(offload, "PARALLEL_THREADS", parallel)
+    monkeypatch.setattr(offload, "COMPUTE_THREADS", 2)
+    monkeypatch.setattr(offload, "COMPUTE_CHUNK_SIZE", 3)
+
+    assert list(offload.map_ordered(lambda number: number * number, range(100))) == [
+        number * number for number in range(100)
+    ]
+
+
+def test_offloaded_backend_serves_the_synchronous_backend():
+    backend = customer_storage.InMemoryCustomerBackend()
+    backend.put({"customer_id": "cust001", "personal_info": {"name": "Anna Müller"}})
+    offloaded = customer_storage.OffloadedCustomerBackend(backend)
+
+    async def read() -> tuple:
+        return (
+            await offloaded.contains("cust001"),
+            await offloaded.get("cust001"),
+            await offloaded.get_many(customer_id for customer_id in ["cust001", "missing"]),
+            await offloaded.get_history("missing"),
+        )
+
+    assert asyncio.run(read()) == (True, backend.get("cust001"), {"cust001": backend.get("cust001")}, None)
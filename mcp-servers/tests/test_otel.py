@@ -0,0 +1,51 @@
+import asyncio
+
+from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
+
+import otel
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def request(asgi_app) -> list[dict]:
+    messages: list[dict] = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b"", "server": ("x", 80)}
+    asyncio.run(asgi_app(scope, receive, send))
+    return messages
+
+
+def test_deferred_setup_only_configures_logging(monkeypatch):
+    setups = []
+    monkeypatch.setattr(otel, "_completed", False)
+    monkeypatch.setattr(otel, "_setup_providers", lambda: setups.append("providers"))
+
+    otel.setup_otel()
+
+    assert otel.is_deferred()
+    assert setups == []
+
+
+def test_complete_setup_instruments_the_serving_app(monkeypatch):
+    setups = []
+    monkeypatch.setattr(otel, "_completed", False)
+    monkeypatch.setattr(otel, "_setup_providers", lambda: setups.append("providers"))
+    deferred_app = otel.DeferredInstrumentation(app)
+
+    assert request(deferred_app)[0]["status"] == 204
+    otel.complete_setup(deferred_app)
+    otel.complete_setup(deferred_app)
+
+    assert setups == ["providers"]
+    assert not otel.is_deferred()
+    assert isinstance(deferred_app._instrumented, OpenTelemetryMiddleware)
+    assert request(deferred_app)[0]["status"] == 204
@@ -0,0 +1,61 @@
+import pytest
+
+import pagination
+
+
+def test_cursor_round_trip():
+    cursor = pagination.encode_cursor("list_customers", 41)
+
+    assert pagination.decode_cursor(cursor, "list_customers") == 41
+
+
+def test_missing_cursor_starts_from_the_beginning():
+    assert pagination.decode_cursor(None, "list_customers") == -1
+    assert pagination.decode_cursor("", "list_customers") == -1
+
+
+def test_cursor_of_another_query_is_rejected():
+    cursor = pagination.encode_cursor("search_customer_by_name:anna", 3)
+
+    with pytest.raises(pagination.InvalidCursorError):
+        pagination.decode_cursor(cursor, "search_customer_by_name:thomas")
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(pagination.InvalidCursorError):
+        pagination.decode_cursor("not a cursor", "list_customers")
+
+
+def test_pages_resume_after_the_last_returned_position():
+    # Positions need not be contiguous, e.g. when results are filtered
+    items = [(position, f"item{position}") for position in range(0, 20, 3)]
+
+    pages = []
+    after = -1
+    while after is not None:
+        page, after = pagination.paginate(iter(items), -1 if after is None else after, 3)
+        pages.append(page)
+
+    assert pages == [["item0", "item3", "item6"], ["item9", "item12", "item15"], ["item18"]]
+
+
+def test_paginate_stops_consuming_after_the_page():
+    consumed = []
+
+    def items():
+        for position in range(100):
+            consumed.append(position)
+            yield position, position
+
+    page, next_position = pagination.paginate(items(), -1, 5)
+
+    assert page == [0, 1, 2, 3, 4]
+    assert next_position == 4
+    assert len(consumed) == 6
+
+
+def test_cursor_carries_state_to_the_next_page():
+    cursor = pagination.encode_cursor("search_customer_by_name:anna", 49, "summary")
+
+    assert pagination.decode_cursor_state(cursor, "search_customer_by_name:anna") == (49, "summary")
+    assert pagination.decode_cursor_state(pagination.encode_cursor("list_customers", 7), "list_customers") == (7, None)
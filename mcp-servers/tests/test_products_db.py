@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+import products_db
+
+
+def test_all_products_is_a_snapshot_of_one_catalog_version():
+    products = products_db.get_all_products()
+    product_ids = list(products)
+
+    products_db.put_product("TEST001", {"name": "Test Insurance", "type": "test insurance"})
+
+    assert list(products) == product_ids
+    assert "TEST001" in products_db.get_all_products()
+    with pytest.raises(TypeError):
+        products["TEST002"] = {}  # type: ignore[index]
+
+
+def test_segment_and_type_indexes_match_a_scan_in_catalog_order():
+    products = products_db.get_all_products()
+    segments = {segment for product in products.values() for segment in product.get("target_segments", ())}
+
+    for segment in segments:
+        assert products_db.get_product_ids_by_segment(segment) == tuple(
+            product_id for product_id, product in products.items() if segment in product.get("target_segments", ())
+        )
+    for product_type in products_db.get_product_types():
+        assert products_db.get_product_ids_by_type(product_type) == tuple(
+            product_id for product_id, product in products.items() if product.get("type") == product_type
+        )
+    assert products_db.get_product_ids_by_segment("no such segment") == ()
+
+
+def test_put_product_updates_the_indexes_and_summaries():
+    version = products_db.get_catalog_version()
+
+    products_db.put_product(
+        "TEST001", {"name": "Test Insurance", "type": "test insurance", "target_segments": ["testers"]}
+    )
+
+    assert products_db.get_catalog_version() == version + 1
+    assert products_db.get_product_ids_by_segment("testers") == ("TEST001",)
+    assert products_db.get_product_ids_by_type("test insurance") == ("TEST001",)
+    assert products_db.get_product_summary("TEST001") == products_db.summarize_product(
+        "TEST001", products_db.get_product("TEST001")
+    )
+
+
+@pytest.mark.parametrize(("age", "coverage_amount"), [(25, None), (70, 100_000), (None, 5_000_000), (40, 250_000)])
+def test_eligible_products_match_a_scan(age, coverage_amount):
+    def accepts(product: dict) -> bool:
+        age_range = product.get("age_range", {})
+        return (age is None or age_range.get("min", -math.inf) <= age <= age_range.get("max", math.inf)) and (
+            coverage_amount is None
+            or product.get("min_coverage", -math.inf) <= coverage_amount <= product.get("max_coverage", math.inf)
+        )
+
+    assert products_db.get_eligible_product_ids(age, coverage_amount) == tuple(
+        product_id for product_id, product in products_db.get_all_products().items() if accepts(product)
+    )
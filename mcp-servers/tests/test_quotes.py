@@ -0,0 +1,38 @@
+import math
+
+import numpy as np
+
+import quotes
+
+PRODUCTS = [
+    ("LIFE", {"base_premium_rate": 1.5, "age_range": {"min": 18, "max": 65}, "max_coverage": 500_000}),
+    ("HOME", {"base_premium_rate": 0.25, "min_coverage": 100_000}),
+    ("PET", {"name": "Unrated"}),
+]
+
+
+def test_rate_table_holds_only_rated_products():
+    rate_table = quotes.RateTable.from_products(PRODUCTS)
+
+    assert rate_table.product_ids == ("LIFE", "HOME")
+    assert rate_table.select(["HOME", "PET"]).product_ids == ("HOME",)
+
+
+def test_quote_matches_a_scalar_computation():
+    rate_table = quotes.RateTable.from_products(PRODUCTS)
+    ages = np.array([30, 70, np.nan])
+    levels = np.array([50_000, 250_000, 1_000_000], dtype=float)
+
+    premiums = quotes.quote(rate_table, ages, levels)
+
+    assert premiums.shape == (3, 2, 3)
+    for customer, age in enumerate(ages):
+        for product, (_, data) in enumerate(PRODUCTS[:2]):
+            for level_index, level in enumerate(levels):
+                age_range = data.get("age_range", {})
+                eligible = ("age_range" not in data or age_range["min"] <= age <= age_range["max"]) and data.get(
+                    "min_coverage", 0
+                ) <= level <= data.get("max_coverage", math.inf)
+                expected = round(level / 1000 * data["base_premium_rate"], 2) if eligible else None
+                premium = premiums[customer, product, level_index]
+                assert (None if np.isnan(premium) else premium) == expected
@@ -0,0 +1,64 @@
+import threading
+
+import customer_db
+import products_db
+
+NEW_PRODUCT = {"type": "test insurance", "name": "Test Insurance", "target_segments": ["families"]}
+
+
+def product_ids(customer_id: str) -> list[str]:
+    return [recommendation.product_id for recommendation in customer_db.get_recommendations(customer_id) or ()]
+
+
+def test_scoring_reads_the_catalog_snapshot(monkeypatch):
+    def get_product(product_id):
+        raise AssertionError("products are decoded once per catalog version")
+
+    monkeypatch.setattr(products_db, "get_product", get_product)
+
+    assert product_ids("cust001")
+
+
+def test_warm_up_builds_the_recommendations():
+    customer_db.warm_up()
+
+    assert customer_db._recommendation_table is not None
+    assert customer_db._recommendation_catalog_version == products_db.get_catalog_version()
+
+
+def test_catalog_changes_are_scored_in_the_background(monkeypatch):
+    before = product_ids("cust001")
+    products_db.put_product("TEST001", NEW_PRODUCT)
+    rebuilding, finish = threading.Event(), threading.Event()
+    build = customer_db._build_recommendations
+
+    def slow_build():
+        rebuilding.set()
+        finish.wait(5)
+        return build()
+
+    monkeypatch.setattr(customer_db, "_build_recommendations", slow_build)
+
+    # Requests get the previous table while the rebuild runs
+    assert product_ids("cust001") == before
+    rebuilding.wait()
+    finish.set()
+    rebuild = customer_db._recommendation_rebuild
+    assert rebuild is not None
+    rebuild.join()
+
+    assert customer_db._recommendation_catalog_version == products_db.get_catalog_version()
+    assert customer_db.get_recommendations("cust001") == customer_db._score_customer(
+        customer_db.get_customer("cust001"), products_db.get_all_products()
+    )
+
+
+def test_written_customers_are_rescored():
+    product_ids("cust001")
+    customer = customer_db.get_customer("cust001")
+    customer["existing_policies"] = []
+    customer_db.put_customer(customer)
+
+    assert customer_db.get_recommendations("cust001") == customer_db._score_customer(
+        customer, products_db.get_all_products()
+    )
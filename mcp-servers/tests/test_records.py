@@ -0,0 +1,51 @@
+import products_db
+import records
+
+CUSTOMER = {
+    "customer_id": "cust0",
+    "personal_info": {"name": "Anna Weber", "age": 40, "marital_status": "married"},
+    "existing_policies": [
+        {"policy_id": "pol0", "product_type": "auto", "status": "active", "vehicle": {"make": "VW", "year": 2019}}
+    ],
+    "communication_history": [
+        {"date": "2024-01-01", "type": "email", "subject": "Welcome"},
+        {"date": "2024-03-01", "type": "call", "subject": "Renewal"},
+    ],
+    "customer_segment": "family",
+    "tags": ["vip"],
+}
+
+
+def test_customer_round_trip():
+    customer = records.Customer.from_dict(CUSTOMER).to_dict()
+
+    assert customer["personal_info"] == CUSTOMER["personal_info"]
+    assert customer["existing_policies"] == CUSTOMER["existing_policies"]
+    assert customer["tags"] == ["vip"]
+    # Stored newest first
+    assert [entry["date"] for entry in customer["communication_history"]] == ["2024-03-01", "2024-01-01"]
+
+
+def test_records_share_no_mutable_values():
+    stored = records.CompactRecords(records.Customer, {"cust0": CUSTOMER})
+
+    read = stored["cust0"]
+    read["tags"].append("changed")
+    read["existing_policies"][0]["vehicle"]["year"] = 2000
+    CUSTOMER["existing_policies"][0]["vehicle"]["make"] = "changed"
+
+    try:
+        again = stored["cust0"]
+        assert again["tags"] == ["vip"]
+        assert again["existing_policies"][0]["vehicle"] == {"make": "VW", "year": 2019}
+    finally:
+        CUSTOMER["existing_policies"][0]["vehicle"]["make"] = "VW"
+
+
+def test_catalog_products_are_copies():
+    product = products_db.get_product("LIFE001")
+    product["age_range"]["min"] = -1
+    product["features"].append("changed")
+
+    assert products_db.get_product("LIFE001")["age_range"]["min"] != -1
+    assert "changed" not in products_db.get_product("LIFE001")["features"]
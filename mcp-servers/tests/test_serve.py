@@ -0,0 +1,55 @@
+import gc
+import os
+import signal
+import types
+
+import pytest
+
+import offload
+import serve
+
+
+@pytest.mark.filterwarnings("ignore:.*fork.*:DeprecationWarning")
+def test_supervisor_gives_up_after_repeated_crashes(monkeypatch):
+    forks = []
+
+    def crashing_worker(server, host, port, shared_socket):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(3)
+        forks.append(pid)
+        return pid
+
+    monkeypatch.setattr(serve, "_fork_worker", crashing_worker)
+    monkeypatch.setattr(serve, "RESPAWN_DELAY", 0)
+    monkeypatch.setattr(serve, "MAX_CRASHES", 3)
+    monkeypatch.setattr(serve.signal, "signal", lambda signum, handler: None)
+    try:
+        with pytest.raises(SystemExit) as exit_info:
+            serve.serve_workers(types.ModuleType("server"), "127.0.0.1", 0, workers=1, reuse_port=True)
+    finally:
+        gc.unfreeze()
+
+    assert exit_info.value.code == 1
+    assert len(forks) == 3
+
+
+@pytest.mark.filterwarnings("ignore:.*fork.*:DeprecationWarning")
+def test_forked_processes_get_executors_of_their_own(monkeypatch):
+    monkeypatch.setattr(offload, "PARALLEL_THREADS", True)
+    monkeypatch.setattr(offload, "COMPUTE_THREADS", 2)
+    monkeypatch.setattr(offload, "COMPUTE_CHUNK_SIZE", 1)
+    # Start the parent's compute threads, which the child doesn't inherit
+    assert list(offload.map_ordered(abs, [-1, -2, -3])) == [1, 2, 3]
+
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        # Die instead of hanging if work is queued for the parent's threads
+        signal.alarm(5)
+        try:
+            exit_code = 0 if list(offload.map_ordered(abs, [-4, -5, -6])) == [4, 5, 6] else 1
+        finally:
+            os._exit(exit_code)
+
+    assert os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0
@@ -0,0 +1,36 @@
+import pytest
+
+import customer_db
+import name_index
+import text_folding
+
+
+@pytest.mark.parametrize(
+    ("text", "key"),
+    [
+        ("Müller", "mueller"),
+        ("MUELLER", "mueller"),
+        ("Mu\u0308ller", "mueller"),  # decomposed umlaut
+        ("Straße", "strasse"),
+        ("Zoë Dvořák", "zoe dvorak"),
+        ("Łukasz Østergård", "lukasz ostergaard"),
+    ],
+)
+def test_fold(text, key):
+    assert text_folding.fold(text) == key
+
+
+def test_names_match_in_either_spelling():
+    index = name_index.TrigramIndex()
+    index.add("cust0", "Jörg Weiß")
+    index.add("cust1", "Joerg Weiss")
+
+    assert index.search("jörg weiß") == ["cust0", "cust1"]
+    assert index.search("JOERG WEISS") == ["cust0", "cust1"]
+
+
+def test_customer_search_ignores_umlaut_spelling():
+    assert [customer_id for _, customer_id in customer_db.iter_customer_ids_by_name("Mueller")] == [
+        customer_id for _, customer_id in customer_db.iter_customer_ids_by_name("Müller")
+    ]
+    assert "cust001" in [customer_id for _, customer_id in customer_db.iter_customer_ids_by_name("anna mueller")]